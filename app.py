@@ -1,16 +1,102 @@
 #!/usr/bin/env python3
+import time
+
+# Точка отсчета трассировки запуска - до всех тяжелых импортов
+_STARTUP_T0 = time.perf_counter()
+
 import sys
 import os
+import gc
 import sqlite3
-from datetime import datetime
+from array import array
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+# ==============================
+# ПЕРЕХОД СО СТАРОГО ЛАУНЧЕРА
+# ==============================
+# Лаунчер первых версий качает только app.py и requirements.txt и сам себя не обновляет.
+# Если рядом нет модулей, без которых app.py не запустится, докачиваем весь релиз по
+# manifest.json (модули, новый launcher.py, картинки) и только потом импортируем их
+BOOTSTRAP_MODULES = ('event_log', 'governor', 'metrics', 'rfid_reader', 'stall_watchdog',
+                     'supervisor', 'workers', 'sensor', 'tracing', 'workout_journal', 'realtime',
+                     'updater', 'lan_cache')
+
+
+def bootstrap_release(app_dir):
+    """Докачивает недостающие файлы релиза. Сначала все файлы скачиваются и проверяются
+    по SHA-256 во временные, затем заменяются разом - launcher.py последним, чтобы прерванная
+    докачка не оставила новый лаунчер без его модулей"""
+    import hashlib
+    import json
+    from urllib.parse import quote
+    from urllib.request import urlopen
+
+    base_url = os.environ.get('SMART_TRAINER_UPDATE_URL',
+                              "https://raw.githubusercontent.com/DenisASUTP/OP_4/main")
+
+    def fetch(rel_path):
+        with urlopen(f"{base_url}/{quote(rel_path)}", timeout=30) as response:
+            return response.read()
+
+    def sha256_file(path):
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    app_dir = os.path.abspath(app_dir)
+    manifest = json.loads(fetch('manifest.json').decode('utf-8'))
+    staged = []
+    try:
+        for rel_path, info in sorted(manifest['files'].items(), key=lambda item: item[0] == 'launcher.py'):
+            path = os.path.abspath(os.path.join(app_dir, rel_path))
+            if os.path.isabs(rel_path) or os.path.commonpath([app_dir, path]) != app_dir:
+                raise ValueError(f"недопустимый путь в манифесте: {rel_path!r}")
+            # app.py уже новый - это мы сами
+            if rel_path == 'app.py' or (os.path.exists(path) and sha256_file(path) == info['sha256']):
+                continue
+            data = fetch(rel_path)
+            if hashlib.sha256(data).hexdigest() != info['sha256']:
+                raise IOError(f"{rel_path}: хэш не совпадает")
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path + '.tmp', 'wb') as f:
+                f.write(data)
+            staged.append(path)
+        for path in staged:
+            os.replace(path + '.tmp', path)
+    finally:
+        for path in staged:
+            if os.path.exists(path + '.tmp'):
+                os.remove(path + '.tmp')
+    return len(staged)
+
+
+_APP_DIR = os.path.dirname(os.path.abspath(__file__))
+if not all(os.path.exists(os.path.join(_APP_DIR, name + '.py')) for name in BOOTSTRAP_MODULES):
+    try:
+        print(f"Докачано файлов релиза: {bootstrap_release(_APP_DIR)}")
+    except Exception as e:
+        # Без модулей работать нельзя. Старый лаунчер при следующем запуске снова
+        # запустит этот app.py, и докачка повторится
+        sys.exit(f"Не удалось докачать файлы релиза: {e}")
+
+from event_log import log
 
 # ==============================
 # УНИВЕРСАЛЬНАЯ НАСТРОЙКА QT
 # ==============================
-if sys.platform == "win32":
+# Режим без дисплея (CI, сервер, бенчмарки): SMART_TRAINER_HEADLESS=1 или --headless
+HEADLESS = os.environ.get('SMART_TRAINER_HEADLESS') == '1' or '--headless' in sys.argv
+
+if HEADLESS:
+    os.environ['QT_QPA_PLATFORM'] = 'offscreen'
+    os.environ['SMART_TRAINER_HEADLESS'] = '1'
+    log.info("Headless: Используем платформу 'offscreen'")
+
+elif sys.platform == "win32":
     # Для WINDOWS
     os.environ['QT_QPA_PLATFORM'] = 'windows'
-    print(f"Windows: Используем платформу 'windows'")
+    log.info("Windows: Используем платформу 'windows'")
 
     # Ищем плагины Qt
     try:
@@ -21,14 +107,14 @@ if sys.platform == "win32":
 
         if os.path.exists(plugin_path):
             os.environ['QT_QPA_PLATFORM_PLUGIN_PATH'] = plugin_path
-            print(f"Windows: Путь к плагинам: {plugin_path}")
+            log.info("Windows: Путь к плагинам", path=plugin_path)
     except ImportError:
         pass
 
 elif sys.platform == "linux":
     # Для LINUX / ORANGE PI
     os.environ['QT_QPA_PLATFORM'] = 'xcb'
-    print(f"Linux: Используем платформу 'xcb'")
+    log.info("Linux: Используем платформу 'xcb'")
 
     # Для Orange Pi с GUI
     if 'DISPLAY' not in os.environ:
@@ -39,34 +125,270 @@ from PySide6.QtWidgets import (QApplication, QWidget, QPushButton, QVBoxLayout,
                                QHBoxLayout, QLabel, QStackedWidget, QListWidget,
                                QListWidgetItem, QProgressBar, QMessageBox, QScrollArea,
                                QGridLayout, QFrame, QDialog, QLineEdit, QFormLayout)
-from PySide6.QtCore import Qt, QTimer, Signal
-from PySide6.QtGui import QFont, QPixmap, QPainter, QColor, QIntValidator, QBrush, QPen
+from PySide6.QtCore import Qt, QTimer, Signal, QObject, QEvent
+from PySide6.QtGui import QFont, QPixmap, QPainter, QColor, QIntValidator, QBrush, QPen, QImage
+
+import governor
+import metrics
+import rfid_reader
+import stall_watchdog
+import supervisor
+import workers
+from sensor import ModbusSimulator
+from tracing import tracer
+from workout_journal import WorkoutJournal
+
+# Задержки сценария входа, мс. Быстрый режим (SMART_TRAINER_FAST_LOGIN=1)
+# убирает паузы, которые лишь ждут уже сделанную работу
+LOGIN_DELAYS = {
+    'keyboard_settle': 500,
+    'user_found': 1000,
+    'welcome_advance': 3000,
+}
+FAST_LOGIN_DELAYS = {
+    'keyboard_settle': 0,
+    'user_found': 0,
+    'welcome_advance': 1000,
+}
+if os.environ.get('SMART_TRAINER_FAST_LOGIN') == '1':
+    LOGIN_DELAYS.update(FAST_LOGIN_DELAYS)
+
+TRACE_PATH = os.environ.get('SMART_TRAINER_TRACE')
+# Без файла трассировки события копить незачем: буфер на 20000 событий - это мегабайты
+tracer.enabled = bool(TRACE_PATH)
+# Трассировщик создан при импорте tracing, позже _STARTUP_T0 - иначе интервал imports начнется до нуля
+tracer.t0 = _STARTUP_T0
+
+# Период опроса датчика силы на экране тренировки, мс
+SENSOR_INTERVAL_MS = 100
+SENSOR_INTERVAL_S = SENSOR_INTERVAL_MS / 1000.0
+# Дольше этого подход без сборки мусора не идет: забытый открытым экран
+# тренировки не должен копить циклические ссылки часами
+MAX_GC_PAUSE_MS = 10 * 60 * 1000
+
+# Сбор данных и запись в базу в отдельных процессах (см. workers.py)
+WORKERS_ENABLED = os.environ.get('SMART_TRAINER_WORKERS') == '1'
+
+# Резерв супервизора: все подготовлено, окно строится по команде (см. supervisor.py)
+STANDBY = '--standby' in sys.argv
+
+# Подстройка фоновой работы под нагрев платы (см. governor.py)
+GOVERNOR_ENABLED = os.environ.get('SMART_TRAINER_GOVERNOR') != '0'
+# Период фонового обслуживания базы, мс
+DB_MAINTENANCE_INTERVAL_MS = 30 * 60 * 1000
+
+# Метрики процесса. Эндпоинт включается SMART_TRAINER_METRICS_PORT (см. metrics.py)
+sensor_samples = metrics.counter('smart_trainer_sensor_samples_total', 'Прочитано отсчетов датчика силы')
+sensor_timer_lateness = metrics.histogram('smart_trainer_sensor_timer_lateness_seconds',
+                                          'Опоздание таймера опроса датчика')
+db_query_latency = metrics.histogram('smart_trainer_db_query_seconds', 'Время запросов к базе')
+db_commit_latency = metrics.histogram('smart_trainer_db_commit_seconds', 'Время записи в базу с commit')
+prefetch_hits = metrics.counter('smart_trainer_prefetch_hits_total',
+                                'Профиль, предзагруженный при входе, готов к первому обращению')
+prefetch_misses = metrics.counter('smart_trainer_prefetch_misses_total',
+                                  'Предзагрузка профиля не успела к первому обращению')
+image_cache_hits = metrics.counter('smart_trainer_image_cache_hits_total', 'Картинка упражнения взята из кэша')
+image_cache_misses = metrics.counter('smart_trainer_image_cache_misses_total',
+                                     'Картинка упражнения загружена синхронно')
+pixmap_cache_hits = metrics.counter('smart_trainer_pixmap_cache_hits_total', 'Нарисованные картинки из кэша')
+pixmap_cache_misses = metrics.counter('smart_trainer_pixmap_cache_misses_total', 'Картинки, нарисованные заново')
+image_load_latency = metrics.histogram('smart_trainer_image_load_seconds', 'Загрузка и масштабирование картинок')
+login_latency = metrics.histogram('smart_trainer_login_seconds', 'От касания карты до показа каталога',
+                                  buckets=(0.1, 0.25, 0.5, 1.0, 1.5, 2.0, 3.0, 4.0, 5.0, 7.5, 10.0))
+ui_stalls = metrics.histogram('smart_trainer_ui_stall_seconds', 'Зависания цикла событий интерфейса',
+                              buckets=(0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0))
+gc_pauses = metrics.histogram('smart_trainer_gc_pause_seconds', 'Паузы сборщика мусора')
+
+# Готовые строки для значений, которые меняются каждый кадр: f-строка на каждом
+# тике - лишнее выделение на горячем пути. Вне диапазона форматируем как раньше
+FORCE_TEXTS = [f"{i / 10:.1f} Н" for i in range(2001)]
+INT_TEXTS = [str(i) for i in range(1001)]
+
+
+def format_force(force):
+    # Сравнение ложно и для NaN - такие значения форматируются f-строкой
+    if 0.0 <= force < 200.05:
+        return FORCE_TEXTS[int(force * 10.0 + 0.5)]
+    return f"{force:.1f} Н"
+
+
+def bar_value(force):
+    # int() от NaN и бесконечности бросает исключение прямо в тике
+    return int(force) if -1e9 < force < 1e9 else 0
+
+
+def format_int(value):
+    if 0 <= value < len(INT_TEXTS):
+        return INT_TEXTS[value]
+    return str(value)
+
+
+# Сборка мусора: объекты запуска замораживаются (gc.freeze), во время подхода
+# автоматическая сборка выключена, мусор собирается между подходами
+_gc_started = [0.0]
+
+
+def track_gc_pause(phase, info):
+    # Интерпретатор вызывает до и после каждой сборки, в том числе автоматической
+    if phase == 'start':
+        _gc_started[0] = time.perf_counter()
+    else:
+        gc_pauses.observe(time.perf_counter() - _gc_started[0])
+
+
+def freeze_startup_objects():
+    """Виджеты, кэши и модули живут до выхода - после gc.freeze сборщик их не обходит"""
+    gc.collect()
+    gc.freeze()
+
+
+# Трассировка запуска: импорты, открытие БД, построение виджетов, первый кадр
+class StartupTrace:
+    def __init__(self, t0):
+        self.t0 = t0
+        self.last = t0
+        self.marks = []
+        self.finished = False
+
+    def mark(self, stage):
+        now = time.perf_counter()
+        self.marks.append((stage, (now - self.last) * 1000.0, (now - self.t0) * 1000.0))
+        tracer.complete(stage, self.last, now, cat='startup')
+        self.last = now
+
+    def total_ms(self):
+        return self.marks[-1][2] if self.marks else 0.0
+
+    def report(self):
+        lines = ["Трассировка запуска:"]
+        for stage, delta_ms, total_ms in self.marks:
+            lines.append(f"  {stage:<16} {delta_ms:8.1f} мс  (всего {total_ms:8.1f} мс)")
+        return "\n".join(lines)
+
+
+startup_trace = StartupTrace(_STARTUP_T0)
+startup_trace.mark("imports")
+
+
+def report_handoff():
+    """Время от передачи управления лаунчером до экрана входа.
+    Лаунчер кладет метку в SMART_TRAINER_HANDOFF_T0 (time.time(), общая для процессов)"""
+    handoff_t0 = os.environ.pop('SMART_TRAINER_HANDOFF_T0', None)
+    if not handoff_t0:
+        return None
+    elapsed_ms = (time.time() - float(handoff_t0)) * 1000.0
+    tracer.instant("handoff", cat='startup', elapsed_ms=elapsed_ms)
+    log.info(f"От лаунчера до экрана входа: {elapsed_ms:.1f} мс", handoff_ms=round(elapsed_ms, 1))
+    return elapsed_ms
+
+
+# Общий кэш процедурно нарисованных картинок: каждая рисуется один раз за процесс
+_pixmap_cache = {}
+
+
+def cached_pixmap(key, width, height, draw):
+    pixmap = _pixmap_cache.get(key)
+    if pixmap is not None:
+        pixmap_cache_hits.inc()
+    else:
+        pixmap_cache_misses.inc()
+        pixmap = QPixmap(width, height)
+        pixmap.fill(Qt.GlobalColor.transparent)
+        painter = QPainter(pixmap)
+        painter.setRenderHint(QPainter.Antialiasing)
+        draw(painter)
+        painter.end()
+        _pixmap_cache[key] = pixmap
+    return pixmap
+
+
+def draw_logo(painter, offset, size):
+    painter.setBrush(QColor(33, 160, 56))
+    painter.setPen(Qt.NoPen)
+    painter.drawEllipse(offset, offset, size, size)
+    painter.setBrush(QColor(255, 255, 255))
+    painter.drawEllipse(offset + size // 4, offset + size // 4, size // 2, size // 2)
+
+
+def draw_rfid_icon(painter):
+    painter.setBrush(QColor(33, 160, 56))
+    painter.drawRoundedRect(40, 20, 100, 80, 10, 10)
+    painter.setBrush(QColor(200, 200, 200))
+    painter.drawRoundedRect(60, 85, 60, 15, 7, 7)
+
+
+def auth_logo_pixmap():
+    return cached_pixmap('auth_logo', 100, 100, lambda painter: draw_logo(painter, 0, 100))
+
+
+def welcome_logo_pixmap():
+    return cached_pixmap('welcome_logo', 120, 120, lambda painter: draw_logo(painter, 10, 100))
+
 
+def rfid_icon_pixmap():
+    return cached_pixmap('rfid_icon', 180, 120, draw_rfid_icon)
 
-# Заглушка для Modbus RTU
-class ModbusSimulator:
-    def __init__(self):
-        self.current_force = 0
-        self.target_force = 0
-        self.position = 0
-        self.is_connected = True
 
-    def read_force_sensor(self):
-        self.current_force += (self.target_force - self.current_force) * 0.1
-        return self.current_force + (0.5 - (datetime.now().microsecond % 1000) / 1000.0)
+# Пул экранов: каждый экран создается один раз при первом обращении
+# и дальше переиспользуется, новые данные получает через свои методы
+class ScreenPool:
+    def __init__(self, stacked_widget):
+        self.stacked_widget = stacked_widget
+        self.factories = {}
+        self.screens = {}
 
-    def set_target_force(self, force):
-        self.target_force = force
+    def register(self, name, factory):
+        self.factories[name] = factory
 
-    def get_position(self):
-        self.position += 0.1
-        return self.position % 100
+    def get(self, name):
+        screen = self.screens.get(name)
+        if screen is None:
+            screen = self.factories[name]()
+            self.screens[name] = screen
+            self.stacked_widget.addWidget(screen)
+        return screen
+
+    def is_built(self, name):
+        return name in self.screens
+
+    def is_current(self, name):
+        screen = self.screens.get(name)
+        return screen is not None and self.stacked_widget.currentWidget() is screen
+
+    def show(self, name):
+        screen = self.get(name)
+        self.stacked_widget.setCurrentWidget(screen)
+        return screen
+
+
+# Кольцевой буфер отсчетов датчика силы.
+# total - сквозной номер следующего отсчета, по нему читатели
+# (график, статистика) отслеживают свою позицию без копирования буфера
+class SampleBuffer:
+    def __init__(self, capacity=4096):
+        self.capacity = capacity
+        self.data = array('d', bytes(8 * capacity))
+        self.total = 0
+
+    def append(self, value):
+        self.data[self.total % self.capacity] = value
+        self.total += 1
+
+    def clear(self):
+        self.total = 0
+
+    def oldest(self):
+        return max(0, self.total - self.capacity)
+
+    def value_at(self, index):
+        return self.data[index % self.capacity]
 
 
 # База данных пользователей
 class UserDatabase:
-    def __init__(self):
-        self.conn = sqlite3.connect('users.db', check_same_thread=False)
+    def __init__(self, path='users.db'):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
         self.create_tables()
 
     def create_tables(self):
@@ -95,9 +417,14 @@ class UserDatabase:
                 FOREIGN KEY (user_id) REFERENCES users (id)
             )
         ''')
+
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_workouts_user ON workouts (user_id, id)
+        ''')
         self.conn.commit()
 
     def add_user(self, rf_id, first_name, last_name, height, fitness_level):
+        start = time.perf_counter()
         cursor = self.conn.cursor()
         try:
             cursor.execute('''
@@ -105,24 +432,100 @@ class UserDatabase:
                 VALUES (?, ?, ?, ?, ?)
             ''', (rf_id, first_name, last_name, height, fitness_level))
             self.conn.commit()
+            db_commit_latency.observe(time.perf_counter() - start)
             return True
         except sqlite3.IntegrityError:
+            # Иначе открытая транзакция держит блокировку записи для других процессов
+            self.conn.rollback()
             return False
 
     def find_user_by_rfid(self, rf_id):
+        start = time.perf_counter()
         cursor = self.conn.cursor()
         cursor.execute('''
             SELECT * FROM users WHERE rf_id = ?
         ''', (rf_id,))
-        return cursor.fetchone()
+        user = cursor.fetchone()
+        db_query_latency.observe(time.perf_counter() - start)
+        return user
 
     def save_workout(self, user_id, exercise_name, repetitions, intensity, duration):
+        start = time.perf_counter()
         cursor = self.conn.cursor()
         cursor.execute('''
             INSERT INTO workouts (user_id, exercise_name, repetitions, intensity, duration)
             VALUES (?, ?, ?, ?, ?)
         ''', (user_id, exercise_name, repetitions, intensity, duration))
         self.conn.commit()
+        db_commit_latency.observe(time.perf_counter() - start)
+
+
+# Запросы истории тренировок. Принимают соединение, чтобы выполняться
+# и в основном потоке, и в потоке предзагрузки со своим соединением
+def query_recent_workouts(conn, user_id, limit=10):
+    start = time.perf_counter()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT exercise_name, repetitions, intensity, duration, workout_date
+        FROM workouts WHERE user_id = ?
+        ORDER BY id DESC LIMIT ?
+    ''', (user_id, limit))
+    rows = cursor.fetchall()
+    db_query_latency.observe(time.perf_counter() - start)
+    return rows
+
+
+def query_last_loads(conn, user_id):
+    # Последняя тренировка по каждому упражнению (SQLite берет строку с MAX(id))
+    start = time.perf_counter()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT exercise_name, repetitions, intensity, duration, MAX(id)
+        FROM workouts WHERE user_id = ?
+        GROUP BY exercise_name
+    ''', (user_id,))
+    rows = cursor.fetchall()
+    db_query_latency.observe(time.perf_counter() - start)
+    return {row[0]: {'repetitions': row[1], 'intensity': row[2], 'duration': row[3]}
+            for row in rows}
+
+
+def query_exercise_usage(conn, user_id, limit=3):
+    start = time.perf_counter()
+    cursor = conn.cursor()
+    cursor.execute('''
+        SELECT exercise_name, COUNT(*) AS times
+        FROM workouts WHERE user_id = ?
+        GROUP BY exercise_name ORDER BY times DESC LIMIT ?
+    ''', (user_id, limit))
+    rows = cursor.fetchall()
+    db_query_latency.observe(time.perf_counter() - start)
+    return [row[0] for row in rows]
+
+
+def optimize_database(path):
+    """Обновляет статистику планировщика запросов. Выполняется в фоновом потоке"""
+    start = time.perf_counter()
+    conn = sqlite3.connect(path, timeout=10)
+    try:
+        # Ограничение выборки делает ANALYZE быстрым и на большой истории тренировок
+        conn.execute('PRAGMA analysis_limit=400')
+        conn.execute('ANALYZE')
+        conn.commit()
+    finally:
+        conn.close()
+    log.info("Обслуживание базы выполнено", ms=round((time.perf_counter() - start) * 1000.0, 1))
+
+
+def load_scaled_image(image_path, width, height):
+    # QImage можно загружать и масштабировать вне потока интерфейса
+    start = time.perf_counter()
+    image = QImage(image_path)
+    if not image.isNull():
+        image = image.scaled(width, height, Qt.AspectRatioMode.KeepAspectRatio,
+                             Qt.TransformationMode.SmoothTransformation)
+    image_load_latency.observe(time.perf_counter() - start)
+    return image
 
 
 # Диалог регистрации нового пользователя
@@ -274,15 +677,26 @@ class RegistrationDialog(QDialog):
 
 
 # Экран приветствия
+# Создается один раз, для каждого входа заново привязывается к данным пользователя
 class WelcomeScreen(QWidget):
-    def __init__(self, user_data, parent=None):
+    def __init__(self, parent=None):
         super().__init__(parent)
         self.parent = parent
-        self.user_data = user_data
+        self.user_data = None
         self.initUI()
 
-        # Автоматический переход через 3 секунды
-        QTimer.singleShot(3000, self.go_to_exercises)
+        # Автоматический переход после привязки пользователя
+        self.advance_timer = QTimer(self)
+        self.advance_timer.setSingleShot(True)
+        self.advance_timer.timeout.connect(self.go_to_exercises)
+
+    def bind_user(self, user_data, advance_ms=3000):
+        self.user_data = user_data
+        self.welcome_text.setText(f"Здравствуйте, {user_data['first_name']} {user_data['last_name']}!")
+        self.height_label.setText(f"Рост: {user_data['height']} см")
+        self.level_label.setText(f"Уровень: {user_data['fitness_level']}")
+        self.instruction.setText(f"Переход к выбору упражнений через {advance_ms / 1000:g} сек...")
+        self.advance_timer.start(advance_ms)
 
     def initUI(self):
         layout = QVBoxLayout()
@@ -292,23 +706,13 @@ class WelcomeScreen(QWidget):
         # Логотип/иконка
         logo_label = QLabel()
         logo_label.setAlignment(Qt.AlignCenter)
-        logo_pixmap = QPixmap(120, 120)
-        logo_pixmap.fill(Qt.GlobalColor.transparent)
-        painter = QPainter(logo_pixmap)
-        painter.setRenderHint(QPainter.Antialiasing)
-        painter.setBrush(QColor(33, 160, 56))
-        painter.setPen(Qt.NoPen)
-        painter.drawEllipse(10, 10, 100, 100)
-        painter.setBrush(QColor(255, 255, 255))
-        painter.drawEllipse(35, 35, 50, 50)
-        painter.end()
-        logo_label.setPixmap(logo_pixmap)
+        logo_label.setPixmap(welcome_logo_pixmap())
 
         # Приветствие
-        welcome_text = QLabel(f"Здравствуйте, {self.user_data['first_name']} {self.user_data['last_name']}!")
-        welcome_text.setFont(QFont("Arial", 22, QFont.Bold))
-        welcome_text.setStyleSheet("color: #333333;")
-        welcome_text.setAlignment(Qt.AlignCenter)
+        self.welcome_text = QLabel()
+        self.welcome_text.setFont(QFont("Arial", 22, QFont.Bold))
+        self.welcome_text.setStyleSheet("color: #333333;")
+        self.welcome_text.setAlignment(Qt.AlignCenter)
 
         # Комплимент
         compliment = QLabel("Рады видеть вас снова!")
@@ -329,24 +733,24 @@ class WelcomeScreen(QWidget):
         info_layout = QHBoxLayout(info_frame)
         info_layout.setSpacing(30)
 
-        height_label = QLabel(f"Рост: {self.user_data['height']} см")
-        height_label.setFont(QFont("Arial", 14))
-        height_label.setStyleSheet("color: #666666;")
+        self.height_label = QLabel()
+        self.height_label.setFont(QFont("Arial", 14))
+        self.height_label.setStyleSheet("color: #666666;")
 
-        level_label = QLabel(f"Уровень: {self.user_data['fitness_level']}")
-        level_label.setFont(QFont("Arial", 14))
-        level_label.setStyleSheet("color: #666666;")
+        self.level_label = QLabel()
+        self.level_label.setFont(QFont("Arial", 14))
+        self.level_label.setStyleSheet("color: #666666;")
 
         info_layout.addStretch()
-        info_layout.addWidget(height_label)
-        info_layout.addWidget(level_label)
+        info_layout.addWidget(self.height_label)
+        info_layout.addWidget(self.level_label)
         info_layout.addStretch()
 
         # Инструкция
-        instruction = QLabel("Переход к выбору упражнений через 3 секунды...")
-        instruction.setFont(QFont("Arial", 12))
-        instruction.setStyleSheet("color: #999999;")
-        instruction.setAlignment(Qt.AlignCenter)
+        self.instruction = QLabel("Переход к выбору упражнений через 3 секунды...")
+        self.instruction.setFont(QFont("Arial", 12))
+        self.instruction.setStyleSheet("color: #999999;")
+        self.instruction.setAlignment(Qt.AlignCenter)
 
         # Кнопка перехода сейчас
         btn_now = QPushButton("Начать сейчас")
@@ -371,18 +775,19 @@ class WelcomeScreen(QWidget):
 
         layout.addStretch()
         layout.addWidget(logo_label)
-        layout.addWidget(welcome_text)
+        layout.addWidget(self.welcome_text)
         layout.addWidget(compliment)
         layout.addSpacing(10)
         layout.addWidget(info_frame)
         layout.addStretch()
-        layout.addWidget(instruction)
+        layout.addWidget(self.instruction)
         layout.addWidget(btn_now)
 
         self.setLayout(layout)
         self.setStyleSheet("background-color: #C0C0C0;")
 
     def go_to_exercises(self):
+        self.advance_timer.stop()
         if self.parent:
             self.parent.show_exercise_screen()
 
@@ -505,17 +910,427 @@ class ExerciseWidget(QFrame):
         super().mousePressEvent(event)
 
 
+# График силы текущего подхода.
+# Отсчеты прореживаются до пары min/max на столбец пикселей, готовые столбцы
+# дорисовываются в буфер-картинку, а на экране перерисовывается только
+# появившаяся справа полоса - остальное сдвигается через scroll()
+class ForceChartWidget(QWidget):
+    # Столбцов за один вызов advance; больше - рисуем частями
+    COLUMN_BUFFER = 1024
+
+    def __init__(self, samples, samples_per_column=4, max_value=100, fps=30, parent=None):
+        super().__init__(parent)
+        self.samples = samples
+        self.samples_per_column = samples_per_column
+        self.max_value = max_value
+        self.read_pos = samples.total
+
+        self.column_min = 0.0
+        self.column_max = 0.0
+        self.column_count = 0
+        self.last_value = None
+        # Готовые столбцы копятся в заранее выделенных массивах, а не в списке кортежей
+        self.column_mins = array('d', bytes(8 * self.COLUMN_BUFFER))
+        self.column_maxs = array('d', bytes(8 * self.COLUMN_BUFFER))
+        self.grid_ys = ()
+
+        self.background = QColor(255, 255, 255)
+        self.grid_pen = QPen(QColor(232, 232, 232), 1)
+        self.curve_pen = QPen(QColor(33, 160, 56), 2)
+
+        self.canvas = QPixmap()
+        self.setAttribute(Qt.WidgetAttribute.WA_OpaquePaintEvent)
+        self.setMinimumHeight(140)
+        self.setMaximumHeight(140)
+
+        self.frame_timer = QTimer(self)
+        self.frame_timer.timeout.connect(self.advance)
+        self.set_fps(fps)
+
+    def set_fps(self, fps):
+        self.frame_timer.setInterval(max(1, int(1000 / fps)))
+
+    def reset(self):
+        self.read_pos = self.samples.total
+        self.column_count = 0
+        self.last_value = None
+        self.clear_canvas()
+        self.update()
+
+    def clear_canvas(self):
+        if self.canvas.isNull():
+            return
+        self.canvas.fill(self.background)
+        self.grid_ys = tuple(self.canvas.height() * i // 4 for i in range(1, 4))
+        painter = QPainter(self.canvas)
+        painter.setPen(self.grid_pen)
+        for y in self.grid_ys:
+            painter.drawLine(0, y, self.canvas.width(), y)
+        painter.end()
+
+    def value_to_y(self, value):
+        height = self.canvas.height() - 2
+        value = min(max(value, 0.0), self.max_value)
+        return 1 + int(height - value * height / self.max_value)
+
+    def advance(self):
+        samples = self.samples
+        total = samples.total
+        # Если отстали больше чем на емкость буфера - старые отсчеты уже затерты
+        start = max(self.read_pos, samples.oldest())
+        if start >= total:
+            return
+
+        mins = self.column_mins
+        maxs = self.column_maxs
+        columns = 0
+        spc = self.samples_per_column
+        col_min = self.column_min
+        col_max = self.column_max
+        count = self.column_count
+        for index in range(start, total):
+            value = samples.value_at(index)
+            if count == 0:
+                col_min = col_max = value if self.last_value is None else self.last_value
+            if value < col_min:
+                col_min = value
+            elif value > col_max:
+                col_max = value
+            count += 1
+            if count == spc:
+                mins[columns] = col_min
+                maxs[columns] = col_max
+                columns += 1
+                self.last_value = value
+                count = 0
+                if columns == self.COLUMN_BUFFER:
+                    self.draw_columns(columns)
+                    columns = 0
+
+        self.read_pos = total
+        self.column_min = col_min
+        self.column_max = col_max
+        self.column_count = count
+
+        if columns:
+            self.draw_columns(columns)
+
+    def draw_columns(self, columns):
+        """Дорисовывает первые columns столбцов из column_mins/column_maxs"""
+        if self.canvas.isNull():
+            return
+        width = self.canvas.width()
+        shift = min(columns, width)
+
+        self.canvas.scroll(-shift, 0, 0, 0, width, self.canvas.height())
+
+        painter = QPainter(self.canvas)
+        painter.fillRect(width - shift, 0, shift, self.canvas.height(), self.background)
+        painter.setPen(self.grid_pen)
+        for y in self.grid_ys:
+            painter.drawLine(width - shift, y, width, y)
+        painter.setPen(self.curve_pen)
+        x = width - shift
+        mins = self.column_mins
+        maxs = self.column_maxs
+        for i in range(columns - shift, columns):
+            painter.drawLine(x, self.value_to_y(maxs[i]), x, self.value_to_y(mins[i]))
+            x += 1
+        painter.end()
+
+        # Сдвигаем уже показанное изображение и перерисовываем только новую полосу
+        self.scroll(-shift, 0)
+
+    def resizeEvent(self, event):
+        self.canvas = QPixmap(self.size())
+        self.clear_canvas()
+        super().resizeEvent(event)
+
+    def showEvent(self, event):
+        self.frame_timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.frame_timer.stop()
+        super().hideEvent(event)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        rect = event.rect()
+        painter.drawPixmap(rect, self.canvas, rect)
+        painter.end()
+
+
+# Привязка значений к виджетам.
+# Обновления накапливаются и применяются не чаще одного раза за кадр,
+# виджет трогается только если изменился отформатированный текст.
+# Заодно считает фактические перерисовки привязанных виджетов
+class FrameBinder(QObject):
+    def __init__(self, fps=60, parent=None):
+        super().__init__(parent)
+        self.bindings = {}
+        # Два словаря меняются местами при каждом кадре - новых не создаем
+        self.pending = {}
+        self.spare = {}
+        self.flush_scheduled = False
+
+        self.flush_timer = QTimer(self)
+        self.flush_timer.setSingleShot(True)
+        self.flush_timer.setInterval(max(1, int(1000 / fps)))
+        self.flush_timer.timeout.connect(self.flush)
+
+        self.updates_requested = 0
+        self.updates_applied = 0
+        self.updates_skipped = 0
+        self.repaints = 0
+        self.repaints_per_second = 0.0
+        self.window_start = time.perf_counter()
+        self.window_repaints = 0
+
+    def bind(self, key, widget, setter, formatter=str):
+        self.bindings[key] = [setter, formatter, None]
+        widget.installEventFilter(self)
+
+    def set(self, key, value):
+        self.updates_requested += 1
+        self.pending[key] = value
+        if not self.flush_scheduled:
+            self.flush_scheduled = True
+            self.flush_timer.start()
+
+    def flush(self):
+        self.flush_scheduled = False
+        pending = self.pending
+        self.pending = self.spare
+        for key, value in pending.items():
+            binding = self.bindings[key]
+            text = binding[1](value)
+            if text == binding[2]:
+                self.updates_skipped += 1
+                continue
+            binding[2] = text
+            binding[0](text)
+            self.updates_applied += 1
+        pending.clear()
+        self.spare = pending
+
+    def invalidate(self):
+        # Сбрасывает запомненные значения, следующий set() применится в любом случае
+        for binding in self.bindings.values():
+            binding[2] = None
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Type.Paint:
+            self.repaints += 1
+            self.window_repaints += 1
+            now = time.perf_counter()
+            elapsed = now - self.window_start
+            if elapsed >= 1.0:
+                self.repaints_per_second = self.window_repaints / elapsed
+                self.window_start = now
+                self.window_repaints = 0
+        return False
+
+    def stats(self):
+        return {
+            'requested': self.updates_requested,
+            'applied': self.updates_applied,
+            'skipped': self.updates_skipped,
+            'repaints': self.repaints,
+            'repaints_per_second': round(self.repaints_per_second, 1),
+        }
+
+
+def fix_label_size(label, widest_text):
+    # Фиксированный размер: смена текста не вызывает перекомпоновку родителя
+    metrics = label.fontMetrics()
+    label.setFixedSize(metrics.horizontalAdvance(widest_text) + 4, metrics.height() + 4)
+    label.setAlignment(Qt.AlignRight | Qt.AlignVCenter)
+
+
+# Передает номера карт из потока считывателя в поток интерфейса
+class RfidBridge(QObject):
+    card_read = Signal(str)
+
+
+WORKOUT_IMAGE_SIZE = (380, 260)
+# Сколько профилей участников держать в памяти
+PREFETCH_PROFILES = 32
+
+
+# Упреждающая загрузка данных пользователя сразу после распознавания карты:
+# история, последние нагрузки и картинки любимых упражнений готовятся в фоне,
+# пока показывается экран приветствия. Считает попадания и промахи
+class MemberPrefetcher(QObject):
+    profile_ready = Signal(int, object)
+    images_ready = Signal(object)
+
+    def __init__(self, db, exercises, images_dir, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.images_by_name = {exercise["name"]: exercise["image"] for exercise in exercises}
+        self.images_dir = images_dir
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch")
+        self.worker_conn = None
+
+        # Профили последних участников, самый давний вытесняется первым
+        self.profiles = OrderedDict()
+        self.images = {}
+        # Каждый вход получает свое поколение, им помечается результат предзагрузки
+        self.generation = 0
+        # Вход, первое обращение которого еще не учтено: (user_id, поколение)
+        self.pending_login = None
+        self.hits = 0
+        self.misses = 0
+        self.image_hits = 0
+        self.image_misses = 0
+        self.enabled = True
+        # Вместе с профилем грузить картинки любимых упражнений (выключается при нагреве)
+        self.prefetch_images = True
+
+        self.profile_ready.connect(self.on_profile_ready)
+        self.images_ready.connect(self.store_images)
+
+    def prefetch(self, user_id):
+        """Предзагрузка при входе. Попадание - если ее результат пришел до первого обращения"""
+        self.generation += 1
+        self.pending_login = (user_id, self.generation)
+        if self.enabled:
+            self.executor.submit(self.load_in_background, user_id, self.generation)
+
+    def refresh(self, user_id):
+        """Профиль устарел после сохранения подхода - перечитываем, в статистику входов не идет"""
+        self.forget(user_id)
+        if self.enabled:
+            self.executor.submit(self.load_in_background, user_id, self.generation)
+
+    def load_in_background(self, user_id, generation):
+        if self.worker_conn is None:
+            self.worker_conn = sqlite3.connect(self.db.path)
+        profile = self.load_profile(self.worker_conn, user_id)
+        profile['generation'] = generation
+        favorites = [self.images_by_name.get(name) for name in profile['favorites']]
+        profile['images'] = self.load_images(favorites) if self.prefetch_images else {}
+        self.profile_ready.emit(user_id, profile)
+
+    def load_images(self, image_names):
+        images = {}
+        for image_name in image_names:
+            if image_name and image_name not in self.images and image_name not in images:
+                path = os.path.join(self.images_dir, image_name)
+                if os.path.exists(path):
+                    images[image_name] = load_scaled_image(path, *WORKOUT_IMAGE_SIZE)
+        return images
+
+    def warm_images(self):
+        """Загружает в фоне картинки всех упражнений, которых еще нет в кэше"""
+        missing = [name for name in set(self.images_by_name.values()) if name not in self.images]
+        if missing:
+            self.executor.submit(lambda: self.images_ready.emit(self.load_images(missing)))
+
+    def load_profile(self, conn, user_id):
+        return {
+            'recent': query_recent_workouts(conn, user_id),
+            'last_loads': query_last_loads(conn, user_id),
+            'favorites': query_exercise_usage(conn, user_id),
+        }
+
+    def on_profile_ready(self, user_id, profile):
+        self.store_images(profile.pop('images'))
+        self.store_profile(user_id, profile)
+
+    def store_profile(self, user_id, profile):
+        self.profiles[user_id] = profile
+        self.profiles.move_to_end(user_id)
+        while len(self.profiles) > PREFETCH_PROFILES:
+            self.profiles.popitem(last=False)
+
+    def store_images(self, images):
+        # QPixmap создается только в потоке интерфейса
+        for image_name, image in images.items():
+            if not image.isNull():
+                self.images[image_name] = QPixmap.fromImage(image)
+
+    def profile(self, user_id):
+        profile = self.profiles.get(user_id)
+        if self.pending_login is not None and self.pending_login[0] == user_id:
+            # Первое обращение после входа. Профиль, оставшийся от прошлых входов, не считается
+            generation = self.pending_login[1]
+            self.pending_login = None
+            if profile is not None and profile['generation'] == generation:
+                self.hits += 1
+                prefetch_hits.inc()
+            else:
+                self.misses += 1
+                prefetch_misses.inc()
+                profile = None
+        if profile is None:
+            profile = self.load_profile(self.db.conn, user_id)
+            profile['generation'] = self.generation
+        self.store_profile(user_id, profile)
+        return profile
+
+    def workout_pixmap(self, image_name):
+        pixmap = self.images.get(image_name)
+        if pixmap is not None:
+            self.image_hits += 1
+            image_cache_hits.inc()
+            return pixmap
+        self.image_misses += 1
+        image_cache_misses.inc()
+        path = os.path.join(self.images_dir, image_name)
+        if not os.path.exists(path):
+            return None
+        image = load_scaled_image(path, *WORKOUT_IMAGE_SIZE)
+        if image.isNull():
+            return QPixmap()
+        pixmap = QPixmap.fromImage(image)
+        self.images[image_name] = pixmap
+        return pixmap
+
+    def forget(self, user_id):
+        self.profiles.pop(user_id, None)
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses, 'hit_rate': round(self.hit_rate(), 3),
+                'image_hits': self.image_hits, 'image_misses': self.image_misses}
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
+
+
 # Основной класс приложения
 class SmartTrainerApp(QWidget):
-    def __init__(self):
+    def __init__(self, db=None):
         super().__init__()
-        self.db = UserDatabase()
+        if db is None:
+            db = UserDatabase()
+            startup_trace.mark("db_open")
+        self.db = db
         self.modbus = ModbusSimulator()
+        self.force_samples = SampleBuffer()
+        self.workers = None
+        if WORKERS_ENABLED:
+            # Отсчеты пишет процесс сбора прямо в общую память, график читает их оттуда
+            self.workers = workers.WorkerSupervisor(db.path, interval=SENSOR_INTERVAL_MS / 1000.0)
+            self.workers.on_saved = self.on_workout_saved
+            self.workers.start()
+            self.force_samples = self.workers.ring
+            self.sensor_read_pos = 0
         self.current_user = None
         self.current_exercise = None
         self.current_user_data = None
         self.current_rfid_input = ""
         self.rfid_input_complete = False
+        self.login_span = None
+        self.login_wait_span = None
+        # Контрольные точки подхода на случай сбоя или отключения питания
+        self.journal = WorkoutJournal()
+        self.governor = governor.WorkloadGovernor(on_change=self.apply_workload_profile)
 
         self.exercises = [
             {
@@ -592,11 +1407,44 @@ class SmartTrainerApp(QWidget):
             }
         ]
 
-        self.initUI()
-
+        # Таймер датчиков запускается только на экране тренировки
         self.data_timer = QTimer()
         self.data_timer.timeout.connect(self.update_sensor_data)
-        self.data_timer.start(100)
+        self.workout_active = False
+        self.last_sensor_tick = 0.0
+        self.first_frame_shown = False
+        # Ограничивает время подхода с выключенной сборкой мусора
+        self.gc_pause_timer = QTimer(self)
+        self.gc_pause_timer.setSingleShot(True)
+        self.gc_pause_timer.setInterval(MAX_GC_PAUSE_MS)
+        self.gc_pause_timer.timeout.connect(self.end_gc_pause)
+
+        self.initUI()
+        startup_trace.mark("widgets")
+
+        # Прямой считыватель карт (если настроен), клавиатура остается запасным путем
+        self.rfid_bridge = RfidBridge(self)
+        self.rfid_bridge.card_read.connect(self.on_card_read)
+        self.rfid_reader = rfid_reader.create_reader_from_env(self.rfid_bridge.card_read.emit)
+
+        script_dir = os.path.dirname(os.path.abspath(__file__))
+        self.prefetcher = MemberPrefetcher(self.db, self.exercises,
+                                           os.path.join(script_dir, "images"), self)
+
+        if self.workers is not None:
+            # Супервизор проверяет процессы и принимает подтверждения записи
+            self.workers_timer = QTimer(self)
+            self.workers_timer.timeout.connect(self.workers.poll)
+            self.workers_timer.start(200)
+
+        # Датчики платы опрашиваются редко: уровень меняется за минуты, а не за секунды
+        self.governor_timer = QTimer(self)
+        self.governor_timer.timeout.connect(self.governor.update)
+        if GOVERNOR_ENABLED:
+            self.governor_timer.start(governor.SAMPLE_INTERVAL_MS)
+        self.maintenance_timer = QTimer(self)
+        self.maintenance_timer.timeout.connect(self.run_db_maintenance)
+        self.maintenance_timer.start(DB_MAINTENANCE_INTERVAL_MS)
 
     def initUI(self):
         self.setWindowTitle("Smart Trainer - Orange Pi")
@@ -604,14 +1452,16 @@ class SmartTrainerApp(QWidget):
 
         self.stacked_widget = QStackedWidget()
 
-        self.auth_screen = self.create_auth_screen()
-        self.welcome_screen = None
-        self.exercise_screen = self.create_exercise_screen()
-        self.workout_screen = self.create_workout_screen()
+        # До первого кадра строим только экран авторизации,
+        # остальные экраны создаются по требованию или в простое
+        self.screens = ScreenPool(self.stacked_widget)
+        self.screens.register('auth', self.create_auth_screen)
+        self.screens.register('welcome', lambda: WelcomeScreen(self))
+        self.screens.register('exercise', self.create_exercise_screen)
+        self.screens.register('workout', self.create_workout_screen)
+        self.exercise_catalog_built = False
 
-        self.stacked_widget.addWidget(self.auth_screen)
-        self.stacked_widget.addWidget(self.exercise_screen)
-        self.stacked_widget.addWidget(self.workout_screen)
+        self.auth_screen = self.screens.get('auth')
 
         layout = QVBoxLayout()
         layout.setContentsMargins(0, 0, 0, 0)
@@ -620,6 +1470,58 @@ class SmartTrainerApp(QWidget):
 
         self.show_auth_screen()
 
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self.first_frame_shown:
+            self.first_frame_shown = True
+            # Отметка ставится после того, как кадр целиком отрисован
+            QTimer.singleShot(0, self.on_first_frame)
+
+    def on_first_frame(self):
+        # Трассировка относится к запуску процесса, а не к каждому окну
+        if not startup_trace.finished:
+            startup_trace.mark("first_paint")
+            startup_trace.finished = True
+            log.info(startup_trace.report(), startup_ms=round(startup_trace.total_ms(), 1))
+            report_handoff()
+            supervisor.notify('shown')
+
+        if self.rfid_reader is not None:
+            self.rfid_reader.start()
+        QTimer.singleShot(0, self.offer_recovery)
+
+        # Оставшиеся экраны строим по одному за итерацию цикла событий,
+        # чтобы не блокировать ввод с карты
+        self.deferred_builders = [
+            lambda: self.screens.get('welcome'),
+            lambda: self.screens.get('exercise'),
+            self.build_exercise_catalog,
+            lambda: self.screens.get('workout'),
+            self.warm_image_cache,
+            freeze_startup_objects,
+        ]
+        QTimer.singleShot(0, self.run_next_deferred_builder)
+
+    def run_next_deferred_builder(self):
+        if self.deferred_builders:
+            builder = self.deferred_builders.pop(0)
+            builder()
+            QTimer.singleShot(0, self.run_next_deferred_builder)
+
+    def build_exercise_catalog(self):
+        # Каталог не зависит от пользователя - строим его один раз
+        self.screens.get('exercise')
+        if self.exercise_catalog_built:
+            return
+
+        row = 0
+        for exercise in self.exercises:
+            exercise_widget = ExerciseWidget(exercise, self)
+            self.exercises_layout.addWidget(exercise_widget, row, 0)
+            row += 1
+
+        self.exercise_catalog_built = True
+
     def create_auth_screen(self):
         screen = QWidget()
         layout = QVBoxLayout()
@@ -633,17 +1535,7 @@ class SmartTrainerApp(QWidget):
         # Логотип
         logo_label = QLabel()
         logo_label.setAlignment(Qt.AlignCenter)
-        logo_pixmap = QPixmap(100, 100)
-        logo_pixmap.fill(Qt.GlobalColor.transparent)
-        painter = QPainter(logo_pixmap)
-        painter.setRenderHint(QPainter.Antialiasing)
-        painter.setBrush(QColor(33, 160, 56))
-        painter.setPen(Qt.NoPen)
-        painter.drawEllipse(0, 0, 100, 100)
-        painter.setBrush(QColor(255, 255, 255))
-        painter.drawEllipse(25, 25, 50, 50)
-        painter.end()
-        logo_label.setPixmap(logo_pixmap)
+        logo_label.setPixmap(auth_logo_pixmap())
 
         title = QLabel("SMART TRAINER")
         title.setFont(QFont("Arial", 26, QFont.Bold))
@@ -668,16 +1560,7 @@ class SmartTrainerApp(QWidget):
 
         # Иконка RFID
         rfid_icon = QLabel()
-        rfid_pixmap = QPixmap(180, 120)
-        rfid_pixmap.fill(Qt.GlobalColor.transparent)
-        painter = QPainter(rfid_pixmap)
-        painter.setRenderHint(QPainter.Antialiasing)
-        painter.setBrush(QColor(33, 160, 56))
-        painter.drawRoundedRect(40, 20, 100, 80, 10, 10)
-        painter.setBrush(QColor(200, 200, 200))
-        painter.drawRoundedRect(60, 85, 60, 15, 7, 7)
-        painter.end()
-        rfid_icon.setPixmap(rfid_pixmap)
+        rfid_icon.setPixmap(rfid_icon_pixmap())
         rfid_icon.setAlignment(Qt.AlignCenter)
 
         # Статус авторизации
@@ -736,7 +1619,113 @@ class SmartTrainerApp(QWidget):
         if len(text) == 10 and text.isdigit():
             self.rfid_input_complete = True
             self.auth_status.setText("Обработка карты...")
-            QTimer.singleShot(500, lambda: self.process_rfid(text))
+            self.begin_login_trace("keyboard")
+            self.login_trace_wait("keyboard_settle_wait")
+            QTimer.singleShot(LOGIN_DELAYS['keyboard_settle'], lambda: self.process_rfid(text))
+
+    def on_card_read(self, card_id):
+        # Карта пришла целиком - обрабатываем сразу, без посимвольной индикации
+        if not self.screens.is_current('auth') or self.rfid_input_complete:
+            return
+        self.rfid_input_complete = True
+        self.input_indicator.setText("█" * len(card_id))
+        self.auth_status.setText("Обработка карты...")
+        self.begin_login_trace("reader")
+        self.process_rfid(card_id)
+
+    # Трассировка входа: от касания карты до показа каталога упражнений
+    def begin_login_trace(self, source):
+        self.finish_login_trace('restarted')
+        self.login_span = tracer.begin("login", cat='login', source=source)
+
+    def login_trace_wait(self, name):
+        # Интервал фиксированной задержки - отделяет ожидание от реальной работы
+        self.login_trace_end_wait()
+        if self.login_span is not None:
+            self.login_wait_span = tracer.begin(name, cat='login.wait')
+
+    def login_trace_end_wait(self):
+        if self.login_wait_span is not None:
+            self.login_wait_span.end()
+            self.login_wait_span = None
+
+    def finish_login_trace(self, outcome='catalog'):
+        self.login_trace_end_wait()
+        if self.login_span is None:
+            return
+        self.login_span.end(outcome=outcome)
+        if outcome == 'catalog':
+            login_latency.observe(time.perf_counter() - self.login_span.start)
+        self.login_span = None
+        if TRACE_PATH:
+            try:
+                tracer.export_chrome(TRACE_PATH)
+            except OSError as e:
+                log.warning("Не удалось записать трассировку", error=str(e))
+
+    def apply_workload_profile(self, level, profile):
+        """Ограничивает несрочную работу по уровню нагрузки. Опрос датчика не трогается"""
+        self.prefetcher.enabled = profile['prefetch']
+        self.prefetcher.prefetch_images = profile['prefetch_images']
+        if self.screens.is_built('workout'):
+            self.force_chart.set_fps(profile['chart_fps'])
+        self.warm_image_cache()
+
+    def warm_image_cache(self):
+        if self.governor.profile['warm_images']:
+            self.prefetcher.warm_images()
+
+    def run_db_maintenance(self):
+        # Во время подхода база не трогается даже в фоне
+        if self.governor.profile['maintenance'] and not self.screens.is_current('workout'):
+            self.prefetcher.executor.submit(optimize_database, self.db.path)
+
+    def offer_recovery(self):
+        """Предлагает продолжить или сохранить подход, прерванный сбоем"""
+        session = self.journal.recover()
+        if session is None:
+            return
+        user = self.db.find_user_by_rfid(session['rf_id'])
+        exercise = next((e for e in self.exercises if e['name'] == session['exercise']), None)
+        if user is None or exercise is None:
+            log.warning("Прерванная тренировка не восстановлена", exercise=session['exercise'])
+            self.journal.finish()
+            return
+
+        log.info("Найдена прерванная тренировка", user_id=user[0], exercise=exercise['name'],
+                 reps=session['reps'], elapsed=session['elapsed'])
+        box = QMessageBox(self)
+        box.setWindowTitle("Прерванная тренировка")
+        box.setText(f"{user[2]} {user[3]}\n"
+                    f"Упражнение: {exercise['name']}\n"
+                    f"Повторений: {session['reps']}\n"
+                    f"Длительность: {int(session['elapsed'])} сек")
+        resume_button = box.addButton("Продолжить", QMessageBox.AcceptRole)
+        box.addButton("Сохранить", QMessageBox.RejectRole)
+        box.exec()
+        resume = box.clickedButton() is resume_button
+        box.deleteLater()
+
+        if resume:
+            self.bind_current_user(user)
+            self.prefetcher.prefetch(user[0])
+            self.current_exercise = exercise
+            self.start_workout(exercise, session['reps'], session['elapsed'])
+        else:
+            self.save_workout_record((user[0], exercise['name'], session['reps'],
+                                      exercise['intensity'], int(session['elapsed'])))
+
+    def closeEvent(self, event):
+        # Файл журнала остается: при следующем запуске подход можно будет продолжить
+        self.journal.close()
+        if self.rfid_reader is not None:
+            self.rfid_reader.stop()
+        self.prefetcher.shutdown()
+        if self.workers is not None:
+            self.workers_timer.stop()
+            self.workers.stop()
+        gc.enable()
+        super().closeEvent(event)
 
     def keyPressEvent(self, event):
         key = event.key()
@@ -754,6 +1743,7 @@ class SmartTrainerApp(QWidget):
 
         elif key == Qt.Key.Key_Return or key == Qt.Key.Key_Enter:
             if len(self.current_rfid_input) == 10:
+                self.begin_login_trace("keyboard_enter")
                 self.process_rfid(self.current_rfid_input)
 
         elif key == Qt.Key.Key_Escape:
@@ -764,30 +1754,45 @@ class SmartTrainerApp(QWidget):
             super().keyPressEvent(event)
 
     def process_rfid(self, rfid):
-        self.rfid_hidden_input.clear()
-        self.rfid_input_complete = False
+        self.login_trace_end_wait()
+        with tracer.span("process_rfid", cat='login'):
+            self.rfid_hidden_input.clear()
+            self.rfid_input_complete = False
+
+            with tracer.span("db_lookup", cat='login'):
+                user = self.db.find_user_by_rfid(rfid)
 
-        user = self.db.find_user_by_rfid(rfid)
+            self.handle_rfid_lookup(rfid, user)
 
+    def handle_rfid_lookup(self, rfid, user):
         if user:
-            self.current_user = user
-            self.current_user_data = {
-                'rf_id': user[1],
-                'first_name': user[2],
-                'last_name': user[3],
-                'height': user[4],
-                'fitness_level': user[5]
-            }
+            # Пока идет приветствие, в фоне готовим все для каталога и тренировки
+            self.prefetcher.prefetch(user[0])
+            self.bind_current_user(user)
             self.auth_status.setText("Пользователь найден!")
-            QTimer.singleShot(1000, self.show_welcome_screen)
+            self.login_trace_wait("user_found_wait")
+            QTimer.singleShot(LOGIN_DELAYS['user_found'], self.show_welcome_screen)
         else:
             self.auth_status.setText("Пользователь не найден")
+            self.finish_login_trace('unknown_card')
             QTimer.singleShot(1000, lambda: self.register_new_user(rfid))
 
+    def bind_current_user(self, user):
+        self.current_user = user
+        self.current_user_data = {
+            'rf_id': user[1],
+            'first_name': user[2],
+            'last_name': user[3],
+            'height': user[4],
+            'fitness_level': user[5]
+        }
+
     def register_new_user(self, rfid):
         dialog = RegistrationDialog(rfid, self)
-        if dialog.exec() == QDialog.Accepted:
-            user_data = dialog.get_user_data()
+        accepted = dialog.exec() == QDialog.Accepted
+        user_data = dialog.get_user_data() if accepted else None
+        dialog.deleteLater()
+        if accepted:
             if self.db.add_user(
                     user_data['rf_id'],
                     user_data['first_name'],
@@ -795,6 +1800,7 @@ class SmartTrainerApp(QWidget):
                     user_data['height'],
                     user_data['fitness_level']
             ):
+                self.current_user = self.db.find_user_by_rfid(user_data['rf_id'])
                 self.current_user_data = user_data
                 self.auth_status.setText("Пользователь зарегистрирован!")
                 QTimer.singleShot(1000, self.show_welcome_screen)
@@ -805,19 +1811,13 @@ class SmartTrainerApp(QWidget):
             self.rfid_hidden_input.setFocus()
 
     def show_welcome_screen(self):
+        self.login_trace_end_wait()
         if self.current_user_data:
-            if self.welcome_screen:
-                self.welcome_screen.setParent(None)
-
-            self.welcome_screen = WelcomeScreen(self.current_user_data, self)
-
-            for i in range(self.stacked_widget.count()):
-                if self.stacked_widget.widget(i) == self.welcome_screen:
-                    break
-            else:
-                self.stacked_widget.insertWidget(1, self.welcome_screen)
-
-            self.stacked_widget.setCurrentWidget(self.welcome_screen)
+            with tracer.span("show_welcome_screen", cat='login'):
+                welcome_screen = self.screens.get('welcome')
+                welcome_screen.bind_user(self.current_user_data, LOGIN_DELAYS['welcome_advance'])
+                self.stacked_widget.setCurrentWidget(welcome_screen)
+            self.login_trace_wait("welcome_advance_wait")
 
     def create_exercise_screen(self):
         screen = QWidget()
@@ -846,7 +1846,12 @@ class SmartTrainerApp(QWidget):
         instruction.setFont(QFont("Arial", 13))
         instruction.setStyleSheet("color: #666666;")
 
+        self.last_workout_info = QLabel()
+        self.last_workout_info.setFont(QFont("Arial", 12))
+        self.last_workout_info.setStyleSheet("color: #666666;")
+
         header_layout.addWidget(self.user_info)
+        header_layout.addWidget(self.last_workout_info)
         header_layout.addWidget(instruction)
 
         # Область со списком упражнений
@@ -938,6 +1943,12 @@ class SmartTrainerApp(QWidget):
             font-size: 14px;
         """)
 
+        # Результат прошлой тренировки в этом упражнении
+        self.last_result_label = QLabel()
+        self.last_result_label.setFont(QFont("Arial", 12))
+        self.last_result_label.setAlignment(Qt.AlignCenter)
+        self.last_result_label.setStyleSheet("color: #666666;")
+
         # Панель метрик
         metrics_frame = QFrame()
         metrics_frame.setStyleSheet("""
@@ -964,6 +1975,7 @@ class SmartTrainerApp(QWidget):
         self.force_value = QLabel("0 Н")
         self.force_value.setFont(QFont("Arial", 14, QFont.Bold))
         self.force_value.setStyleSheet("color: #21A038;")
+        fix_label_size(self.force_value, "-000.0 Н")
 
         force_header.addWidget(force_label)
         force_header.addStretch()
@@ -983,9 +1995,14 @@ class SmartTrainerApp(QWidget):
                 border-radius: 4px;
             }
         """)
+        self.force_progress.setMaximum(100)
+
+        # График силы текущего подхода
+        self.force_chart = ForceChartWidget(self.force_samples, fps=self.governor.profile['chart_fps'])
 
         force_layout.addLayout(force_header)
         force_layout.addWidget(self.force_progress)
+        force_layout.addWidget(self.force_chart)
 
         # Повторения
         reps_widget = QWidget()
@@ -997,6 +2014,7 @@ class SmartTrainerApp(QWidget):
         self.reps_value = QLabel("0")
         self.reps_value.setFont(QFont("Arial", 14, QFont.Bold))
         self.reps_value.setStyleSheet("color: #21A038;")
+        fix_label_size(self.reps_value, "00000")
 
         reps_layout.addWidget(reps_label)
         reps_layout.addStretch()
@@ -1012,6 +2030,7 @@ class SmartTrainerApp(QWidget):
         self.intensity_value = QLabel("0%")
         self.intensity_value.setFont(QFont("Arial", 14, QFont.Bold))
         self.intensity_value.setStyleSheet("color: #21A038;")
+        fix_label_size(self.intensity_value, "000%")
 
         intensity_layout.addWidget(intensity_label)
         intensity_layout.addStretch()
@@ -1021,6 +2040,14 @@ class SmartTrainerApp(QWidget):
         metrics_layout.addWidget(reps_widget)
         metrics_layout.addWidget(intensity_widget)
 
+        # Метрики обновляются через привязки - не чаще раза за кадр
+        self.ui_binder = FrameBinder(parent=self)
+        self.ui_binder.bind('force', self.force_value, self.force_value.setText, format_force)
+        self.ui_binder.bind('force_bar', self.force_progress, self.force_progress.setValue, bar_value)
+        self.ui_binder.bind('reps', self.reps_value, self.reps_value.setText, format_int)
+        self.ui_binder.bind('intensity', self.intensity_value, self.intensity_value.setText,
+                            lambda intensity: f"{intensity}%")
+
         # Кнопки управления
         buttons_layout = QHBoxLayout()
         buttons_layout.setSpacing(15)
@@ -1069,6 +2096,7 @@ class SmartTrainerApp(QWidget):
 
         layout.addWidget(self.exercise_title)
         layout.addWidget(self.exercise_image, 0, Qt.AlignCenter)
+        layout.addWidget(self.last_result_label)
         layout.addWidget(metrics_frame)
         layout.addStretch()
         layout.addLayout(buttons_layout)
@@ -1078,7 +2106,14 @@ class SmartTrainerApp(QWidget):
         return screen
 
     def show_auth_screen(self):
-        self.stacked_widget.setCurrentIndex(0)
+        self.finish_login_trace('cancelled')
+        self.data_timer.stop()
+        self.workout_active = False
+        QTimer.singleShot(0, self.collect_between_sets)
+        if self.journal.active:
+            # Уход с экрана тренировки без сохранения - подход отменен
+            self.journal.finish()
+        self.stacked_widget.setCurrentWidget(self.auth_screen)
         self.current_user = None
         self.current_user_data = None
         self.rfid_hidden_input.clear()
@@ -1087,79 +2122,164 @@ class SmartTrainerApp(QWidget):
         self.input_display.setText("Ввод: ")
 
     def show_exercise_screen(self):
+        self.login_trace_end_wait()
         if self.current_user_data:
+            span = tracer.begin("show_exercise_screen", cat='login')
+            self.screens.get('exercise')
             self.user_info.setText(
                 f"Пользователь: {self.current_user_data['first_name']} {self.current_user_data['last_name']} | "
                 f"Рост: {self.current_user_data['height']}см | "
                 f"Уровень: {self.current_user_data['fitness_level']}"
             )
-
-            for i in reversed(range(self.exercises_layout.count())):
-                self.exercises_layout.itemAt(i).widget().setParent(None)
-
-            row = 0
-            for exercise in self.exercises:
-                exercise_widget = ExerciseWidget(exercise, self)
-                self.exercises_layout.addWidget(exercise_widget, row, 0)
-                row += 1
-
-            self.stacked_widget.setCurrentWidget(self.exercise_screen)
+            self.last_workout_info.setText(self.format_last_workout())
+
+            self.data_timer.stop()
+            self.workout_active = False
+            if self.journal.active:
+                self.journal.finish()
+            # Экран каталога сначала отрисуется, мусор соберем следом
+            QTimer.singleShot(0, self.collect_between_sets)
+            self.build_exercise_catalog()
+            self.screens.show('exercise')
+            span.end()
+            # Вход завершен, когда каталог отрисован
+            if self.login_span is not None:
+                QTimer.singleShot(0, self.finish_login_trace)
+
+    def save_workout_record(self, record):
+        # Журнал закрываем, но файл остается, пока запись не дошла до базы
+        self.journal.close()
+        if self.workers is not None:
+            # Запись уходит в процесс сохранения и до подтверждения есть только в памяти
+            # этого процесса: профиль обновится и журнал удалится по подтверждению
+            self.workers.save_workout(*record)
+        else:
+            self.db.save_workout(*record)
+            self.on_workout_saved(record[0])
+
+    def on_workout_saved(self, user_id):
+        # Новый подход еще не начат и все записи в базе - журнал больше не нужен
+        if not self.journal.active and (self.workers is None or not self.workers.unconfirmed):
+            self.journal.finish()
+        # Профиль устарел - обновляем его в фоне
+        self.prefetcher.refresh(user_id)
+
+    def current_profile(self):
+        if not self.current_user:
+            return None
+        return self.prefetcher.profile(self.current_user[0])
+
+    def format_last_workout(self):
+        profile = self.current_profile()
+        if not profile or not profile['recent']:
+            return "Тренировок пока нет"
+        name, repetitions, intensity, duration, _ = profile['recent'][0]
+        return f"Последняя тренировка: {name}, {repetitions} повт., {duration} сек"
 
     def show_workout_screen(self):
-        self.stacked_widget.setCurrentWidget(self.workout_screen)
+        self.screens.show('workout')
+        self.workout_active = True
+        self.data_timer.start(SENSOR_INTERVAL_MS)
+        self.last_sensor_tick = time.perf_counter()
 
     def start_exercise(self, exercise):
         self.current_exercise = exercise
         self.start_workout(exercise)
 
-    def start_workout(self, exercise):
+    def start_workout(self, exercise, reps=0, elapsed=0.0):
+        """reps и elapsed передаются при продолжении прерванного подхода"""
+        self.screens.get('workout')
         self.exercise_title.setText(exercise["name"])
-        self.workout_reps = 0
-        self.workout_start_time = datetime.now()
-
-        script_dir = os.path.dirname(os.path.abspath(__file__))
-        images_dir = os.path.join(script_dir, "images")
-        image_path = os.path.join(images_dir, exercise["image"])
+        self.workout_reps = reps
+        self.workout_start_time = datetime.now() - timedelta(seconds=elapsed)
+        # До конца подхода сборщик не запускается сам (см. collect_between_sets),
+        # но не дольше MAX_GC_PAUSE_MS
+        gc.disable()
+        self.gc_pause_timer.start()
+        if self.current_user:
+            self.journal.begin(self.current_user, exercise, reps, elapsed)
+
+        pixmap = self.prefetcher.workout_pixmap(exercise["image"])
+        if pixmap is None:
+            self.exercise_image.setText(f"Изображение не найдено:\n{exercise['image']}")
+        elif pixmap.isNull():
+            self.exercise_image.setText("Ошибка загрузки изображения")
+        else:
+            self.exercise_image.setPixmap(pixmap)
 
-        if os.path.exists(image_path):
-            pixmap = QPixmap(image_path)
-            if not pixmap.isNull():
-                scaled_pixmap = pixmap.scaled(380, 260, Qt.AspectRatioMode.KeepAspectRatio,
-                                              Qt.TransformationMode.SmoothTransformation)
-                self.exercise_image.setPixmap(scaled_pixmap)
-            else:
-                self.exercise_image.setText("Ошибка загрузки изображения")
+        profile = self.current_profile()
+        last_load = profile['last_loads'].get(exercise["name"]) if profile else None
+        if last_load:
+            self.last_result_label.setText(
+                f"Прошлый раз: {last_load['repetitions']} повт., {last_load['duration']} сек")
         else:
-            self.exercise_image.setText(f"Изображение не найдено:\n{exercise['image']}")
+            self.last_result_label.setText("Первая тренировка в этом упражнении")
 
-        self.modbus.set_target_force(exercise["intensity"])
+        if self.workers is not None:
+            self.workers.set_target_force(exercise["intensity"])
+        else:
+            self.modbus.set_target_force(exercise["intensity"])
+        self.ui_binder.set('reps', self.workout_reps)
+        self.ui_binder.set('intensity', exercise["intensity"])
+        self.force_chart.reset()
         self.show_workout_screen()
 
     def update_sensor_data(self):
-        if self.stacked_widget.currentIndex() == 3:
-            force = self.modbus.read_force_sensor()
-            position = self.modbus.get_position()
+        # Горячий путь: без f-строк, кортежей и исключений на каждом тике (см. bench_alloc.py)
+        if self.workout_active:
+            now = time.perf_counter()
+            sensor_timer_lateness.observe(max(0.0, now - self.last_sensor_tick - SENSOR_INTERVAL_S))
+            self.last_sensor_tick = now
+
+            if self.workers is not None:
+                ring = self.workers.ring
+                offset = ring.latest_offset()
+                if offset < 0:
+                    return
+                force = ring.data[offset]
+                position = ring.data[offset + 1]
+                total = ring.total
+                sensor_samples.inc(total - self.sensor_read_pos)
+                self.sensor_read_pos = total
+            else:
+                sensor_samples.inc()
+                force = self.modbus.read_force_sensor()
+                position = self.modbus.get_position()
+                self.force_samples.append(force)
 
-            self.force_value.setText(f"{force:.1f} Н")
-            self.force_progress.setValue(int(force))
-            self.force_progress.setMaximum(100)
+            self.ui_binder.set('force', force)
+            self.ui_binder.set('force_bar', force)
 
-            if position < 5 and not hasattr(self, 'last_position'):
+            if position < 5:
                 self.workout_reps += 1
-                self.reps_value.setText(str(self.workout_reps))
-
-            self.intensity_value.setText(f"{self.current_exercise['intensity']}%")
+                self.ui_binder.set('reps', self.workout_reps)
+                self.journal.record_rep(self.workout_reps)
+            self.journal.maybe_flush(now)
+
+    def collect_between_sets(self):
+        """Сборка мусора после подхода, когда датчик уже не опрашивается"""
+        if not self.workout_active and not gc.isenabled():
+            self.gc_pause_timer.stop()
+            gc.collect()
+            gc.enable()
+
+    def end_gc_pause(self):
+        # Подход затянулся (например, экран бросили открытым) - сборщик снова работает сам
+        if not gc.isenabled():
+            gc.enable()
+            log.info("Сборка мусора включена: подход дольше лимита", limit_s=MAX_GC_PAUSE_MS // 1000)
 
     def stop_workout(self):
         if self.current_user and self.current_exercise:
             duration = (datetime.now() - self.workout_start_time).seconds
-            self.db.save_workout(
+            record = (
                 self.current_user[0],
                 self.current_exercise["name"],
                 self.workout_reps,
                 self.current_exercise["intensity"],
                 duration
             )
+            self.save_workout_record(record)
 
             QMessageBox.information(self, "Тренировка завершена",
                                     f"Упражнение: {self.current_exercise['name']}\n"
@@ -1169,8 +2289,9 @@ class SmartTrainerApp(QWidget):
         self.show_exercise_screen()
 
 
-def initialize_test_data():
-    db = UserDatabase()
+def initialize_test_data(db=None):
+    if db is None:
+        db = UserDatabase()
 
     test_users = [
         ("1234567890", "Иван", "Петров", 180, 3),
@@ -1184,21 +2305,71 @@ def initialize_test_data():
     script_dir = os.path.dirname(os.path.abspath(__file__))
     images_dir = os.path.join(script_dir, "images")
 
-    if not os.path.exists(images_dir):
+    # Содержимое папки не перечисляем: отсутствующие картинки
+    # обрабатываются при загрузке каждого упражнения
+    if not os.path.isdir(images_dir):
         os.makedirs(images_dir)
-        print("Создана папка images/ - добавьте туда изображения упражнений")
-    else:
-        available_images = os.listdir(images_dir)
-        print(f"Доступные изображения: {available_images}")
+        log.info("Создана папка images/ - добавьте туда изображения упражнений")
+
+
+def record_ui_stall(duration, stack):
+    # Вызывается из потока сторожа
+    ui_stalls.observe(duration)
+    log.warning("Интерфейс не отвечал, стек записан в stalls.log", stall_ms=round(duration * 1000.0))
+
+
+def start_stall_watchdog(app):
+    """Сторож зависаний: отметки ставит таймер в потоке интерфейса"""
+    watchdog = stall_watchdog.create_from_env(on_stall=record_ui_stall)
+    if watchdog is None:
+        return None
+    heartbeat = QTimer(app)
+    heartbeat.timeout.connect(watchdog.beat)
+    heartbeat.start(int(stall_watchdog.BEAT_INTERVAL * 1000))
+    watchdog.start()
+    app.aboutToQuit.connect(watchdog.stop)
+    return watchdog
+
+
+def create_window(app, db=None):
+    """Создает и показывает главное окно в уже запущенном QApplication.
+    Используется и самим app.py, и лаунчером при передаче управления в том же процессе"""
+    if db is None:
+        db = UserDatabase()
+        initialize_test_data(db)
+        startup_trace.mark("db_open")
+
+    # Картинки из кэша должны освободиться раньше QApplication
+    app.aboutToQuit.connect(_pixmap_cache.clear)
+    if track_gc_pause not in gc.callbacks:
+        gc.callbacks.append(track_gc_pause)
+    metrics.start_from_env()
+    start_stall_watchdog(app)
+
+    window = SmartTrainerApp(db)
+    window.show()
+    return window
 
 
-if __name__ == "__main__":
-    initialize_test_data()
+def main():
+    """Основная функция"""
+    log.install_crash_handlers()
+    db = UserDatabase()
+    initialize_test_data(db)
+    startup_trace.mark("db_open")
 
     app = QApplication(sys.argv)
     app.setStyle('Fusion')
+    startup_trace.mark("qapplication")
 
-    window = SmartTrainerApp()
-    window.show()
+    if STANDBY:
+        if not supervisor.wait_for_activation():
+            return 0
+        startup_trace.mark("standby_wait")
+
+    window = create_window(app, db)
+    return app.exec()
 
-    sys.exit(app.exec())
\ No newline at end of file
+
+if __name__ == "__main__":
+    sys.exit(main())
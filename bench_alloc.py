@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Smart Trainer Allocation Benchmark - выделения памяти на горячем пути тренировки
+На каждый отсчет: update_sensor_data, применение привязок (кадр) и дорисовка графика.
+Замеры на 1000 отсчетов, всего и по этапам:
+    время тика (медиана и максимум), срабатывания сборщика мусора;
+    переходные выделения - сумма пиков tracemalloc по этапам за вычетом
+    собственного расхода замера (пустой вызов);
+    чистый прирост блоков памяти и объектов под наблюдением GC.
+Превышение бюджета - код возврата 1, чтобы бенчмарк ловил регрессии.
+Код на Python в тике ничего не выделяет; остаток - обертки PySide (QPainter,
+событие перерисовки в FrameBinder.eventFilter, перезапуск таймера кадра).
+
+Запуск: python bench_alloc.py [--samples 1000] [--budget-kb 600] [--budget-gc-objects 10]
+"""
+import os
+import sys
+
+# Offscreen-платформу нужно выбрать до импорта app
+os.environ['SMART_TRAINER_HEADLESS'] = '1'
+
+import argparse
+import gc
+import shutil
+import statistics
+import tempfile
+import time
+import tracemalloc
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPT_DIR)
+
+import app as trainer
+from bench_ui import TEST_RFID, drain_events
+from PySide6.QtWidgets import QApplication
+
+
+def read_sensor(window):
+    window.update_sensor_data()
+
+
+def apply_bindings(window):
+    window.ui_binder.flush()
+
+
+def draw_chart(window):
+    window.force_chart.advance()
+
+
+def idle(window):
+    pass
+
+
+# Тик - отсчет датчика, кадр привязок и дорисовка графика. Кадр включает
+# синхронную перерисовку QProgressBar при смене процента - это выделения Qt
+STAGES = [('датчик', read_sensor), ('кадр', apply_bindings), ('график', draw_chart)]
+
+
+def tick(window):
+    for _, stage in STAGES:
+        stage(window)
+
+
+def measure_timing(window, samples):
+    """Время этапов тика и число сборок мусора при работе GC как в приложении"""
+    collections = [0, 0, 0]
+
+    def on_gc(phase, info):
+        if phase == 'start':
+            collections[info['generation']] += 1
+
+    gc.callbacks.append(on_gc)
+    durations = {name: [] for name, _ in STAGES}
+    totals = []
+    perf_counter = time.perf_counter
+    try:
+        for _ in range(samples):
+            tick_start = perf_counter()
+            for name, stage in STAGES:
+                start = perf_counter()
+                stage(window)
+                durations[name].append(perf_counter() - start)
+            totals.append(perf_counter() - tick_start)
+    finally:
+        gc.callbacks.remove(on_gc)
+    return {
+        'tick_us': statistics.median(totals) * 1e6,
+        'tick_max_us': max(totals) * 1e6,
+        'stages_us': {name: statistics.median(values) * 1e6 for name, values in durations.items()},
+        'gc_collections': collections,
+    }
+
+
+def transient_bytes(func, window):
+    tracemalloc.reset_peak()
+    before = tracemalloc.get_traced_memory()[0]
+    func(window)
+    return tracemalloc.get_traced_memory()[1] - before
+
+
+def measure_allocations(window, samples):
+    """Выделения при выключенном GC, чтобы сборка не прятала прирост"""
+    gc.disable()
+    tracemalloc.start()
+    try:
+        # Вызов и кортеж get_traced_memory тоже попадают в пик - это уровень нуля
+        floor = sum(transient_bytes(idle, window) for _ in range(samples)) / samples
+        stages = {name: 0.0 for name, _ in STAGES}
+        start_traced = tracemalloc.get_traced_memory()[0]
+        start_blocks = sys.getallocatedblocks()
+        start_tracked = gc.get_count()[0]
+        for _ in range(samples):
+            for name, stage in STAGES:
+                stages[name] += max(0.0, transient_bytes(stage, window) - floor)
+        return {
+            'transient_kb': sum(stages.values()) / 1024.0,
+            'stages_kb': {name: value / 1024.0 for name, value in stages.items()},
+            'net_kb': (tracemalloc.get_traced_memory()[0] - start_traced) / 1024.0,
+            'net_blocks': sys.getallocatedblocks() - start_blocks,
+            'gc_objects': gc.get_count()[0] - start_tracked,
+        }
+    finally:
+        tracemalloc.stop()
+        gc.enable()
+
+
+def main():
+    """Основная функция"""
+    parser = argparse.ArgumentParser(description="Выделения памяти на горячем пути Smart Trainer")
+    parser.add_argument('--samples', type=int, default=1000)
+    parser.add_argument('--budget-kb', type=float, default=600.0,
+                        help="допустимые переходные выделения на 1000 отсчетов")
+    parser.add_argument('--budget-gc-objects', type=int, default=10,
+                        help="допустимый прирост объектов под наблюдением GC на 1000 отсчетов")
+    args = parser.parse_args()
+
+    # Работаем на копии базы, чтобы не трогать users.db
+    work_dir = tempfile.mkdtemp(prefix='smart_trainer_alloc_')
+    db_path = os.path.join(SCRIPT_DIR, 'users.db')
+    if os.path.exists(db_path):
+        shutil.copy(db_path, work_dir)
+    os.chdir(work_dir)
+
+    qt_app = QApplication(sys.argv[:1])
+    qt_app.setStyle('Fusion')
+    db = trainer.UserDatabase()
+    trainer.initialize_test_data(db)
+    window = trainer.SmartTrainerApp(db)
+    window.show()
+    drain_events(qt_app)
+    window.process_rfid(TEST_RFID)
+    window.show_welcome_screen()
+    window.show_exercise_screen()
+    window.start_exercise(window.exercises[0])
+    drain_events(qt_app)
+
+    # Прогрев: кэши строк, буферы графика, первые сборки
+    for _ in range(args.samples):
+        tick(window)
+
+    timing = measure_timing(window, args.samples)
+    allocations = measure_allocations(window, args.samples)
+    scale = 1000.0 / args.samples
+
+    print(f"Отсчетов: {args.samples}")
+    print(f"Тик: медиана {timing['tick_us']:.1f} мкс, максимум {timing['tick_max_us']:.1f} мкс")
+    print(f"Сборки мусора по поколениям: {timing['gc_collections']}")
+    print(f"На 1000 отсчетов: переходные выделения {allocations['transient_kb'] * scale:.1f} КБ, "
+          f"чистый прирост {allocations['net_kb'] * scale:.1f} КБ, "
+          f"блоков {allocations['net_blocks'] * scale:+.0f}, "
+          f"объектов GC {allocations['gc_objects'] * scale:+.0f}")
+    for name, _ in STAGES:
+        print(f"  {name:<8} {timing['stages_us'][name]:8.1f} мкс  {allocations['stages_kb'][name] * scale:8.1f} КБ")
+
+    window.close()
+    trainer._pixmap_cache.clear()
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+    if allocations['transient_kb'] * scale > args.budget_kb or allocations['gc_objects'] * scale > args.budget_gc_objects:
+        print("❌ Выделения сверх бюджета")
+        return 1
+    print("✓ Выделения в пределах бюджета")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
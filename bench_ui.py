@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+Smart Trainer UI Benchmark - прогон интерфейса без дисплея
+Вход по карте -> каталог -> тренировка -> стоп, замер каждого перехода:
+время, время отрисовки, выделения памяти. История хранится по коммитам.
+
+Запуск: python bench_ui.py [--rounds 20] [--history bench_history.jsonl]
+"""
+import os
+import sys
+
+# Offscreen-платформу нужно выбрать до импорта app
+os.environ['SMART_TRAINER_HEADLESS'] = '1'
+
+import argparse
+import json
+import shutil
+import statistics
+import subprocess
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPT_DIR)
+
+import app as trainer
+from PySide6.QtWidgets import QApplication
+from PySide6.QtCore import QEvent, QTimer
+
+TEST_RFID = "1234567890"
+WORKOUT_TICKS = 50
+TRANSITIONS = ['startup', 'login', 'catalog', 'workout', 'stop']
+
+
+class BenchApplication(QApplication):
+    """QApplication, суммирующий время обработки событий отрисовки"""
+
+    def __init__(self, argv):
+        super().__init__(argv)
+        self.paint_time = 0.0
+        self.paint_count = 0
+
+    def notify(self, receiver, event):
+        if event.type() == QEvent.Type.Paint:
+            start = time.perf_counter()
+            result = super().notify(receiver, event)
+            self.paint_time += time.perf_counter() - start
+            self.paint_count += 1
+            return result
+        return super().notify(receiver, event)
+
+
+def drain_events(qt_app):
+    """Обрабатывает все отложенные события, включая перерисовку"""
+    for _ in range(5):
+        qt_app.sendPostedEvents()
+        qt_app.processEvents()
+
+
+def close_modal_dialogs():
+    """Закрывает модальное окно итогов тренировки"""
+    modal = QApplication.activeModalWidget()
+    if modal is not None:
+        modal.accept()
+    else:
+        QTimer.singleShot(0, close_modal_dialogs)
+
+
+class UiBenchmark:
+    """Прогоняет сценарий и собирает замеры по переходам"""
+
+    def __init__(self, qt_app):
+        self.qt_app = qt_app
+        self.window = None
+        self.db = trainer.UserDatabase()
+        trainer.initialize_test_data(self.db)
+
+    def step_startup(self):
+        if self.window is not None:
+            self.window.close()
+            self.window.deleteLater()
+        self.window = trainer.SmartTrainerApp(self.db)
+        self.window.show()
+
+    def step_login(self):
+        self.window.process_rfid(TEST_RFID)
+        self.window.show_welcome_screen()
+
+    def step_catalog(self):
+        self.window.show_exercise_screen()
+
+    def step_workout(self):
+        self.window.start_exercise(self.window.exercises[0])
+        for _ in range(WORKOUT_TICKS):
+            self.window.update_sensor_data()
+        self.window.ui_binder.flush()
+        self.window.force_chart.advance()
+
+    def step_stop(self):
+        QTimer.singleShot(0, close_modal_dialogs)
+        self.window.stop_workout()
+
+    def measure(self, name, with_alloc=False):
+        """Выполняет один переход и возвращает замеры"""
+        step = getattr(self, f"step_{name}")
+        drain_events(self.qt_app)
+        self.qt_app.paint_time = 0.0
+        self.qt_app.paint_count = 0
+
+        if with_alloc:
+            tracemalloc.reset_peak()
+            before, _ = tracemalloc.get_traced_memory()
+            blocks_before = sys.getallocatedblocks()
+
+        start = time.perf_counter()
+        step()
+        drain_events(self.qt_app)
+        wall = time.perf_counter() - start
+
+        result = {
+            'wall_ms': wall * 1000.0,
+            'paint_ms': self.qt_app.paint_time * 1000.0,
+            'paints': self.qt_app.paint_count,
+        }
+        if with_alloc:
+            after, peak = tracemalloc.get_traced_memory()
+            result['alloc_net_kb'] = (after - before) / 1024.0
+            result['alloc_peak_kb'] = (peak - before) / 1024.0
+            result['blocks_delta'] = sys.getallocatedblocks() - blocks_before
+        return result
+
+    def run(self, rounds):
+        """Прогон: rounds кругов на время, затем один круг с трассировкой памяти"""
+        timings = {name: [] for name in TRANSITIONS}
+        for _ in range(rounds):
+            for name in TRANSITIONS:
+                timings[name].append(self.measure(name))
+
+        tracemalloc.start()
+        allocations = {name: self.measure(name, with_alloc=True) for name in TRANSITIONS}
+        tracemalloc.stop()
+
+        report = {}
+        for name in TRANSITIONS:
+            samples = timings[name]
+            report[name] = {
+                'wall_ms': statistics.median(s['wall_ms'] for s in samples),
+                'wall_max_ms': max(s['wall_ms'] for s in samples),
+                'paint_ms': statistics.median(s['paint_ms'] for s in samples),
+                'paints': statistics.median(s['paints'] for s in samples),
+                'alloc_net_kb': allocations[name]['alloc_net_kb'],
+                'alloc_peak_kb': allocations[name]['alloc_peak_kb'],
+                'blocks_delta': allocations[name]['blocks_delta'],
+            }
+        return report
+
+
+def current_commit():
+    """Возвращает хэш текущего коммита или None"""
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'],
+                                       cwd=SCRIPT_DIR, stderr=subprocess.DEVNULL,
+                                       text=True).strip()
+    except Exception:
+        return None
+
+
+def load_previous(history_path, commit):
+    """Последняя запись истории от другого коммита"""
+    if not os.path.exists(history_path):
+        return None
+    previous = None
+    with open(history_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            if entry.get('commit') != commit:
+                previous = entry
+    return previous
+
+
+def find_regressions(report, previous, threshold, min_delta_ms):
+    """Сравнивает медианы переходов с предыдущим коммитом"""
+    regressions = []
+    for name, values in report.items():
+        old = previous['results'].get(name)
+        if not old:
+            continue
+        for key in ('wall_ms', 'paint_ms'):
+            delta = values[key] - old[key]
+            if delta > min_delta_ms and values[key] > old[key] * (1.0 + threshold):
+                regressions.append(f"{name}.{key}: {old[key]:.2f} → {values[key]:.2f} мс")
+    return regressions
+
+
+def print_report(report):
+    """Печатает таблицу замеров"""
+    print(f"{'Переход':<10} {'время, мс':>10} {'макс, мс':>10} {'отрисовка':>10} "
+          f"{'кадров':>7} {'память, КБ':>11} {'пик, КБ':>9}")
+    for name, v in report.items():
+        print(f"{name:<10} {v['wall_ms']:10.2f} {v['wall_max_ms']:10.2f} {v['paint_ms']:10.2f} "
+              f"{v['paints']:7.0f} {v['alloc_net_kb']:11.1f} {v['alloc_peak_kb']:9.1f}")
+
+
+def main():
+    """Основная функция"""
+    parser = argparse.ArgumentParser(description="Бенчмарк интерфейса Smart Trainer")
+    parser.add_argument('--rounds', type=int, default=20)
+    parser.add_argument('--history', default=os.path.join(SCRIPT_DIR, 'bench_history.jsonl'))
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help="допустимый относительный рост медианы")
+    parser.add_argument('--min-delta-ms', type=float, default=1.0,
+                        help="абсолютный рост, ниже которого регрессия не считается")
+    parser.add_argument('--no-record', action='store_true', help="не дописывать историю")
+    args = parser.parse_args()
+
+    # Работаем на копии базы, чтобы не трогать users.db
+    work_dir = tempfile.mkdtemp(prefix='smart_trainer_bench_')
+    db_path = os.path.join(SCRIPT_DIR, 'users.db')
+    if os.path.exists(db_path):
+        shutil.copy(db_path, work_dir)
+    os.chdir(work_dir)
+
+    qt_app = BenchApplication(sys.argv[:1])
+    qt_app.setStyle('Fusion')
+
+    bench = UiBenchmark(qt_app)
+    report = bench.run(args.rounds)
+    print_report(report)
+
+    commit = current_commit()
+    previous = load_previous(args.history, commit)
+    regressions = []
+    if previous:
+        regressions = find_regressions(report, previous, args.threshold, args.min_delta_ms)
+        print(f"\nСравнение с {previous.get('commit')}:")
+        for line in regressions:
+            print(f"  ✗ {line}")
+        if not regressions:
+            print("  ✓ Регрессий нет")
+
+    if not args.no_record:
+        entry = {
+            'commit': commit,
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'rounds': args.rounds,
+            'results': report,
+        }
+        with open(args.history, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    bench.window.close()
+    trainer._pixmap_cache.clear()
+    shutil.rmtree(work_dir, ignore_errors=True)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+"""
+Smart Trainer Event Log - асинхронный структурированный журнал
+Вызов log.info() только кладет кортеж в две кольцевые очереди (deque.append
+атомарен и не блокирует). Фоновый поток раз в FLUSH_INTERVAL форматирует
+накопленное пачкой в JSON-строки, пишет в ротируемый файл и дублирует в консоль.
+У каждого процесса (лаунчер, приложение, резерв, супервизор, процессы сбора и записи)
+свой файл smart_trainer-<процесс>-<pid>.jsonl: ротирует его только владелец.
+Файлы, которые не менялись LOG_MAX_AGE_DAYS дней, удаляются при открытии нового.
+При необработанном исключении последние события сбрасываются в crash-*.jsonl,
+при падении интерпретатора faulthandler пишет стеки в fault.log.
+
+Настройки:
+    SMART_TRAINER_LOG_DIR=logs       - папка журналов
+    SMART_TRAINER_LOG_CONSOLE=0      - не дублировать в консоль
+    SMART_TRAINER_LOG_LEVEL=debug    - писать и отладочные события
+"""
+import atexit
+import faulthandler
+import glob
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from threading import get_ident
+
+LEVELS = {'debug': 10, 'info': 20, 'warning': 30, 'error': 40}
+PENDING_SIZE = 10000
+RECENT_SIZE = 5000
+FLUSH_INTERVAL = 0.2
+LOG_PREFIX = 'smart_trainer'
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUPS = 5
+LOG_MAX_AGE_DAYS = 7
+
+
+def process_label():
+    """Имя процесса для файла журнала: имя процесса multiprocessing или скрипта"""
+    mp = sys.modules.get('multiprocessing')
+    if mp is not None and mp.parent_process() is not None:
+        # Процессы workers.py называются smart-trainer-<роль>
+        name = mp.current_process().name
+        return name[len('smart-trainer-'):] if name.startswith('smart-trainer-') else name
+    script = sys.argv[0] if sys.argv else ''
+    label = os.path.splitext(os.path.basename(script))[0]
+    if label == '__main__':
+        # python -m pytest: берем имя пакета
+        label = os.path.basename(os.path.dirname(script))
+    # python -c и python - : имени скрипта нет
+    return label if label and not label.startswith('-') else 'python'
+
+
+class EventLog:
+    """Журнал событий: производители не ждут диск, пишет фоновый поток"""
+
+    def __init__(self, log_dir=None, console=None, level=None):
+        self.log_dir = log_dir or os.environ.get('SMART_TRAINER_LOG_DIR', 'logs')
+        self.console = console if console is not None else os.environ.get('SMART_TRAINER_LOG_CONSOLE') != '0'
+        self.level = LEVELS.get(level or os.environ.get('SMART_TRAINER_LOG_LEVEL', 'info'), 20)
+        # pending - очередь на запись, recent - последние события для аварийного дампа
+        self.pending = deque(maxlen=PENDING_SIZE)
+        self.recent = deque(maxlen=RECENT_SIZE)
+        self.dropped = 0
+        self.file = None
+        self.file_size = 0
+        self.writer = None
+        self.writer_lock = threading.Lock()
+        self.fault_file = None
+        self.path = None
+        self.dumps = 0
+
+    def emit(self, level, message, fields):
+        event = (time.time(), level, message, fields, get_ident())
+        pending = self.pending
+        if len(pending) == PENDING_SIZE:
+            # Писатель не успевает - старейшее событие вытесняется, считаем потери
+            self.dropped += 1
+        pending.append(event)
+        self.recent.append(event)
+        if self.writer is None:
+            self.start()
+
+    # Уровень проверяется до сборки события - отключенный debug почти бесплатен
+    def debug(self, message, **fields):
+        if self.level <= 10:
+            self.emit('debug', message, fields)
+
+    def info(self, message, **fields):
+        if self.level <= 20:
+            self.emit('info', message, fields)
+
+    def warning(self, message, **fields):
+        if self.level <= 30:
+            self.emit('warning', message, fields)
+
+    def error(self, message, **fields):
+        self.emit('error', message, fields)
+
+    def start(self):
+        """Фоновый писатель стартует при первом событии - процессы без журнала его не держат"""
+        with self.writer_lock:
+            if self.writer is not None:
+                return
+            self.writer = threading.Thread(target=self.run, name="event-log", daemon=True)
+            self.writer.start()
+        atexit.register(self.flush)
+
+    def run(self):
+        while True:
+            time.sleep(FLUSH_INTERVAL)
+            try:
+                self.flush()
+            except Exception as e:
+                # Журнал не должен ронять приложение: например, кончилось место на SD-карте
+                sys.__stderr__.write(f"event_log: {e}\n")
+
+    def flush(self):
+        batch = []
+        while True:
+            try:
+                batch.append(self.pending.popleft())
+            except IndexError:
+                break
+        if self.dropped:
+            batch.append((time.time(), 'warning', "Журнал не успевал, события потеряны",
+                          {'dropped': self.dropped}, threading.get_ident()))
+            self.dropped = 0
+        if not batch:
+            return
+
+        with self.writer_lock:
+            if self.console:
+                sys.stdout.write(''.join(format_console(event) for event in batch))
+                sys.stdout.flush()
+            self.write_file(''.join(format_json(event) for event in batch))
+
+    def write_file(self, text):
+        if self.file is None:
+            if self.path is None:
+                os.makedirs(self.log_dir, exist_ok=True)
+                self.path = os.path.join(self.log_dir, f"{LOG_PREFIX}-{process_label()}-{os.getpid()}.jsonl")
+                self.remove_stale()
+            self.file = open(self.path, 'a', encoding='utf-8')
+            self.file_size = self.file.tell()
+        self.file.write(text)
+        self.file.flush()
+        self.file_size += len(text)
+        if self.file_size > LOG_MAX_BYTES:
+            self.rotate()
+
+    def remove_stale(self):
+        """Файлы завершившихся процессов: pid в имени не повторяется, без чистки их число растет"""
+        deadline = time.time() - LOG_MAX_AGE_DAYS * 86400
+        for path in glob.glob(os.path.join(self.log_dir, f"{LOG_PREFIX}-*.jsonl*")):
+            try:
+                if os.path.getmtime(path) < deadline:
+                    os.remove(path)
+            except OSError:
+                pass
+
+    def rotate(self):
+        # Файл принадлежит только этому процессу - переименования не пересекаются с чужими
+        self.file.close()
+        self.file = None
+        path = self.path
+        for index in range(LOG_BACKUPS - 1, 0, -1):
+            if os.path.exists(f"{path}.{index}"):
+                os.replace(f"{path}.{index}", f"{path}.{index + 1}")
+        os.replace(path, f"{path}.1")
+
+    def dump_recent(self, reason):
+        """Сбрасывает последние события в отдельный файл. Возвращает его путь"""
+        os.makedirs(self.log_dir, exist_ok=True)
+        # Исключения в слотах PySide не завершают процесс, дампов за секунду может быть несколько
+        with self.writer_lock:
+            self.dumps += 1
+            number = self.dumps
+        stamp = datetime.now().strftime('%Y%m%d-%H%M%S-%f')[:-3]
+        path = os.path.join(self.log_dir, f"crash-{stamp}-{os.getpid()}-{number}.jsonl")
+        events = list(self.recent)
+        events.append((time.time(), 'error', reason, {}, threading.get_ident()))
+        with open(path, 'w', encoding='utf-8') as f:
+            f.write(''.join(format_json(event) for event in events))
+        return path
+
+    def install_crash_handlers(self):
+        """Дамп журнала при необработанном исключении и стеки при падении интерпретатора"""
+        previous_hook = sys.excepthook
+        previous_thread_hook = threading.excepthook
+
+        def excepthook(exc_type, exc, tb):
+            self.error("Необработанное исключение", error=repr(exc))
+            self.flush()
+            path = self.dump_recent(f"{exc_type.__name__}: {exc}")
+            sys.__stderr__.write(f"Последние события сохранены в {path}\n")
+            previous_hook(exc_type, exc, tb)
+
+        def thread_excepthook(args):
+            self.error("Необработанное исключение в потоке",
+                       thread=getattr(args.thread, 'name', None), error=repr(args.exc_value))
+            self.flush()
+            self.dump_recent(f"{args.exc_type.__name__}: {args.exc_value}")
+            previous_thread_hook(args)
+
+        sys.excepthook = excepthook
+        threading.excepthook = thread_excepthook
+        try:
+            os.makedirs(self.log_dir, exist_ok=True)
+            self.fault_file = open(os.path.join(self.log_dir, 'fault.log'), 'a')
+            faulthandler.enable(file=self.fault_file, all_threads=True)
+        except OSError:
+            pass
+
+
+def format_console(event):
+    timestamp, level, message, fields, _ = event
+    line = f"[{datetime.fromtimestamp(timestamp).strftime('%H:%M:%S')}] {message}"
+    if fields:
+        line += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+    return line + "\n"
+
+
+def format_json(event):
+    timestamp, level, message, fields, thread_id = event
+    record = {'ts': round(timestamp, 6), 'level': level, 'thread': thread_id, 'msg': message}
+    if fields:
+        record.update(fields)
+    return json.dumps(record, ensure_ascii=False, default=str) + "\n"
+
+
+log = EventLog()
+
+
+def measure_overhead(events=200000):
+    """Стоимость вызова log.info на горячем пути, нс (без консоли и диска)"""
+    test_log = EventLog(log_dir=os.devnull, console=False)
+    test_log.writer = False  # писатель не запускаем: меряем только постановку в очередь
+    perf_counter = time.perf_counter
+    start = perf_counter()
+    for i in range(events):
+        test_log.info("sample", value=i)
+    return (perf_counter() - start) / events * 1e9
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ['overhead']:
+        print(f"log.info: {measure_overhead():.0f} нс на событие")
+    else:
+        print(__doc__)
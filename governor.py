@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Smart Trainer Governor - подстройка фоновой работы под нагрев и загрузку
+Раз в несколько секунд читает температуру (/sys/class/thermal), частоту ядер
+(/sys/devices/system/cpu/cpu*/cpufreq) и загрузку (/proc/loadavg) и выбирает
+уровень normal, warm или hot. От уровня зависит несрочная работа: частота
+кадров графика, предзагрузка профиля и картинок, обслуживание базы и прогрев
+кэша картинок. Опрос датчика не ограничивается - ради него все и делается.
+
+Корень файловой системы задается SMART_TRAINER_SYSFS_ROOT - так реакцию
+можно проверить на поддельных файлах. SMART_TRAINER_GOVERNOR=0 - выключено.
+Текущее состояние: python governor.py
+Прогон по сценарию на поддельном sysfs: python governor.py simulate
+"""
+import glob
+import os
+
+from event_log import log
+
+SAMPLE_INTERVAL_MS = 5000
+WARM_CELSIUS = 65.0
+HOT_CELSIUS = 75.0
+# Уровень снижается, только когда температура ушла ниже порога на столько градусов
+HYSTERESIS_CELSIUS = 5.0
+# Загрузка - среднее за минуту на одно ядро
+WARM_LOAD = 0.8
+HOT_LOAD = 1.5
+# Так же и с загрузкой: уровень снижается, когда она ушла ниже порога на эту величину
+HYSTERESIS_LOAD = 0.2
+# Частота ниже этой доли от максимума при высокой загрузке - ядра троттлятся
+THROTTLED_FREQ_RATIO = 0.7
+
+PROFILES = {
+    'normal': {'chart_fps': 30, 'prefetch': True, 'prefetch_images': True,
+               'maintenance': True, 'warm_images': True},
+    'warm': {'chart_fps': 20, 'prefetch': True, 'prefetch_images': False,
+             'maintenance': False, 'warm_images': False},
+    'hot': {'chart_fps': 10, 'prefetch': False, 'prefetch_images': False,
+            'maintenance': False, 'warm_images': False},
+}
+
+
+def read_number(path):
+    try:
+        with open(path, 'r') as f:
+            return float(f.read().split()[0])
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class WorkloadGovernor:
+    """Выбирает уровень нагрузки по датчикам платы и сообщает о его смене"""
+
+    def __init__(self, sysfs_root=None, on_change=None):
+        self.root = sysfs_root or os.environ.get('SMART_TRAINER_SYSFS_ROOT', '/')
+        self.on_change = on_change
+        self.level = 'normal'
+        self.reading = {}
+        # Набор зон и ядер не меняется, пути ищем один раз
+        self.thermal_paths = sorted(glob.glob(os.path.join(self.root, 'sys/class/thermal/thermal_zone*/temp')))
+        self.cpufreq_dirs = sorted(glob.glob(os.path.join(self.root, 'sys/devices/system/cpu/cpu[0-9]*/cpufreq')))
+        self.max_freqs = [read_number(os.path.join(path, 'cpuinfo_max_freq')) for path in self.cpufreq_dirs]
+        self.cpu_count = len(self.cpufreq_dirs) or os.cpu_count() or 1
+
+    @property
+    def profile(self):
+        return PROFILES[self.level]
+
+    def read_temperature(self):
+        """Самая горячая зона, °C. Драйверы отдают миллиградусы, некоторые - градусы"""
+        values = [read_number(path) for path in self.thermal_paths]
+        values = [value / 1000.0 if value > 1000 else value for value in values if value is not None]
+        return max(values) if values else None
+
+    def read_frequency_ratio(self):
+        """Самое медленное ядро относительно своего максимума"""
+        ratios = []
+        for path, max_freq in zip(self.cpufreq_dirs, self.max_freqs):
+            current = read_number(os.path.join(path, 'scaling_cur_freq'))
+            if current is not None and max_freq:
+                ratios.append(current / max_freq)
+        return min(ratios) if ratios else None
+
+    def read_load(self):
+        load = read_number(os.path.join(self.root, 'proc/loadavg'))
+        return None if load is None else load / self.cpu_count
+
+    def read(self):
+        return {
+            'temperature': self.read_temperature(),
+            'freq_ratio': self.read_frequency_ratio(),
+            'load': self.read_load(),
+        }
+
+    def classify(self, reading):
+        temperature = reading['temperature']
+        freq_ratio = reading['freq_ratio']
+        load = reading['load'] or 0.0
+        hot_margin = HYSTERESIS_CELSIUS if self.level == 'hot' else 0.0
+        warm_margin = HYSTERESIS_CELSIUS if self.level != 'normal' else 0.0
+        hot_load_margin = HYSTERESIS_LOAD if self.level == 'hot' else 0.0
+        warm_load_margin = HYSTERESIS_LOAD if self.level != 'normal' else 0.0
+
+        # Низкая частота без нагрузки - обычное энергосбережение, а не троттлинг
+        throttled = (freq_ratio is not None and freq_ratio < THROTTLED_FREQ_RATIO
+                     and load >= WARM_LOAD - hot_load_margin)
+        if temperature is not None and temperature >= HOT_CELSIUS - hot_margin:
+            return 'hot'
+        if throttled or load >= HOT_LOAD - hot_load_margin:
+            return 'hot'
+        if temperature is not None and temperature >= WARM_CELSIUS - warm_margin:
+            return 'warm'
+        if load >= WARM_LOAD - warm_load_margin:
+            return 'warm'
+        return 'normal'
+
+    def update(self):
+        """Снимает показания и при смене уровня вызывает on_change(уровень, профиль)"""
+        self.reading = self.read()
+        level = self.classify(self.reading)
+        if level != self.level:
+            log.info("Уровень нагрузки изменен", workload=level, previous=self.level, **self.reading)
+            self.level = level
+            if self.on_change is not None:
+                self.on_change(level, self.profile)
+        return level
+
+
+def write_fake_sysfs(root, temperature, freq_ratio, load, cpus=4, max_freq=1800000):
+    """Поддельные файлы датчиков в root для проверки реакции"""
+    zone = os.path.join(root, 'sys/class/thermal/thermal_zone0')
+    os.makedirs(zone, exist_ok=True)
+    with open(os.path.join(zone, 'temp'), 'w') as f:
+        f.write(f"{int(temperature * 1000)}\n")
+    for cpu in range(cpus):
+        cpufreq = os.path.join(root, f'sys/devices/system/cpu/cpu{cpu}/cpufreq')
+        os.makedirs(cpufreq, exist_ok=True)
+        with open(os.path.join(cpufreq, 'cpuinfo_max_freq'), 'w') as f:
+            f.write(f"{max_freq}\n")
+        with open(os.path.join(cpufreq, 'scaling_cur_freq'), 'w') as f:
+            f.write(f"{int(max_freq * freq_ratio)}\n")
+    os.makedirs(os.path.join(root, 'proc'), exist_ok=True)
+    with open(os.path.join(root, 'proc/loadavg'), 'w') as f:
+        f.write(f"{load * cpus:.2f} 0.00 0.00 1/100 1\n")
+
+
+# Температура, доля частоты, загрузка на ядро и ожидаемый уровень
+SIMULATION = [
+    (50.0, 0.5, 0.1, 'normal'),   # простой: частота снижена энергосбережением
+    (66.0, 1.0, 0.3, 'warm'),
+    (62.0, 1.0, 0.3, 'warm'),     # гистерезис: еще не остыли на 5 °C
+    (59.0, 1.0, 0.3, 'normal'),
+    (60.0, 0.6, 0.9, 'hot'),      # троттлинг под нагрузкой
+    (60.0, 0.6, 0.7, 'hot'),      # загрузка чуть просела - троттлинг еще держится
+    (76.0, 1.0, 0.3, 'hot'),
+    (72.0, 1.0, 0.3, 'hot'),
+    (69.0, 1.0, 0.3, 'warm'),
+    (55.0, 1.0, 1.0, 'warm'),     # холодно, но ядра заняты
+    (55.0, 1.0, 0.7, 'warm'),     # гистерезис: загрузка еще не ушла ниже 0.6
+    (55.0, 1.0, 0.2, 'normal'),
+    (55.0, 1.0, 1.6, 'hot'),
+    (55.0, 1.0, 1.4, 'hot'),      # гистерезис: еще не ниже 1.3
+    (55.0, 1.0, 1.2, 'warm'),
+    (55.0, 1.0, 0.5, 'normal'),
+]
+
+
+def simulate():
+    """Проходит сценарий на поддельном sysfs. Возвращает True, если все уровни совпали"""
+    import shutil
+    import tempfile
+
+    root = tempfile.mkdtemp(prefix='smart_trainer_sysfs_')
+    try:
+        write_fake_sysfs(root, *SIMULATION[0][:3])
+        governor = WorkloadGovernor(sysfs_root=root)
+        ok = True
+        print(f"{'°C':>6} {'частота':>8} {'загрузка':>9}  {'уровень':<8} {'кадров':>6}  ожидалось")
+        for temperature, freq_ratio, load, expected in SIMULATION:
+            write_fake_sysfs(root, temperature, freq_ratio, load)
+            level = governor.update()
+            mark = "" if level == expected else "  ❌"
+            ok = ok and level == expected
+            print(f"{temperature:6.1f} {freq_ratio:8.2f} {load:9.2f}  {level:<8} "
+                  f"{governor.profile['chart_fps']:6d}  {expected}{mark}")
+        return ok
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:] == ['simulate']:
+        sys.exit(0 if simulate() else 1)
+    governor = WorkloadGovernor()
+    level = governor.update()
+    print(f"Показания: {governor.read()}")
+    print(f"Уровень: {level}, профиль: {governor.profile}")
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Smart Trainer LAN Cache - кэширующее зеркало обновлений для парка киосков
+Один киоск (или отдельная машина в клубе) качает релиз с GitHub, остальные
+берут файлы у него. Файлы адресуются по SHA-256 из manifest.json:
+    GET /objects/<sha256>?path=<файл>  - файл из кэша, при промахе один раз с origin
+Зеркало не аутентифицировано, поэтому версию и манифест киоск всегда берет с
+origin, а у зеркала - только файлы, хэш которых задан манифестом и проверяется.
+
+Запуск зеркала:  python lan_cache.py serve [--dir lan_cache] [--port 8787] [--origin URL]
+Киоски:          SMART_TRAINER_LAN_CACHE=http://host:8787 - явный адрес,
+                 SMART_TRAINER_LAN_CACHE=auto - искать зеркало широковещательным
+                 UDP-запросом; без настройки зеркало не используется
+"""
+import hashlib
+import json
+import os
+import re
+import socket
+import threading
+from urllib.parse import quote, urlparse, parse_qs
+
+import requests
+
+DISCOVERY_PORT = 47800
+DISCOVERY_REQUEST = b"SMART_TRAINER_CACHE?"
+DISCOVERY_TIMEOUT = 0.5
+DEFAULT_PORT = 8787
+CHUNK_SIZE = 64 * 1024
+ORIGIN_URL = os.environ.get('SMART_TRAINER_UPDATE_URL',
+                            "https://raw.githubusercontent.com/DenisASUTP/OP_4/main")
+
+SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+
+
+def range_start(header):
+    """Начало диапазона из 'bytes=N-' или 'bytes=N-M'. Суффикс (bytes=-N), несколько
+    диапазонов и мусор - None: на них отвечаем 416"""
+    unit, _, spec = header.partition('=')
+    if unit.strip() != 'bytes' or ',' in spec:
+        return None
+    start = spec.partition('-')[0].strip()
+    return int(start) if start.isdecimal() else None
+
+
+def discover(timeout=DISCOVERY_TIMEOUT):
+    """Ищет зеркало широковещательным запросом. Возвращает его адрес или None"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        sock.settimeout(timeout)
+        sock.sendto(DISCOVERY_REQUEST, ('<broadcast>', DISCOVERY_PORT))
+        data, address = sock.recvfrom(1024)
+        reply = json.loads(data.decode('utf-8'))
+        # Зеркало знает свой порт, а адрес надежнее взять у отправителя
+        return f"http://{address[0]}:{reply['port']}"
+    except (OSError, ValueError, KeyError):
+        return None
+    finally:
+        sock.close()
+
+
+def find_mirror():
+    """Адрес зеркала из SMART_TRAINER_LAN_CACHE. Обнаружение в сети - только при auto"""
+    setting = os.environ.get('SMART_TRAINER_LAN_CACHE', '')
+    if setting in ('', 'off'):
+        return None
+    if setting == 'auto':
+        return discover()
+    return setting.rstrip('/')
+
+
+class ObjectStore:
+    """Файлы в папке objects/ под именем своего SHA-256"""
+
+    def __init__(self, cache_dir, origin_url, session=None):
+        self.objects_dir = os.path.join(cache_dir, 'objects')
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self.origin_url = origin_url.rstrip('/')
+        self.session = session or requests.Session()
+        # Блокировки только для объектов, которые качаются сейчас
+        self.locks = {}
+        self.locks_guard = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def object_path(self, digest):
+        return os.path.join(self.objects_dir, digest)
+
+    def count(self, hit):
+        with self.locks_guard:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get_object(self, digest, filename):
+        """Путь к объекту в кэше. При промахе объект качается с origin ровно один раз"""
+        path = self.object_path(digest)
+        if os.path.exists(path):
+            self.count(hit=True)
+            return path
+        with self.locks_guard:
+            lock = self.locks.setdefault(digest, threading.Lock())
+        # Параллельные запросы того же объекта ждут первую загрузку
+        try:
+            with lock:
+                if os.path.exists(path):
+                    self.count(hit=True)
+                    return path
+                self.count(hit=False)
+                self.fetch_object(digest, filename, path)
+                return path
+        finally:
+            with self.locks_guard:
+                if self.locks.get(digest) is lock:
+                    del self.locks[digest]
+
+    def fetch_object(self, digest, filename, path):
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        sha = hashlib.sha256()
+        url = f"{self.origin_url}/{quote(filename)}"
+        try:
+            with self.session.get(url, timeout=30, stream=True) as response:
+                if response.status_code != 200:
+                    raise IOError(f"origin: HTTP {response.status_code}")
+                with open(tmp_path, 'wb') as f:
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        sha.update(chunk)
+                        f.write(chunk)
+            if sha.hexdigest() != digest:
+                raise IOError(f"{filename}: хэш не совпадает")
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+
+def serve(cache_dir, origin_url, port=DEFAULT_PORT):
+    """HTTP-сервер зеркала и ответчик обнаружения"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    store = ObjectStore(cache_dir, origin_url)
+
+    class CacheRequestHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            parsed = urlparse(self.path)
+            try:
+                if parsed.path.startswith('/objects/'):
+                    digest = parsed.path[len('/objects/'):]
+                    filename = parse_qs(parsed.query).get('path', [''])[0]
+                    if not SHA256_RE.match(digest) or not filename:
+                        self.send_error(400)
+                        return
+                    self.send_object(store.get_object(digest, filename))
+                else:
+                    self.send_error(404)
+            except (IOError, requests.RequestException) as e:
+                self.send_error(502, str(e))
+
+        def send_object(self, path):
+            size = os.path.getsize(path)
+            start = 0
+            range_header = self.headers.get('Range')
+            if range_header:
+                start = range_start(range_header)
+                if start is None or start >= size:
+                    self.send_error(416)
+                    return
+                self.send_response(206)
+                self.send_header("Content-Range", f"bytes {start}-{size - 1}/{size}")
+            else:
+                self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(size - start))
+            self.end_headers()
+            with open(path, 'rb') as f:
+                f.seek(start)
+                while True:
+                    chunk = f.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    self.wfile.write(chunk)
+
+        def log_message(self, format, *args):
+            pass
+
+    def answer_discovery():
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind(('', DISCOVERY_PORT))
+        reply = json.dumps({'port': port}).encode('utf-8')
+        while True:
+            data, address = sock.recvfrom(1024)
+            if data == DISCOVERY_REQUEST:
+                sock.sendto(reply, address)
+
+    threading.Thread(target=answer_discovery, name="lan-cache-discovery", daemon=True).start()
+
+    server = ThreadingHTTPServer(('', port), CacheRequestHandler)
+    print(f"Зеркало обновлений на порту {port}, origin {origin_url}, кэш {cache_dir}")
+    try:
+        server.serve_forever()
+    finally:
+        print(f"Объектов из кэша: {store.hits}, с origin: {store.misses}")
+
+
+def main():
+    """Командная строка: запуск зеркала и проверка обнаружения"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Кэширующее зеркало обновлений Smart Trainer")
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve_cmd = commands.add_parser('serve', help="запустить зеркало")
+    serve_cmd.add_argument('--dir', default='lan_cache')
+    serve_cmd.add_argument('--port', type=int, default=DEFAULT_PORT)
+    serve_cmd.add_argument('--origin', default=ORIGIN_URL)
+    commands.add_parser('discover', help="найти зеркало в сети")
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        serve(args.dir, args.origin, args.port)
+    elif args.command == 'discover':
+        print(discover() or "Зеркало не найдено")
+
+
+if __name__ == "__main__":
+    main()
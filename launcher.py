@@ -1,19 +1,37 @@
 #!/usr/bin/env python3
 """
 Smart Trainer Launcher - Универсальная версия для Windows и Orange Pi
-Автоматическая проверка обновлений и запуск приложения
+Приложение запускается сразу, обновление проверяется и готовится в фоне
+и устанавливается при следующем запуске.
+Приложение запускается в том же процессе и QApplication, без второго
+старта Python и Qt. Отдельный процесс используется, если обновление
+изменило зависимости, или по ключу --subprocess.
+С ключом --supervised (или SMART_TRAINER_SUPERVISOR=1) приложение запускается
+под supervisor.py с горячим резервом и перезапускается при падении (только Linux).
+Ручной режим с окном лаунчера: python launcher.py --manual
+Время импорта app.py по модулям: python launcher.py --import-report [--import-budget-ms 3000]
 """
 import os
 import sys
-import platform
+
+from event_log import log
 
 # ==============================
 # УНИВЕРСАЛЬНАЯ НАСТРОЙКА QT
 # ==============================
-if sys.platform == "win32":
+# Режим без дисплея (CI, сервер, бенчмарки): SMART_TRAINER_HEADLESS=1 или --headless
+HEADLESS = os.environ.get('SMART_TRAINER_HEADLESS') == '1' or '--headless' in sys.argv
+
+if HEADLESS:
+    os.environ['QT_QPA_PLATFORM'] = 'offscreen'
+    # Переменная наследуется запускаемым app.py
+    os.environ['SMART_TRAINER_HEADLESS'] = '1'
+    log.info("Headless: Используем платформу 'offscreen'")
+
+elif sys.platform == "win32":
     # Для WINDOWS
     os.environ['QT_QPA_PLATFORM'] = 'windows'
-    print(f"Windows: Используем платформу 'windows'")
+    log.info("Windows: Используем платформу 'windows'")
 
     # Ищем плагины Qt
     try:
@@ -25,7 +43,7 @@ if sys.platform == "win32":
 
         if os.path.exists(plugin_path):
             os.environ['QT_QPA_PLATFORM_PLUGIN_PATH'] = plugin_path
-            print(f"Windows: Путь к плагинам: {plugin_path}")
+            log.info("Windows: Путь к плагинам", path=plugin_path)
         else:
             # Ищем в site-packages
             import site
@@ -34,15 +52,15 @@ if sys.platform == "win32":
                 plugin_path = os.path.join(site_dir, "PySide6", "plugins", "platforms")
                 if os.path.exists(plugin_path):
                     os.environ['QT_QPA_PLATFORM_PLUGIN_PATH'] = plugin_path
-                    print(f"Windows: Альтернативный путь: {plugin_path}")
+                    log.info("Windows: Альтернативный путь", path=plugin_path)
                     break
     except ImportError:
-        print("Windows: PySide6 не найден, будет установлен позже")
+        log.warning("Windows: PySide6 не найден, будет установлен позже")
 
 elif sys.platform == "linux":
     # Для LINUX / ORANGE PI
     os.environ['QT_QPA_PLATFORM'] = 'xcb'
-    print(f"Linux: Используем платформу 'xcb'")
+    log.info("Linux: Используем платформу 'xcb'")
 
     # Для Orange Pi с GUI
     if 'DISPLAY' not in os.environ:
@@ -53,11 +71,13 @@ else:
 
 # Остальные импорты ПОСЛЕ настройки переменных окружения
 import subprocess
-import requests
 import threading
 import time
 from datetime import datetime
 
+import updater
+import supervisor
+
 from PySide6.QtWidgets import (QWidget, QVBoxLayout, QPushButton, QLabel,
                                QApplication, QProgressBar, QGroupBox, QTextEdit,
                                QHBoxLayout, QMessageBox)
@@ -65,6 +85,9 @@ from PySide6.QtCore import Qt, QTimer, Signal, Slot, QPointF
 from PySide6.QtGui import QPixmap, QFont, QPainter, QBrush, QColor, QPen, QPolygonF
 
 
+LOG_MAX_LINES = 500
+
+
 class SmartTrainerLauncher(QWidget):
     """Основной класс лаунчера"""
     log_signal = Signal(str)
@@ -73,12 +96,18 @@ class SmartTrainerLauncher(QWidget):
     version_signal = Signal(str)
     complete_signal = Signal(bool, str)
 
-    def __init__(self):
+    def __init__(self, auto_launch=True, in_process=True, supervised=False):
         super().__init__()
         self.current_version = "1.0.0"
         self.github_version = None
-        self.auto_launch = True
+        self.auto_launch = auto_launch
         self.is_updating = False
+        self.app_launched = False
+        self.in_process = in_process
+        self.supervised = supervised
+        self.app_window = None
+        self.app_dir = os.path.dirname(os.path.abspath(__file__))
+        self.updater = updater.StagedUpdater(self.app_dir, log=self.log_signal.emit)
         self.init_ui()
 
         # Подключаем сигналы
@@ -91,8 +120,11 @@ class SmartTrainerLauncher(QWidget):
         # Загружаем текущую версию
         self.load_current_version()
 
-        # Запускаем таймер автостарта
-        self.start_countdown()
+        if self.auto_launch:
+            # Приложение стартует сразу, обновление проверяется в фоне
+            # Проверка стартует первой: лаунчер ждет ее завершения
+            QTimer.singleShot(0, self.start_automatic_check)
+            QTimer.singleShot(0, self.launch_application)
 
     def init_ui(self):
         self.setWindowTitle("Smart Trainer Launcher")
@@ -134,7 +166,7 @@ class SmartTrainerLauncher(QWidget):
         self.version_label.setAlignment(Qt.AlignCenter)
 
         # Таймер
-        self.timer_label = QLabel("Автозапуск через: 3")
+        self.timer_label = QLabel("Запуск приложения..." if self.auto_launch else "Ручной режим")
         self.timer_label.setFont(QFont("Arial", 16, QFont.Bold))
         self.timer_label.setStyleSheet("color: #FF6B00;")
         self.timer_label.setAlignment(Qt.AlignCenter)
@@ -184,6 +216,8 @@ class SmartTrainerLauncher(QWidget):
         self.log_text.setReadOnly(True)
         self.log_text.setFont(QFont("Consolas", 9))
         self.log_text.setMaximumHeight(100)
+        # Лог живет весь день - старые строки отбрасываются
+        self.log_text.document().setMaximumBlockCount(LOG_MAX_LINES)
         self.log_text.setStyleSheet("""
             QTextEdit {
                 background-color: #1E1E1E;
@@ -304,60 +338,21 @@ class SmartTrainerLauncher(QWidget):
 
     def load_current_version(self):
         """Загружает текущую версию"""
-        version_file = "version.txt"
-
-        if os.path.exists(version_file):
-            try:
-                # Пробуем несколько кодировок
-                encodings = ['utf-8', 'utf-16', 'cp1251', 'cp1252', 'latin-1']
-
-                for encoding in encodings:
-                    try:
-                        with open(version_file, 'r', encoding=encoding) as f:
-                            content = f.read().strip()
-                            if content:
-                                self.current_version = content
-                                self.version_signal.emit(f"Версия: {self.current_version}")
-                                break
-                    except:
-                        continue
-            except:
-                pass
-
+        version = self.updater.current_version()
+        if version:
+            self.current_version = version
         self.version_signal.emit(f"Версия: {self.current_version}")
 
-    def start_countdown(self):
-        """Запускает обратный отсчет"""
-        self.countdown = 3
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_countdown)
-        self.timer.start(1000)  # Каждую секунду
-
-    def update_countdown(self):
-        """Обновляет обратный отсчет"""
-        if self.countdown > 0:
-            self.timer_label.setText(f"Автозапуск через: {self.countdown}")
-            self.countdown -= 1
-        else:
-            self.timer.stop()
-            if self.auto_launch and not self.is_updating:
-                QTimer.singleShot(1000, self.launch_application)
-
     def on_check_now(self):
         """Обработчик кнопки 'Проверить сейчас'"""
-        self.auto_launch = False
-        self.timer.stop()
         self.timer_label.setText("Ручная проверка")
         self.start_automatic_check()
 
     def on_cancel(self):
         """Обработчик кнопки 'Отмена'"""
-        self.is_updating = False
-        self.btn_check.setEnabled(True)
-        self.btn_cancel.setEnabled(False)
+        self.updater.cancelled = True
         self.status_signal.emit("Операция отменена")
         self.add_log("Операция отменена пользователем")
-        self.launch_application()
 
     def start_automatic_check(self):
         """Начинает автоматическую проверку"""
@@ -371,119 +366,20 @@ class SmartTrainerLauncher(QWidget):
         thread.start()
 
     def check_and_update(self):
-        """Проверяет и обновляет приложение"""
+        """Проверяет обновление и готовит его к следующему запуску (фоновый поток)"""
         try:
             self.status_signal.emit("Проверка обновлений...")
             self.progress_signal.emit(10, "Проверка GitHub")
-            self.add_log("Проверка обновлений...")
-
-            # Проверяем версию на GitHub
-            github_version = self.get_github_version()
-
-            if github_version:
-                self.add_log(f"Локальная версия: {self.current_version}")
-                self.add_log(f"Версия на GitHub: {github_version}")
-
-                if github_version == self.current_version:
-                    self.add_log("У вас актуальная версия")
-                    self.complete_signal.emit(True, "Версия актуальна")
-                    return
-
-                self.add_log(f"Доступно обновление: {self.current_version} → {github_version}")
-                self.status_signal.emit("Скачивание обновлений...")
-                self.progress_signal.emit(30, "Скачивание файлов")
-
-                # Обновляем приложение
-                if self.update_application(github_version):
-                    self.complete_signal.emit(True, "Обновление завершено")
-                else:
-                    self.complete_signal.emit(False, "Ошибка обновления")
-            else:
-                self.add_log("Не удалось проверить обновления")
-                self.complete_signal.emit(True, "Проверка завершена")
-
-        except Exception as e:
-            self.add_log(f"Ошибка: {str(e)}")
-            self.complete_signal.emit(False, f"Ошибка: {str(e)}")
-
-    def get_github_version(self):
-        """Получает версию с GitHub"""
-        try:
-            version_url = "https://raw.githubusercontent.com/DenisASUTP/OP_4/main/version.txt"
-            response = requests.get(version_url, timeout=10)
-            if response.status_code == 200:
-                return response.text.strip()
-        except Exception as e:
-            self.add_log(f"Ошибка подключения: {e}")
-        return None
-
-    def update_application(self, github_version):
-        """Обновляет приложение"""
-        try:
-            # Файлы для обновления
-            files_to_update = ['app.py', 'requirements.txt']
-
-            # Скачиваем файлы
-            for filename in files_to_update:
-                self.add_log(f"Скачиваю {filename}...")
-
-                if not self.download_file(filename):
-                    self.add_log(f"Ошибка скачивания {filename}")
-                    return False
-
-            # Обновляем версию
-            try:
-                with open("version.txt", 'w', encoding='utf-8') as f:
-                    f.write(github_version)
-                self.current_version = github_version
-                self.version_signal.emit(f"Версия: {self.current_version}")
-            except:
-                pass
-
-            # Устанавливаем зависимости
-            self.status_signal.emit("Установка модулей...")
-            self.progress_signal.emit(80, "Установка зависимостей")
-
-            if os.path.exists("requirements.txt"):
-                self.add_log("Установка зависимостей...")
-                if self.install_requirements():
-                    self.add_log("Зависимости установлены")
-                else:
-                    self.add_log("Ошибка установки зависимостей")
+            self.log_signal.emit("Проверка обновлений...")
+            self.updater.cancelled = False
 
+            success, message = self.updater.check_and_stage()
             self.progress_signal.emit(100, "Готово")
-            return True
+            self.complete_signal.emit(success, message)
 
         except Exception as e:
-            self.add_log(f"Ошибка обновления: {e}")
-            return False
-
-    def download_file(self, filename):
-        """Скачивает файл с GitHub"""
-        try:
-            url = f"https://raw.githubusercontent.com/DenisASUTP/OP_4/main/{filename}"
-            response = requests.get(url, timeout=30)
-
-            if response.status_code == 200:
-                with open(filename, 'wb') as f:
-                    f.write(response.content)
-                return True
-        except:
-            pass
-        return False
-
-    def install_requirements(self):
-        """Устанавливает зависимости"""
-        try:
-            # Для Windows используем pip, для Linux - pip3
-            pip_cmd = "pip" if sys.platform == "win32" else "pip3"
-
-            subprocess.check_call([sys.executable, "-m", pip_cmd, "install", "-r", "requirements.txt"],
-                                  stdout=subprocess.DEVNULL,
-                                  stderr=subprocess.DEVNULL)
-            return True
-        except:
-            return False
+            self.log_signal.emit(f"Ошибка: {str(e)}")
+            self.complete_signal.emit(False, f"Ошибка: {str(e)}")
 
     @Slot(bool, str)
     def on_operation_complete(self, success, message):
@@ -499,12 +395,29 @@ class SmartTrainerLauncher(QWidget):
             self.status_signal.emit("Ошибка")
             self.add_log(f"✗ {message}")
 
-        # Запускаем приложение через секунду
+        # Приложение уже работает - фоновому лаунчеру больше нечего делать.
+        # Если оно запущено в этом же процессе, процесс живет вместе с ним
+        if self.app_launched:
+            if self.app_window is None:
+                QApplication.instance().quit()
+            return
+
+        # Ручной режим: приложение еще не запущено, версию можно подменить сразу
+        try:
+            version = self.updater.apply_staged()
+            if version:
+                self.current_version = version
+                self.version_signal.emit(f"Версия: {self.current_version}")
+            if self.updater.needs_fresh_process():
+                self.in_process = False
+        except OSError as e:
+            self.add_log(f"Ошибка установки обновления: {e}")
         QTimer.singleShot(1000, self.launch_application)
 
     @Slot(str)
     def add_log(self, message):
         """Добавляет сообщение в лог"""
+        log.info(message, source='launcher')
         timestamp = datetime.now().strftime('%H:%M:%S')
         self.log_text.append(f"[{timestamp}] {message}")
         # Автопрокрутка
@@ -530,28 +443,94 @@ class SmartTrainerLauncher(QWidget):
 
     def launch_application(self):
         """Запускает основное приложение"""
+        if self.app_launched:
+            return
         if not os.path.exists("app.py"):
             self.add_log("❌ Ошибка: Файл app.py не найден!")
             QMessageBox.critical(self, "Ошибка", "Файл app.py не найден!")
             return
 
         self.add_log("🚀 Запуск приложения...")
+        # Метка для замера времени до экрана входа (см. app.report_handoff)
+        os.environ['SMART_TRAINER_HANDOFF_T0'] = repr(time.time())
 
         try:
             # Закрываем лаунчер
             self.hide()
 
+            # Под супервизором приложение живет в своем процессе, иначе его некому перезапускать
+            if self.in_process and not self.supervised and self.launch_in_process():
+                return
+
             # Запускаем приложение
-            subprocess.Popen([sys.executable, "app.py"])
+            subprocess.Popen([sys.executable, "supervisor.py" if self.supervised else "app.py"])
+            self.app_launched = True
 
-            # Закрываем лаунчер через секунду
-            QTimer.singleShot(1000, QApplication.instance().quit)
+            # Лаунчер остается в фоне, пока не закончится проверка обновлений
+            if not self.is_updating:
+                QTimer.singleShot(1000, QApplication.instance().quit)
 
         except Exception as e:
             self.add_log(f"❌ Ошибка запуска: {e}")
             QMessageBox.critical(self, "Ошибка запуска", f"Не удалось запустить приложение:\n{str(e)}")
 
 
+    def launch_in_process(self):
+        """Запускает приложение в текущем QApplication. False - нужен отдельный процесс"""
+        try:
+            import app as trainer
+            qt_app = QApplication.instance()
+            self.app_window = trainer.create_window(qt_app)
+        except Exception as e:
+            self.add_log(f"Запуск в процессе не удался ({e}), запускаю отдельно")
+            self.app_window = None
+            return False
+
+        self.app_launched = True
+        self.add_log("Приложение запущено в процессе лаунчера")
+        # Теперь закрытие окна приложения завершает процесс
+        qt_app.setQuitOnLastWindowClosed(True)
+        return True
+
+
+# Бюджет холодного импорта app.py, мс. Превышение - регрессия времени запуска
+IMPORT_BUDGET_MS = 3000
+
+
+def measure_import_time(module='app'):
+    """Импортирует модуль в отдельном интерпретаторе с -X importtime.
+    Возвращает список (модуль, собственное время, накопленное время) в мс"""
+    env = dict(os.environ, SMART_TRAINER_HEADLESS='1')
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                            capture_output=True, text=True, env=env,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(self_us) / 1000.0, int(cumulative_us) / 1000.0))
+    return modules
+
+
+def import_report(budget_ms, top=15):
+    """Печатает самые дорогие импорты. Возвращает False при превышении бюджета"""
+    modules = measure_import_time()
+    total_ms = next((cumulative for name, _, cumulative in modules if name == 'app'), 0.0)
+    print(f"{'Модуль':<40} {'свое, мс':>10} {'всего, мс':>10}")
+    for name, self_ms, cumulative_ms in sorted(modules, key=lambda m: m[2], reverse=True)[:top]:
+        print(f"{name:<40} {self_ms:10.1f} {cumulative_ms:10.1f}")
+
+    print(f"\nИмпорт app: {total_ms:.0f} мс (бюджет {budget_ms:.0f} мс)")
+    if total_ms > budget_ms:
+        print("❌ Бюджет времени импорта превышен")
+        return False
+    return True
+
+
 def check_requirements():
     """Проверяет наличие необходимых модулей"""
     try:
@@ -594,18 +573,46 @@ def check_requirements():
 
 def main():
     """Основная функция"""
-    print(f"Платформа: {sys.platform}")
-    print(f"Python: {sys.version}")
+    log.install_crash_handlers()
+    log.info("Лаунчер запущен", platform=sys.platform, python=sys.version.split()[0])
+
+    if '--import-report' in sys.argv:
+        budget_ms = IMPORT_BUDGET_MS
+        if '--import-budget-ms' in sys.argv:
+            budget_ms = float(sys.argv[sys.argv.index('--import-budget-ms') + 1])
+        sys.exit(0 if import_report(budget_ms) else 1)
 
     # Проверяем наличие модулей
     if not check_requirements():
         return
 
+    # Обновление, подготовленное в прошлый раз, ставим до запуска приложения
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    in_process = '--subprocess' not in sys.argv
+    try:
+        staged = updater.StagedUpdater(app_dir)
+        staged.apply_staged()
+        if staged.needs_fresh_process():
+            # Новые зависимости и новые версии уже импортированных модулей - только в новом процессе
+            in_process = False
+    except OSError as e:
+        log.error("Не удалось установить подготовленное обновление", error=str(e))
+
+    manual = '--manual' in sys.argv
+    supervised = '--supervised' in sys.argv or os.environ.get('SMART_TRAINER_SUPERVISOR') == '1'
+    if supervised and not supervisor.SUPPORTED:
+        log.warning("Супервизор доступен только в Linux, обычный запуск", platform=sys.platform)
+        supervised = False
+
     app = QApplication(sys.argv)
     app.setStyle('Fusion')
+    if not manual:
+        # Окно скрывается при запуске приложения, это не должно завершать лаунчер
+        app.setQuitOnLastWindowClosed(False)
 
-    launcher = SmartTrainerLauncher()
-    launcher.show()
+    launcher = SmartTrainerLauncher(auto_launch=not manual, in_process=in_process, supervised=supervised)
+    if manual:
+        launcher.show()
 
     # Универсальный вызов
     sys.exit(app.exec())
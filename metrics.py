@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Smart Trainer Metrics - счетчики и гистограммы в текстовом формате Prometheus
+Запись события - одно сложение или bisect по списку границ, без блокировок
+и без выделения памяти, поэтому инструментировать можно и горячие пути.
+Значения из нескольких потоков складываются под GIL, редкая потеря
+инкремента при гонке для метрик допустима.
+
+Эндпоинт включается переменной SMART_TRAINER_METRICS_PORT=9108,
+слушает только 127.0.0.1: curl http://127.0.0.1:9108/metrics
+Стоимость записи события: python metrics.py overhead
+"""
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from event_log import log
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+
+class Counter:
+    """Монотонно растущее значение"""
+    __slots__ = ('name', 'help', 'value')
+
+    def __init__(self, name, help):
+        self.name = name
+        self.help = help
+        self.value = 0
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def render(self):
+        return [f"# HELP {self.name} {self.help}",
+                f"# TYPE {self.name} counter",
+                f"{self.name} {self.value}"]
+
+
+class Gauge:
+    """Значение, которое вычисляется функцией в момент чтения метрик"""
+    __slots__ = ('name', 'help', 'read')
+
+    def __init__(self, name, help, read):
+        self.name = name
+        self.help = help
+        self.read = read
+
+    def render(self):
+        try:
+            value = self.read()
+        except Exception:
+            return []
+        return [f"# HELP {self.name} {self.help}",
+                f"# TYPE {self.name} gauge",
+                f"{self.name} {value}"]
+
+
+class Histogram:
+    """Распределение по фиксированным границам. Накопительные суммы считаются при чтении"""
+    __slots__ = ('name', 'help', 'bounds', 'counts', 'sum')
+
+    def __init__(self, name, help, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.bounds = list(buckets)
+        # Последняя ячейка - значения больше всех границ (+Inf)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+
+    def count(self):
+        return sum(self.counts)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        cumulative = 0
+        for bound, count in zip(self.bounds, self.counts):
+            cumulative += count
+            lines.append(f'{self.name}_bucket{{le="{bound}"}} {cumulative}')
+        cumulative += self.counts[-1]
+        lines.append(f'{self.name}_bucket{{le="+Inf"}} {cumulative}')
+        lines.append(f"{self.name}_sum {self.sum}")
+        lines.append(f"{self.name}_count {cumulative}")
+        return lines
+
+
+class Registry:
+    """Набор метрик процесса"""
+
+    def __init__(self):
+        self.metrics = {}
+
+    def add(self, metric):
+        # Повторная регистрация возвращает уже созданную метрику (повторный импорт, тесты)
+        return self.metrics.setdefault(metric.name, metric)
+
+    def render(self):
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+
+def counter(name, help):
+    return registry.add(Counter(name, help))
+
+
+def histogram(name, help, buckets=LATENCY_BUCKETS):
+    return registry.add(Histogram(name, help, buckets))
+
+
+def gauge(name, help, read):
+    return registry.add(Gauge(name, help, read))
+
+
+def read_rss_bytes():
+    """Резидентная память процесса"""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        import resource
+        # На Linux ru_maxrss в КБ - это пик, но лучше, чем ничего
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def read_cpu_seconds():
+    times = os.times()
+    return times.user + times.system
+
+
+gauge('process_resident_memory_bytes', 'Резидентная память процесса', read_rss_bytes)
+gauge('process_cpu_seconds_total', 'Процессорное время процесса, с', read_cpu_seconds)
+
+
+def start_http_server(port, host='127.0.0.1'):
+    """Отдает /metrics в фоновом потоке. Возвращает сервер"""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class MetricsRequestHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split('?')[0] != '/metrics':
+                self.send_error(404)
+                return
+            body = registry.render().encode('utf-8')
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), MetricsRequestHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+def start_from_env():
+    """Запускает эндпоинт, если задан SMART_TRAINER_METRICS_PORT"""
+    port = os.environ.get('SMART_TRAINER_METRICS_PORT')
+    if not port:
+        return None
+    try:
+        server = start_http_server(int(port))
+    except (OSError, ValueError) as e:
+        log.warning("Метрики: не удалось открыть порт", port=port, error=str(e))
+        return None
+    log.info(f"Метрики: http://127.0.0.1:{port}/metrics")
+    return server
+
+
+def measure_overhead(events=1_000_000):
+    """Средняя стоимость записи события, нс: счетчик, гистограмма, гистограмма с замером времени"""
+    test_counter = Counter('overhead_counter', '')
+    test_histogram = Histogram('overhead_histogram', '')
+    perf_counter = time.perf_counter
+
+    start = perf_counter()
+    for _ in range(events):
+        test_counter.inc()
+    counter_ns = (perf_counter() - start) / events * 1e9
+
+    start = perf_counter()
+    for _ in range(events):
+        test_histogram.observe(0.003)
+    histogram_ns = (perf_counter() - start) / events * 1e9
+
+    start = perf_counter()
+    for _ in range(events):
+        t0 = perf_counter()
+        test_histogram.observe(perf_counter() - t0)
+    timed_ns = (perf_counter() - start) / events * 1e9
+
+    return {'counter_inc': counter_ns, 'histogram_observe': histogram_ns, 'timed_observe': timed_ns}
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:] == ['overhead']:
+        for name, ns in measure_overhead().items():
+            print(f"{name:<20} {ns:8.0f} нс")
+    else:
+        print(__doc__)
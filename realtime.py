@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Smart Trainer Realtime - изоляция процесса сбора от интерфейса
+Процесс сбора (workers.py, SMART_TRAINER_WORKERS=1) можно закрепить за отдельным
+ядром, дать ему приоритет SCHED_FIFO и запретить выгрузку его памяти (mlockall).
+Интерфейс и процесс записи при этом работают на остальных ядрах.
+Каждая настройка применяется отдельно: если не хватает прав (нет root,
+RLIMIT_RTPRIO или RLIMIT_MEMLOCK) или ОС ее не поддерживает, в журнал пишется
+предупреждение, а процесс работает как обычно.
+
+Настройки:
+    SMART_TRAINER_ACQ_CPU=3         - ядро для процесса сбора
+    SMART_TRAINER_ACQ_FIFO=50       - приоритет SCHED_FIFO (1-99), 0 - выключено
+    SMART_TRAINER_ACQ_MLOCK=1       - закрепить память процесса сбора в ОЗУ
+Сравнение дрожания периода отсчетов: python workers.py jitter
+"""
+import ctypes
+import os
+
+from event_log import log
+
+MCL_CURRENT = 1
+MCL_FUTURE = 2
+
+
+class RealtimeConfig:
+    """Настройки изоляции. Передается в процессы spawn, поэтому только простые поля"""
+
+    def __init__(self, acquisition_cpu=None, fifo_priority=0, lock_memory=False):
+        self.acquisition_cpu = acquisition_cpu
+        self.fifo_priority = fifo_priority
+        self.lock_memory = lock_memory
+
+    @classmethod
+    def from_env(cls):
+        cpu = os.environ.get('SMART_TRAINER_ACQ_CPU')
+        try:
+            acquisition_cpu = int(cpu) if cpu else None
+            fifo_priority = int(os.environ.get('SMART_TRAINER_ACQ_FIFO', '0'))
+        except ValueError:
+            log.warning("Realtime: неверные настройки, изоляция выключена", cpu=cpu)
+            return cls()
+        return cls(acquisition_cpu, fifo_priority, os.environ.get('SMART_TRAINER_ACQ_MLOCK') == '1')
+
+    def other_cpus(self):
+        """Ядра для интерфейса и записи. Если ядро одно, делить нечего - возвращаем все"""
+        available = os.sched_getaffinity(0)
+        return (available - {self.acquisition_cpu}) or available
+
+
+def apply_acquisition(config):
+    """Вызывается в процессе сбора. Возвращает список примененных настроек"""
+    applied = []
+    if config.acquisition_cpu is not None:
+        try:
+            os.sched_setaffinity(0, {config.acquisition_cpu})
+            applied.append(f"cpu{config.acquisition_cpu}")
+        except (AttributeError, OSError, ValueError) as e:
+            log.warning("Realtime: не удалось закрепить процесс сбора за ядром",
+                        cpu=config.acquisition_cpu, error=str(e))
+
+    if config.fifo_priority > 0:
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(config.fifo_priority))
+            applied.append(f"fifo{config.fifo_priority}")
+        except (AttributeError, OSError) as e:
+            log.warning("Realtime: SCHED_FIFO недоступен, обычный планировщик",
+                        priority=config.fifo_priority, error=str(e))
+
+    if config.lock_memory:
+        try:
+            lock_all_memory()
+            applied.append("mlock")
+        except (AttributeError, OSError, TypeError) as e:
+            log.warning("Realtime: не удалось закрепить память", error=str(e))
+
+    if applied:
+        log.info("Realtime: процесс сбора изолирован", settings=",".join(applied))
+    return applied
+
+
+def confine(config):
+    """Уводит текущий процесс (интерфейс, запись) с ядра процесса сбора"""
+    if config.acquisition_cpu is None:
+        return False
+    try:
+        os.sched_setaffinity(0, config.other_cpus())
+        return True
+    except (AttributeError, OSError) as e:
+        log.warning("Realtime: не удалось ограничить ядра процесса", error=str(e))
+        return False
+
+
+def lock_all_memory():
+    libc = ctypes.CDLL(None, use_errno=True)
+    if libc.mlockall(MCL_CURRENT | MCL_FUTURE) != 0:
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
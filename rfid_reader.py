@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Smart Trainer RFID Reader - прямое чтение считывателя карт в фоновом потоке
+Номер карты собирается целиком и передается приложению одним вызовом,
+без эмуляции клавиатуры и без зависимости от фокуса окна.
+
+Источник задается переменной окружения SMART_TRAINER_RFID:
+    evdev:/dev/input/event3      - HID-считыватель через evdev (нужен пакет evdev)
+    serial:/dev/ttyUSB0[:9600]   - считыватель на последовательном порту (пакет pyserial)
+    fake                         - тестовый режим, карты подаются через FakeRfidDevice.tap()
+Если переменная не задана, используется старый путь через клавиатуру.
+"""
+import os
+import queue
+import threading
+import time
+
+from event_log import log
+
+CARD_LENGTH = 10
+
+
+class CardFramer:
+    """Собирает цифры в номер карты и отсекает повторные касания"""
+
+    def __init__(self, on_card, length=CARD_LENGTH, debounce=1.5, char_timeout=0.3,
+                 clock=time.monotonic):
+        self.on_card = on_card
+        self.length = length
+        self.debounce = debounce
+        self.char_timeout = char_timeout
+        self.clock = clock
+        self.digits = []
+        self.last_char_time = 0.0
+        self.last_card = None
+        self.last_card_time = 0.0
+
+    def feed(self, text):
+        """Принимает очередную порцию символов от считывателя"""
+        for char in text:
+            if char.isdigit():
+                self.feed_digit(char)
+            elif char in '\r\n\x03':
+                self.feed_end()
+
+    def feed_digit(self, digit):
+        now = self.clock()
+        # Пауза между символами - начало новой карты
+        if self.digits and now - self.last_char_time > self.char_timeout:
+            self.digits = []
+        self.last_char_time = now
+        self.digits.append(digit)
+        if len(self.digits) == self.length:
+            self.emit(''.join(self.digits))
+
+    def feed_end(self):
+        if len(self.digits) == self.length:
+            self.emit(''.join(self.digits))
+        self.digits = []
+
+    def emit(self, card):
+        self.digits = []
+        now = self.clock()
+        if card == self.last_card and now - self.last_card_time < self.debounce:
+            self.last_card_time = now
+            return
+        self.last_card = card
+        self.last_card_time = now
+        self.on_card(card)
+
+
+class FakeRfidDevice:
+    """Тестовый считыватель: карты подаются вызовом tap()"""
+
+    def __init__(self):
+        self.chars = queue.Queue()
+
+    def tap(self, card_id):
+        self.chars.put(card_id + "\n")
+
+    def read(self, timeout):
+        try:
+            return self.chars.get(timeout=timeout)
+        except queue.Empty:
+            return ""
+
+    def close(self):
+        pass
+
+
+class EvdevDevice:
+    """HID-считыватель, читаемый напрямую через evdev"""
+
+    def __init__(self, path):
+        import evdev
+        from evdev import ecodes
+
+        self.device = evdev.InputDevice(path)
+        # Захватываем устройство, чтобы нажатия не попадали в X-сервер
+        try:
+            self.device.grab()
+        except OSError:
+            pass
+
+        self.key_down = 1
+        self.key_type = ecodes.EV_KEY
+        self.key_map = {ecodes.KEY_ENTER: "\n", ecodes.KEY_KPENTER: "\n"}
+        for digit in range(10):
+            self.key_map[getattr(ecodes, f"KEY_{digit}")] = str(digit)
+            self.key_map[getattr(ecodes, f"KEY_KP{digit}")] = str(digit)
+
+    def read(self, timeout):
+        import select
+
+        ready, _, _ = select.select([self.device.fd], [], [], timeout)
+        if not ready:
+            return ""
+        chars = []
+        for event in self.device.read():
+            if event.type == self.key_type and event.value == self.key_down:
+                char = self.key_map.get(event.code)
+                if char:
+                    chars.append(char)
+        return ''.join(chars)
+
+    def close(self):
+        try:
+            self.device.ungrab()
+        except OSError:
+            pass
+        self.device.close()
+
+
+class SerialDevice:
+    """Считыватель на последовательном порту"""
+
+    def __init__(self, path, baudrate=9600):
+        import serial
+
+        self.port = serial.Serial(path, baudrate, timeout=0.2)
+
+    def read(self, timeout):
+        self.port.timeout = timeout
+        data = self.port.read(64)
+        return data.decode('ascii', errors='ignore')
+
+    def close(self):
+        self.port.close()
+
+
+class RfidReaderService:
+    """Фоновый поток: читает устройство и отдает готовые номера карт"""
+
+    def __init__(self, device_factory, on_card, retry_interval=2.0):
+        self.device_factory = device_factory
+        self.framer = CardFramer(on_card)
+        self.retry_interval = retry_interval
+        self.device = None
+        self.running = False
+        self.thread = None
+        self.error = None
+
+    def start(self):
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="rfid-reader", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+
+    def run(self):
+        while self.running:
+            try:
+                if self.device is None:
+                    self.device = self.device_factory()
+                    self.error = None
+                text = self.device.read(0.2)
+                if text:
+                    self.framer.feed(text)
+            except Exception as e:
+                # Считыватель отключили или он еще не готов - переоткрываем
+                self.error = str(e)
+                self.close_device()
+                time.sleep(self.retry_interval)
+        self.close_device()
+
+    def close_device(self):
+        if self.device is not None:
+            try:
+                self.device.close()
+            except Exception:
+                pass
+            self.device = None
+
+
+def create_reader_from_env(on_card, spec=None):
+    """Создает службу считывателя по SMART_TRAINER_RFID или возвращает None"""
+    spec = spec if spec is not None else os.environ.get('SMART_TRAINER_RFID', '')
+    if not spec:
+        return None
+
+    kind, _, target = spec.partition(':')
+    if kind == 'fake':
+        device = FakeRfidDevice()
+        service = RfidReaderService(lambda: device, on_card)
+        service.device = device
+        return service
+    if kind == 'evdev':
+        return RfidReaderService(lambda: EvdevDevice(target), on_card)
+    if kind == 'serial':
+        path, _, baudrate = target.partition(':')
+        baudrate = int(baudrate) if baudrate else 9600
+        return RfidReaderService(lambda: SerialDevice(path, baudrate), on_card)
+
+    log.warning("RFID: неизвестный источник, используется ввод с клавиатуры", spec=spec)
+    return None
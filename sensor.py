@@ -0,0 +1,35 @@
+#!/usr/bin/env python3
+"""
+Smart Trainer Sensor - опрос датчика силы и положения
+Модуль не зависит от Qt: его использует и интерфейс, и процесс сбора данных (workers.py)
+"""
+from array import array
+
+# Шум датчика: таблица считается один раз, обход с нечетным шагом выглядит случайным.
+# Раньше шум брался из datetime.now() - это объект на каждый отсчет.
+# Индексы до 256 - закэшированные целые CPython, отсчет ничего не выделяет
+NOISE_SIZE = 256
+NOISE = array('d', [0.5 - i / NOISE_SIZE for i in range(NOISE_SIZE)])
+NOISE_STEP = 97
+
+
+# Заглушка для Modbus RTU
+class ModbusSimulator:
+    def __init__(self):
+        self.current_force = 0
+        self.target_force = 0
+        self.position = 0
+        self.is_connected = True
+        self.noise_index = 0
+
+    def read_force_sensor(self):
+        self.current_force += (self.target_force - self.current_force) * 0.1
+        self.noise_index = (self.noise_index + NOISE_STEP) % NOISE_SIZE
+        return self.current_force + NOISE[self.noise_index]
+
+    def set_target_force(self, force):
+        self.target_force = force
+
+    def get_position(self):
+        self.position += 0.1
+        return self.position % 100
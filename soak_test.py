@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Smart Trainer Soak Test - многочасовой прогон входов и тренировок без дисплея
+После каждого перехода снимаются выделения Python (tracemalloc), число Qt-объектов
+и RSS. После прогрева рост сверх бюджета считается утечкой, а переходы,
+после которых остаются объекты, перечисляются в отчете.
+
+Запуск: python soak_test.py [--cycles 500 | --hours 14] [--budget-kb 1024] [--object-budget 0]
+"""
+import os
+import sys
+
+# Offscreen-платформу нужно выбрать до импорта app
+os.environ['SMART_TRAINER_HEADLESS'] = '1'
+
+import argparse
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SCRIPT_DIR)
+
+import app as trainer
+import metrics
+from bench_ui import TEST_RFID, WORKOUT_TICKS, close_modal_dialogs
+from PySide6.QtWidgets import QApplication
+from PySide6.QtCore import QEvent, QObject, QTimer
+
+TRANSITIONS = ['login', 'catalog', 'workout', 'stop', 'logout']
+
+
+def drain_events(qt_app):
+    """Обрабатывает события, включая отложенное удаление (deleteLater)"""
+    for _ in range(5):
+        qt_app.sendPostedEvents()
+        qt_app.sendPostedEvents(None, QEvent.Type.DeferredDelete)
+        qt_app.processEvents()
+
+
+def count_qobjects(qt_app, window):
+    return len(window.findChildren(QObject)) + len(qt_app.findChildren(QObject))
+
+
+class SoakTest:
+    """Гоняет сценарий по кругу и считает, что остается после каждого перехода"""
+
+    def __init__(self, qt_app, db):
+        self.qt_app = qt_app
+        self.window = trainer.SmartTrainerApp(db)
+        self.window.show()
+        drain_events(qt_app)
+        self.retained = {name: {'objects': 0, 'widgets': 0, 'py_kb': 0.0} for name in TRANSITIONS}
+
+    def snapshot(self):
+        return {
+            'objects': count_qobjects(self.qt_app, self.window),
+            'widgets': len(QApplication.allWidgets()),
+            'py_kb': tracemalloc.get_traced_memory()[0] / 1024.0,
+            'rss_kb': metrics.read_rss_bytes() / 1024.0,
+        }
+
+    def step_login(self):
+        self.window.process_rfid(TEST_RFID)
+        self.window.show_welcome_screen()
+
+    def step_catalog(self):
+        self.window.show_exercise_screen()
+
+    def step_workout(self):
+        self.window.start_exercise(self.window.exercises[0])
+        for _ in range(WORKOUT_TICKS):
+            self.window.update_sensor_data()
+        self.window.ui_binder.flush()
+        self.window.force_chart.advance()
+
+    def step_stop(self):
+        QTimer.singleShot(0, close_modal_dialogs)
+        self.window.stop_workout()
+
+    def step_logout(self):
+        self.window.show_auth_screen()
+
+    def run_cycle(self, record):
+        """Один круг сценария. При record=True копит прирост по переходам"""
+        for name in TRANSITIONS:
+            before = self.snapshot()
+            getattr(self, f"step_{name}")()
+            drain_events(self.qt_app)
+            if record:
+                after = self.snapshot()
+                for key in ('objects', 'widgets', 'py_kb'):
+                    self.retained[name][key] += after[key] - before[key]
+
+
+def print_retention(retained, cycles):
+    print(f"\n{'Переход':<10} {'Qt-объекты':>11} {'виджеты':>9} {'Python, КБ':>11}   (суммарный прирост за {cycles} кругов)")
+    for name, values in retained.items():
+        mark = "  ←" if values['objects'] > 0 or values['widgets'] > 0 else ""
+        print(f"{name:<10} {values['objects']:11d} {values['widgets']:9d} {values['py_kb']:11.1f}{mark}")
+
+
+def main():
+    """Основная функция"""
+    parser = argparse.ArgumentParser(description="Длительный прогон Smart Trainer на утечки")
+    parser.add_argument('--cycles', type=int, default=500)
+    parser.add_argument('--hours', type=float, default=None, help="гонять по времени, а не по числу кругов")
+    parser.add_argument('--warmup', type=int, default=20, help="кругов на заполнение кэшей")
+    parser.add_argument('--budget-kb', type=float, default=1024.0,
+                        help="допустимый рост памяти Python после прогрева")
+    parser.add_argument('--object-budget', type=int, default=0,
+                        help="допустимый рост числа Qt-объектов после прогрева")
+    parser.add_argument('--report-every', type=int, default=100)
+    args = parser.parse_args()
+
+    # Работаем на копии базы, чтобы не трогать users.db
+    work_dir = tempfile.mkdtemp(prefix='smart_trainer_soak_')
+    db_path = os.path.join(SCRIPT_DIR, 'users.db')
+    if os.path.exists(db_path):
+        shutil.copy(db_path, work_dir)
+    os.chdir(work_dir)
+
+    # Круг короче задержек входа: иначе отложенные singleShot копятся в очереди
+    trainer.LOGIN_DELAYS.update(trainer.FAST_LOGIN_DELAYS)
+
+    qt_app = QApplication(sys.argv[:1])
+    qt_app.setStyle('Fusion')
+    db = trainer.UserDatabase()
+    trainer.initialize_test_data(db)
+
+    tracemalloc.start()
+    soak = SoakTest(qt_app, db)
+    for _ in range(args.warmup):
+        soak.run_cycle(record=False)
+    baseline = soak.snapshot()
+    baseline_trace = tracemalloc.take_snapshot()
+    print(f"После прогрева: {baseline['objects']} Qt-объектов, {baseline['widgets']} виджетов, "
+          f"Python {baseline['py_kb']:.0f} КБ, RSS {baseline['rss_kb']:.0f} КБ")
+
+    deadline = time.monotonic() + args.hours * 3600.0 if args.hours else None
+    cycles = 0
+    while (deadline is None and cycles < args.cycles) or (deadline is not None and time.monotonic() < deadline):
+        soak.run_cycle(record=True)
+        cycles += 1
+        if cycles % args.report_every == 0:
+            current = soak.snapshot()
+            print(f"Круг {cycles}: Qt-объекты {current['objects'] - baseline['objects']:+d}, "
+                  f"Python {current['py_kb'] - baseline['py_kb']:+.1f} КБ, "
+                  f"RSS {current['rss_kb'] - baseline['rss_kb']:+.0f} КБ")
+
+    final = soak.snapshot()
+    print_retention(soak.retained, cycles)
+
+    print("\nНаибольший рост по строкам кода:")
+    for stat in tracemalloc.take_snapshot().compare_to(baseline_trace, 'lineno')[:10]:
+        if stat.size_diff > 0:
+            print(f"  {stat}")
+    tracemalloc.stop()
+
+    object_growth = final['objects'] - baseline['objects']
+    py_growth = final['py_kb'] - baseline['py_kb']
+    print(f"\nИтого за {cycles} кругов: Qt-объекты {object_growth:+d} (бюджет {args.object_budget}), "
+          f"Python {py_growth:+.1f} КБ (бюджет {args.budget_kb:.0f}), "
+          f"RSS {final['rss_kb'] - baseline['rss_kb']:+.0f} КБ")
+
+    soak.window.close()
+    trainer._pixmap_cache.clear()
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+    if object_growth > args.object_budget or py_growth > args.budget_kb:
+        print("❌ Рост памяти сверх бюджета")
+        return 1
+    print("✓ Рост в пределах бюджета")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+"""
+Smart Trainer Stall Watchdog - обнаружение зависаний цикла событий
+Поток интерфейса отмечается по таймеру (beat), фоновый поток следит за отметками.
+Если отметки нет дольше порога, снимается Python-стек потока интерфейса
+и вместе со временем пишется в ротируемый журнал stalls.log.
+
+Порог задается SMART_TRAINER_STALL_MS (по умолчанию 250 мс, 0 - выключено).
+Модальные окна крутят свой цикл событий, таймер в них срабатывает - это не зависание.
+"""
+import logging
+import logging.handlers
+import os
+import sys
+import threading
+import time
+import traceback
+
+DEFAULT_THRESHOLD_MS = 250
+BEAT_INTERVAL = 0.05
+RESAMPLE_INTERVAL = 1.0
+MAX_SAMPLES = 5
+LOG_MAX_BYTES = 512 * 1024
+LOG_BACKUPS = 3
+
+
+class StallWatchdog:
+    """Следит за отметками потока интерфейса и записывает стек при зависании"""
+
+    def __init__(self, threshold=DEFAULT_THRESHOLD_MS / 1000.0, log_path='stalls.log',
+                 on_stall=None, clock=time.monotonic):
+        self.threshold = threshold
+        self.clock = clock
+        self.on_stall = on_stall
+        self.last_beat = clock()
+        self.gui_thread_id = None
+        self.running = False
+        self.thread = None
+        self.stalls = 0
+
+        self.logger = logging.getLogger(f'smart_trainer.stalls.{id(self)}')
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        self.handler = logging.handlers.RotatingFileHandler(
+            log_path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding='utf-8', delay=True)
+        self.handler.setFormatter(logging.Formatter('%(asctime)s %(message)s'))
+        self.logger.addHandler(self.handler)
+
+    def beat(self):
+        """Вызывается таймером в потоке интерфейса"""
+        self.last_beat = self.clock()
+
+    def start(self):
+        """Запускается из потока интерфейса - его стек и будет сниматься"""
+        self.gui_thread_id = threading.get_ident()
+        self.last_beat = self.clock()
+        self.running = True
+        self.thread = threading.Thread(target=self.run, name="stall-watchdog", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+        self.logger.removeHandler(self.handler)
+        self.handler.close()
+
+    def capture_stack(self):
+        frame = sys._current_frames().get(self.gui_thread_id)
+        if frame is None:
+            return "  (стек недоступен)\n"
+        return ''.join(traceback.format_stack(frame))
+
+    def run(self):
+        while self.running:
+            time.sleep(BEAT_INTERVAL)
+            stalled_since = self.last_beat
+            lag = self.clock() - stalled_since
+            if lag > self.threshold + BEAT_INTERVAL:
+                self.record_stall(stalled_since)
+
+    def record_stall(self, stalled_since):
+        """Снимает стек сразу и повторно раз в секунду, пока поток не оживет"""
+        self.stalls += 1
+        samples = []
+        next_sample = self.clock()
+        while self.running and self.last_beat == stalled_since:
+            now = self.clock()
+            if now >= next_sample and len(samples) < MAX_SAMPLES:
+                samples.append((now - stalled_since, self.capture_stack()))
+                # Первый снимок пишем сразу: если процесс так и не оживет, улики останутся
+                if len(samples) == 1:
+                    self.logger.warning("Зависание: цикл событий не отвечает %.0f мс, стек:\n%s",
+                                        samples[0][0] * 1000.0, samples[0][1])
+                next_sample = now + RESAMPLE_INTERVAL
+            time.sleep(BEAT_INTERVAL / 2)
+
+        # Таймер опаздывает максимум на свой период, остальное - блокировка
+        duration = max(0.0, self.last_beat - stalled_since - BEAT_INTERVAL)
+        lines = [f"Зависание завершено: {duration * 1000.0:.0f} мс"]
+        for elapsed, stack in samples[1:]:
+            lines.append(f"Стек на {elapsed * 1000.0:.0f} мс:\n{stack}")
+        self.logger.warning("\n".join(lines))
+        if self.on_stall is not None:
+            self.on_stall(duration, samples[0][1] if samples else "")
+
+
+def create_from_env(log_path='stalls.log', on_stall=None):
+    """Создает сторожа по SMART_TRAINER_STALL_MS или возвращает None, если он выключен"""
+    try:
+        threshold_ms = float(os.environ.get('SMART_TRAINER_STALL_MS', DEFAULT_THRESHOLD_MS))
+    except ValueError:
+        threshold_ms = DEFAULT_THRESHOLD_MS
+    if threshold_ms <= 0:
+        return None
+    return StallWatchdog(threshold_ms / 1000.0, log_path, on_stall)
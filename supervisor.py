@@ -0,0 +1,272 @@
+#!/usr/bin/env python3
+"""
+Smart Trainer Supervisor - перезапуск приложения с горячим резервом
+Рядом с активным app.py держится резервный процесс (app.py --standby):
+интерпретатор запущен, PySide6 импортирован, QApplication создан, база открыта.
+Когда активный процесс падает, резерв получает команду go по stdin и сразу
+строит окно, а новый резерв запускается в фоне, когда окно уже на экране.
+Обычный выход приложения (код 0) завершает и супервизор.
+
+Процессы сообщают о себе по отдельному каналу (SMART_TRAINER_SUPERVISOR_FD):
+ready - резерв готов, shown - окно отрисовано. Число перезапусков и время
+от падения до shown пишутся в supervisor_stats.json и журнал событий.
+Каждый app.py работает в своей группе процессов: после падения группа
+добивается вместе с процессами workers.py, и только потом поднимается резерв.
+
+Запуск: python supervisor.py  или  python launcher.py --supervised
+Только Linux (pass_fds, группы процессов, сигналы). На других системах
+supervisor.py просто запускает app.py, а лаунчер не использует супервизор.
+"""
+import json
+import os
+import select
+import signal
+import subprocess
+import sys
+import time
+from collections import deque
+from datetime import datetime
+
+from event_log import log
+
+STATUS_FD_ENV = 'SMART_TRAINER_SUPERVISOR_FD'
+STATS_FILE = 'supervisor_stats.json'
+POLL_INTERVAL = 0.5
+SHOW_TIMEOUT = 30.0
+# Резерв, упавший при запуске (например, после битого обновления), повторяем не чаще
+STANDBY_RETRY_DELAY = 10.0
+# Больше MAX_RESTARTS падений за RESTART_WINDOW секунд - приложение падает по кругу
+MAX_RESTARTS = 5
+RESTART_WINDOW = 60.0
+KEEP_RECOVERIES = 50
+SUPPORTED = sys.platform.startswith('linux')
+
+
+def notify(message):
+    """Сообщает супервизору о состоянии процесса. Без супервизора ничего не делает"""
+    fd = os.environ.get(STATUS_FD_ENV)
+    if not fd:
+        return
+    try:
+        os.write(int(fd), f"{message}\n".encode())
+    except (OSError, ValueError):
+        pass
+
+
+def wait_for_activation():
+    """Резерв ждет команды go. False - супервизор закрыл канал, процесс не нужен"""
+    notify('ready')
+    return sys.stdin.readline().strip() == 'go'
+
+
+class AppProcess:
+    """Дочерний app.py в режиме резерва с каналом состояния"""
+
+    def __init__(self, script, env):
+        read_fd, write_fd = os.pipe()
+        env = dict(env)
+        env[STATUS_FD_ENV] = str(write_fd)
+        # Своя группа процессов: после падения ее можно завершить целиком (см. kill_group)
+        self.process = subprocess.Popen([sys.executable, script, '--standby'],
+                                        stdin=subprocess.PIPE, env=env, pass_fds=(write_fd,),
+                                        start_new_session=True)
+        os.close(write_fd)
+        self.status_fd = read_fd
+        self.buffer = b''
+        self.ready = False
+        self.shown = False
+
+    def alive(self):
+        return self.process.poll() is None
+
+    def read_status(self, timeout=0.0):
+        """Разбирает сообщения процесса, ждет не дольше timeout"""
+        if self.status_fd is None:
+            return
+        readable, _, _ = select.select([self.status_fd], [], [], timeout)
+        if not readable:
+            return
+        data = os.read(self.status_fd, 4096)
+        if not data:
+            # Процесс закрыл канал - он завершился
+            os.close(self.status_fd)
+            self.status_fd = None
+            return
+        *lines, self.buffer = (self.buffer + data).split(b'\n')
+        for line in lines:
+            if line == b'ready':
+                self.ready = True
+            elif line == b'shown':
+                self.shown = True
+
+    def activate(self):
+        self.process.stdin.write(b'go\n')
+        self.process.stdin.flush()
+
+    def wait_shown(self, timeout):
+        deadline = time.monotonic() + timeout
+        while not self.shown and self.status_fd is not None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            self.read_status(remaining)
+        return self.shown
+
+    def kill_group(self):
+        """Добивает оставшиеся процессы группы: workers.py и resource_tracker упавшего app.py"""
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except (ProcessLookupError, PermissionError):
+            pass
+
+    def stop(self):
+        if self.alive():
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=3.0)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+        self.kill_group()
+        self.close()
+
+    def close(self):
+        if self.status_fd is not None:
+            os.close(self.status_fd)
+            self.status_fd = None
+        try:
+            self.process.stdin.close()
+        except OSError:
+            pass
+
+
+class Supervisor:
+    """Держит активный процесс и резерв, при падении переключает окно на резерв"""
+
+    def __init__(self, app_dir):
+        self.script = os.path.join(app_dir, 'app.py')
+        self.stats_path = os.path.join(app_dir, STATS_FILE)
+        self.env = dict(os.environ)
+        self.active = None
+        self.standby = None
+        self.standby_retry_at = 0.0
+        self.crash_times = deque(maxlen=MAX_RESTARTS + 1)
+        self.stats = self.load_stats()
+
+    def load_stats(self):
+        try:
+            with open(self.stats_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {'restarts': 0, 'recoveries': []}
+
+    def save_stats(self):
+        temp_path = self.stats_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.stats, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.stats_path)
+
+    def spawn(self):
+        process = AppProcess(self.script, self.env)
+        # Метка лаунчера относится только к первому запуску (см. app.report_handoff)
+        self.env.pop('SMART_TRAINER_HANDOFF_T0', None)
+        return process
+
+    def take_over(self):
+        """Показывает окно в резерве, а если его нет - в новом процессе. Возвращает (процесс, теплый ли)"""
+        standby, self.standby = self.standby, None
+        if standby is not None:
+            standby.read_status()
+            try:
+                standby.activate()
+                return standby, standby.ready
+            except OSError:
+                # Резерв умер раньше, чем мы это заметили
+                standby.stop()
+        process = self.spawn()
+        process.activate()
+        return process, False
+
+    def check_standby(self):
+        """Следит за резервом и запускает новый, когда активное окно уже показано"""
+        if self.standby is not None:
+            self.standby.read_status()
+            if not self.standby.alive():
+                log.warning("Резервный процесс завершился", code=self.standby.process.returncode)
+                self.standby.kill_group()
+                self.standby.close()
+                self.standby = None
+                self.standby_retry_at = time.monotonic() + STANDBY_RETRY_DELAY
+        elif self.active.shown and time.monotonic() >= self.standby_retry_at:
+            self.standby = self.spawn()
+
+    def record_recovery(self, code, recovery_ms, warm):
+        self.stats['restarts'] += 1
+        self.stats['recoveries'].append({
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'exit_code': code,
+            'recovery_ms': None if recovery_ms is None else round(recovery_ms, 1),
+            'warm': warm,
+        })
+        del self.stats['recoveries'][:-KEEP_RECOVERIES]
+        try:
+            self.save_stats()
+        except OSError as e:
+            log.warning("Не удалось записать статистику супервизора", error=str(e))
+
+    def run(self):
+        self.active, _ = self.take_over()
+        try:
+            while True:
+                try:
+                    code = self.active.process.wait(timeout=POLL_INTERVAL)
+                except subprocess.TimeoutExpired:
+                    self.active.read_status()
+                    self.check_standby()
+                    continue
+
+                crashed_at = time.monotonic()
+                self.active.close()
+                # Процессы сбора и записи упавшего app.py не должны жить рядом с новыми
+                self.active.kill_group()
+                if code == 0:
+                    log.info("Приложение завершилось, супервизор останавливается")
+                    return 0
+
+                self.crash_times.append(crashed_at)
+                if len(self.crash_times) > MAX_RESTARTS and crashed_at - self.crash_times[0] < RESTART_WINDOW:
+                    log.error("Приложение падает по кругу, перезапуски прекращены",
+                              restarts=MAX_RESTARTS, window_s=RESTART_WINDOW)
+                    return 1
+
+                self.active, warm = self.take_over()
+                recovery_ms = None
+                if self.active.wait_shown(SHOW_TIMEOUT):
+                    recovery_ms = (time.monotonic() - crashed_at) * 1000.0
+                self.record_recovery(code, recovery_ms, warm)
+                log.warning("Приложение упало и перезапущено", exit_code=code, warm=warm,
+                            recovery_ms=None if recovery_ms is None else round(recovery_ms, 1),
+                            restarts=self.stats['restarts'])
+        finally:
+            # При SIGTERM гасим оба процесса, при обычном выходе активный уже завершен
+            for process in (self.active, self.standby):
+                if process is not None:
+                    process.stop()
+
+
+def main():
+    """Основная функция"""
+    log.install_crash_handlers()
+    app_dir = os.path.dirname(os.path.abspath(__file__))
+    if not SUPPORTED:
+        log.warning("Супервизор работает только в Linux, приложение запускается напрямую",
+                    platform=sys.platform)
+        return subprocess.call([sys.executable, os.path.join(app_dir, 'app.py')])
+    # systemd и лаунчер останавливают супервизор через SIGTERM - резерв гасим вместе с ним
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    supervisor = Supervisor(app_dir)
+    return supervisor.run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
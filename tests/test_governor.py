@@ -0,0 +1,68 @@
+"""Уровни нагрузки на поддельном sysfs: сценарий SIMULATION и гистерезис"""
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import governor
+from governor import WorkloadGovernor, write_fake_sysfs
+
+
+class GovernorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix='sysfs_')
+        self.addCleanup(shutil.rmtree, self.root, True)
+        write_fake_sysfs(self.root, 50.0, 1.0, 0.1)
+        self.changes = []
+        self.governor = WorkloadGovernor(sysfs_root=self.root,
+                                         on_change=lambda level, profile: self.changes.append(level))
+
+    def step(self, temperature, freq_ratio, load):
+        write_fake_sysfs(self.root, temperature, freq_ratio, load)
+        return self.governor.update()
+
+    def test_simulation_scenario(self):
+        for number, (temperature, freq_ratio, load, expected) in enumerate(governor.SIMULATION):
+            with self.subTest(step=number, temperature=temperature, freq_ratio=freq_ratio, load=load):
+                self.assertEqual(self.step(temperature, freq_ratio, load), expected)
+
+    def test_simulate_command_passes(self):
+        with contextlib.redirect_stdout(io.StringIO()):
+            self.assertTrue(governor.simulate())
+
+    def test_load_around_warm_threshold_does_not_flap(self):
+        for _ in range(5):
+            self.step(50.0, 1.0, 0.81)
+            self.step(50.0, 1.0, 0.75)
+        self.assertEqual(self.changes, ['warm'])
+
+    def test_load_around_hot_threshold_does_not_flap(self):
+        for _ in range(5):
+            self.step(50.0, 1.0, 1.55)
+            self.step(50.0, 1.0, 1.45)
+        self.assertEqual(self.changes, ['hot'])
+
+    def test_temperature_around_warm_threshold_does_not_flap(self):
+        for _ in range(5):
+            self.step(65.5, 1.0, 0.1)
+            self.step(64.0, 1.0, 0.1)
+        self.assertEqual(self.changes, ['warm'])
+
+    def test_throttling_without_load_is_power_saving(self):
+        self.assertEqual(self.step(50.0, 0.4, 0.1), 'normal')
+        self.assertEqual(self.changes, [])
+
+    def test_missing_sensors_stay_normal(self):
+        empty = tempfile.mkdtemp(prefix='sysfs_empty_')
+        self.addCleanup(shutil.rmtree, empty, True)
+        self.assertEqual(WorkloadGovernor(sysfs_root=empty).update(), 'normal')
+
+
+if __name__ == '__main__':
+    unittest.main()
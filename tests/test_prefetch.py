@@ -0,0 +1,92 @@
+"""Предзагрузка профиля при входе: учет попаданий, картинки отдельно, размер кэша"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ['SMART_TRAINER_HEADLESS'] = '1'
+
+import app
+
+
+class MemberPrefetcherTest(unittest.TestCase):
+    """Фоновый поток не запускается: результат предзагрузки подается вызовом arrive()"""
+
+    def setUp(self):
+        self.dir = tempfile.mkdtemp(prefix='prefetch_')
+        self.addCleanup(shutil.rmtree, self.dir, True)
+        self.db = app.UserDatabase(os.path.join(self.dir, 'users.db'))
+        self.addCleanup(self.db.conn.close)
+        self.prefetcher = app.MemberPrefetcher(self.db, [], self.dir)
+        self.addCleanup(self.prefetcher.shutdown)
+        self.prefetcher.enabled = False
+        self.prefetcher.prefetch_images = False
+
+    def login(self, user_id):
+        self.prefetcher.prefetch(user_id)
+
+    def arrive(self, user_id):
+        """Результат предзагрузки текущего входа дошел до потока интерфейса"""
+        self.prefetcher.load_in_background(user_id, self.prefetcher.generation)
+
+    def counts(self):
+        return self.prefetcher.hits, self.prefetcher.misses
+
+    def test_prefetch_before_first_use_is_hit(self):
+        self.login(1)
+        self.arrive(1)
+        self.prefetcher.profile(1)
+        self.assertEqual(self.counts(), (1, 0))
+
+    def test_only_first_use_per_login_is_counted(self):
+        self.login(1)
+        self.arrive(1)
+        for _ in range(3):
+            self.prefetcher.profile(1)
+        self.assertEqual(self.counts(), (1, 0))
+
+    def test_use_before_prefetch_arrives_is_miss(self):
+        self.login(1)
+        profile = self.prefetcher.profile(1)
+        self.assertEqual(self.counts(), (0, 1))
+        self.assertIn('recent', profile)
+        # Опоздавший результат не засчитывается задним числом
+        self.arrive(1)
+        self.prefetcher.profile(1)
+        self.assertEqual(self.counts(), (0, 1))
+
+    def test_profile_left_from_earlier_login_is_miss(self):
+        self.login(1)
+        self.arrive(1)
+        self.prefetcher.profile(1)
+        self.login(2)
+        self.login(1)
+        self.prefetcher.profile(1)
+        self.assertEqual(self.counts(), (1, 1))
+
+    def test_refresh_after_save_is_not_counted(self):
+        self.login(1)
+        self.arrive(1)
+        self.prefetcher.profile(1)
+        self.prefetcher.refresh(1)
+        self.prefetcher.profile(1)
+        self.assertEqual(self.counts(), (1, 0))
+
+    def test_images_are_counted_separately(self):
+        self.assertIsNone(self.prefetcher.workout_pixmap('missing.png'))
+        self.assertEqual(self.counts(), (0, 0))
+        self.assertEqual((self.prefetcher.image_hits, self.prefetcher.image_misses), (0, 1))
+
+    def test_profiles_are_bounded(self):
+        for user_id in range(1, app.PREFETCH_PROFILES + 11):
+            self.login(user_id)
+            self.arrive(user_id)
+        self.assertEqual(len(self.prefetcher.profiles), app.PREFETCH_PROFILES)
+        self.assertNotIn(1, self.prefetcher.profiles)
+        self.assertIn(app.PREFETCH_PROFILES + 10, self.prefetcher.profiles)
+
+
+if __name__ == '__main__':
+    unittest.main()
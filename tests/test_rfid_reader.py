@@ -0,0 +1,124 @@
+"""Сборка номера карты: частичные чтения, шум, Enter, повторные касания"""
+import os
+import queue
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rfid_reader
+from rfid_reader import CardFramer, FakeRfidDevice
+
+CARD = '0123456789'
+OTHER_CARD = '9876543210'
+
+
+class FakeClock:
+    """Ручные часы вместо time.monotonic"""
+
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+    def advance(self, seconds):
+        self.now += seconds
+
+
+class CardFramerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cards = []
+        self.framer = CardFramer(self.cards.append, clock=self.clock)
+
+    def feed(self, text, gap=0.01):
+        """Подает символы по одному с заданной паузой между ними"""
+        for char in text:
+            self.framer.feed(char)
+            self.clock.advance(gap)
+
+    def test_partial_reads_assemble_one_card(self):
+        self.framer.feed(CARD[:3])
+        self.clock.advance(0.1)
+        self.framer.feed(CARD[3:7])
+        self.clock.advance(0.1)
+        self.framer.feed(CARD[7:])
+        self.assertEqual(self.cards, [CARD])
+
+    def test_pause_between_chars_starts_new_card(self):
+        self.feed('12345')
+        self.clock.advance(1.0)
+        self.feed(CARD)
+        self.assertEqual(self.cards, [CARD])
+
+    def test_noise_is_ignored(self):
+        self.framer.feed('\x02' + CARD[:5] + 'ab- ' + CARD[5:] + '\x00')
+        self.assertEqual(self.cards, [CARD])
+
+    def test_enter_terminated_frame_emits_once(self):
+        for terminator in ('\n', '\r\n', '\x03'):
+            with self.subTest(terminator=repr(terminator)):
+                self.cards.clear()
+                self.clock.advance(10.0)
+                self.framer.feed(CARD + terminator)
+                self.assertEqual(self.cards, [CARD])
+
+    def test_short_frame_before_enter_is_dropped(self):
+        self.framer.feed('12345\n')
+        self.framer.feed(CARD + '\n')
+        self.assertEqual(self.cards, [CARD])
+
+    def test_duplicate_tap_within_debounce_is_suppressed(self):
+        self.framer.feed(CARD + '\n')
+        self.clock.advance(0.5)
+        self.framer.feed(CARD + '\n')
+        self.assertEqual(self.cards, [CARD])
+
+    def test_held_card_keeps_being_suppressed(self):
+        # Карта лежит на считывателе: каждое повторное чтение продлевает отсечку
+        for _ in range(5):
+            self.framer.feed(CARD + '\n')
+            self.clock.advance(1.0)
+        self.assertEqual(self.cards, [CARD])
+
+    def test_same_card_after_debounce_is_emitted(self):
+        self.framer.feed(CARD + '\n')
+        self.clock.advance(2.0)
+        self.framer.feed(CARD + '\n')
+        self.assertEqual(self.cards, [CARD, CARD])
+
+    def test_other_card_is_not_debounced(self):
+        self.framer.feed(CARD + '\n')
+        self.clock.advance(0.1)
+        self.framer.feed(OTHER_CARD + '\n')
+        self.assertEqual(self.cards, [CARD, OTHER_CARD])
+
+
+class FakeRfidDeviceTest(unittest.TestCase):
+
+    def test_read_returns_tapped_frame(self):
+        device = FakeRfidDevice()
+        self.assertEqual(device.read(0.01), '')
+        device.tap(CARD)
+        self.assertEqual(device.read(0.01), CARD + '\n')
+
+    def test_service_delivers_tapped_cards(self):
+        cards = queue.Queue()
+        service = rfid_reader.create_reader_from_env(cards.put, spec='fake')
+        service.start()
+        self.addCleanup(service.stop)
+
+        service.device.tap(CARD)
+        service.device.tap(OTHER_CARD)
+        self.assertEqual(cards.get(timeout=2.0), CARD)
+        self.assertEqual(cards.get(timeout=2.0), OTHER_CARD)
+
+    def test_unknown_spec_falls_back_to_keyboard(self):
+        self.assertIsNone(rfid_reader.create_reader_from_env(print, spec=''))
+        self.assertIsNone(rfid_reader.create_reader_from_env(print, spec='bluetooth:hci0'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,186 @@
+"""Обновление по манифесту: докачка, проверка хэша, пути и диапазоны"""
+import hashlib
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import lan_cache
+import updater
+
+BIG_SIZE = 400 * 1024
+
+
+class ReleaseServerTest(unittest.TestCase):
+    """Релиз раздается локальным updater.make_release_server, киоск - временная папка"""
+
+    def setUp(self):
+        self.release_dir = tempfile.mkdtemp(prefix='release_')
+        self.app_dir = tempfile.mkdtemp(prefix='kiosk_')
+        self.addCleanup(shutil.rmtree, self.release_dir, True)
+        self.addCleanup(shutil.rmtree, self.app_dir, True)
+
+        self.big = os.urandom(BIG_SIZE)
+        self.write_release('images/big.png', self.big)
+        self.write_release('app.py', b"print('2.0')\n")
+        self.write_release('data/.gitkeep', b'')
+        with open(os.path.join(self.app_dir, 'version.txt'), 'w') as f:
+            f.write('1.0')
+
+        self.server = updater.make_release_server(self.release_dir, 0, host='127.0.0.1')
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.base_url = f"http://127.0.0.1:{self.server.server_port}"
+
+        # Зеркало в сети не ищем
+        env = mock.patch.dict(os.environ, {'SMART_TRAINER_LAN_CACHE': 'off'})
+        env.start()
+        self.addCleanup(env.stop)
+        self.messages = []
+
+    def write_release(self, rel_path, content):
+        path = os.path.join(self.release_dir, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(content)
+
+    def publish_manifest(self, files=None, version='2.0'):
+        if files is None:
+            files = {}
+            for rel_path in ('app.py', 'images/big.png', 'data/.gitkeep'):
+                path = os.path.join(self.release_dir, rel_path)
+                files[rel_path] = {'sha256': updater.sha256_file(path), 'size': os.path.getsize(path)}
+        manifest = {'version': version, 'files': files}
+        self.write_release(updater.MANIFEST_FILE, json.dumps(manifest).encode('utf-8'))
+        return manifest
+
+    def make_updater(self):
+        return updater.StagedUpdater(self.app_dir, base_url=self.base_url, log=self.messages.append)
+
+    def test_resumes_interrupted_download(self):
+        manifest = self.publish_manifest()
+        kiosk = self.make_updater()
+        # Прерванная попытка: staging той же версии и треть файла в .part
+        kiosk.prepare_staging('2.0')
+        part = os.path.join(kiosk.staging_dir, 'images', 'big.png.part')
+        os.makedirs(os.path.dirname(part))
+        offset = BIG_SIZE // 3
+        with open(part, 'wb') as f:
+            f.write(self.big[:offset])
+
+        ok, message = kiosk.check_and_stage()
+
+        self.assertTrue(ok, message)
+        self.assertEqual(kiosk.staged_version(), '2.0')
+        # Повторно скачан только хвост, а не весь файл
+        self.assertLess(kiosk.bytes_received, BIG_SIZE - offset + 4096)
+        self.assertEqual(kiosk.apply_staged(), '2.0')
+        self.assertEqual(updater.sha256_file(os.path.join(self.app_dir, 'images', 'big.png')),
+                         manifest['files']['images/big.png']['sha256'])
+        # Файл нулевого размера тоже доставлен
+        self.assertEqual(os.path.getsize(os.path.join(self.app_dir, 'data', '.gitkeep')), 0)
+
+    def test_hash_mismatch_is_rejected(self):
+        manifest = self.publish_manifest()
+        manifest['files']['images/big.png']['sha256'] = hashlib.sha256(b'other').hexdigest()
+        self.publish_manifest(manifest['files'])
+        kiosk = self.make_updater()
+
+        ok, message = kiosk.check_and_stage()
+
+        self.assertFalse(ok)
+        self.assertIn('хэш не совпадает', message)
+        self.assertIsNone(kiosk.staged_version())
+        self.assertFalse(os.path.exists(os.path.join(kiosk.staging_dir, 'images', 'big.png')))
+        self.assertFalse(os.path.exists(os.path.join(kiosk.staging_dir, 'images', 'big.png.part')))
+
+    def test_manifest_with_path_outside_app_is_rejected(self):
+        digest = updater.sha256_file(os.path.join(self.release_dir, 'app.py'))
+        for rel_path in ('../escaped.py', '/tmp/escaped.py', 'images/../../escaped.py'):
+            self.publish_manifest({rel_path: {'sha256': digest, 'size': 13}})
+            kiosk = self.make_updater()
+
+            ok, message = kiosk.check_and_stage()
+
+            self.assertFalse(ok, rel_path)
+            self.assertIn('Манифест отклонен', message)
+            self.assertFalse(os.path.exists(os.path.join(os.path.dirname(self.app_dir), 'escaped.py')))
+
+    def test_apply_staged_skips_unsafe_paths(self):
+        kiosk = self.make_updater()
+        os.makedirs(kiosk.staging_dir)
+        with open(kiosk.ready_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': '2.0', 'files': ['../escaped.py']}, f)
+
+        self.assertEqual(kiosk.apply_staged(), '2.0')
+        self.assertFalse(os.path.exists(os.path.join(os.path.dirname(self.app_dir), 'escaped.py')))
+
+    def test_unsupported_range_returns_416(self):
+        url = f"{self.base_url}/images/big.png"
+        for header in ('bytes=-100', 'bytes=abc-', 'bytes=0-1,5-6', f'bytes={BIG_SIZE}-'):
+            response = requests.get(url, headers={'Range': header}, timeout=5)
+            self.assertEqual(response.status_code, 416, header)
+        response = requests.get(url, headers={'Range': 'bytes=100-'}, timeout=5)
+        self.assertEqual(response.status_code, 206)
+        self.assertEqual(response.content, self.big[100:])
+
+
+class FreshProcessTest(unittest.TestCase):
+    """Когда лаунчер не может запустить установленную версию в своем процессе"""
+
+    def apply(self, files):
+        app_dir = tempfile.mkdtemp(prefix='kiosk_')
+        self.addCleanup(shutil.rmtree, app_dir, True)
+        kiosk = updater.StagedUpdater(app_dir, log=lambda message: None)
+        os.makedirs(kiosk.staging_dir)
+        with open(kiosk.ready_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': '2.0', 'files': files}, f)
+        with mock.patch.object(kiosk, 'precompile'):
+            kiosk.apply_staged()
+        return kiosk
+
+    def test_app_and_new_modules_run_in_process(self):
+        kiosk = self.apply(['app.py', 'brand_new_module.py', 'images/logo.png'])
+        # Лаунчер импортирует app только при запуске приложения
+        with mock.patch.dict(sys.modules):
+            sys.modules.pop('app', None)
+            self.assertFalse(kiosk.needs_fresh_process())
+
+    def test_already_imported_module_needs_fresh_process(self):
+        # lan_cache импортирован лаунчером через updater - в процессе осталась бы старая версия
+        self.assertTrue(self.apply(['app.py', 'lan_cache.py']).needs_fresh_process())
+
+    def test_new_requirements_need_fresh_process(self):
+        self.assertTrue(self.apply(['requirements.txt']).needs_fresh_process())
+
+
+class SafePathTest(unittest.TestCase):
+
+    def test_paths_inside_directory(self):
+        base = os.path.abspath('base')
+        self.assertEqual(updater.safe_path(base, 'app.py'), os.path.join(base, 'app.py'))
+        self.assertEqual(updater.safe_path(base, 'images/../app.py'), os.path.join(base, 'app.py'))
+
+    def test_paths_outside_directory(self):
+        for rel_path in ('', '.', '..', '../x', 'a/../../x', '/etc/passwd', None):
+            with self.assertRaises(ValueError, msg=rel_path):
+                updater.safe_path('base', rel_path)
+
+    def test_range_start(self):
+        self.assertEqual(lan_cache.range_start('bytes=10-'), 10)
+        self.assertEqual(lan_cache.range_start('bytes=10-20'), 10)
+        for header in ('bytes=-10', 'bytes=', 'items=1-', 'bytes=1-2,4-5', 'bytes=²-'):
+            self.assertIsNone(lan_cache.range_start(header), header)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,143 @@
+"""Процессы сбора и записи: повторная запись после падения, выход вместе с родителем"""
+import os
+import signal
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import shutil
+import time
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import workers
+
+# Родитель, похожий на app.py: баннер при импорте __main__ и дочерние процессы
+PARENT_SCRIPT = """
+import sys, time
+sys.path.insert(0, {root!r})
+print('banner', flush=True)
+import workers
+supervisor = workers.WorkerSupervisor({db!r})
+supervisor.start()
+print(' '.join(str(p.pid) for p in supervisor.processes.values()), flush=True)
+time.sleep(60)
+"""
+
+
+def create_database(path):
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE workouts (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER,
+            exercise_name TEXT NOT NULL, repetitions INTEGER, intensity REAL, duration INTEGER)
+    ''')
+    conn.commit()
+    return conn
+
+
+def wait_for(condition, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if condition():
+            return True
+        time.sleep(0.05)
+    return False
+
+
+def pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    # Зомби уже завершился, его просто никто не дождался
+    with open(f'/proc/{pid}/stat') as f:
+        return f.read().split(')')[-1].split()[0] != 'Z'
+
+
+class SharedSampleRingTest(unittest.TestCase):
+
+    def setUp(self):
+        self.ring = workers.SharedSampleRing.create(capacity=4)
+        self.addCleanup(self.ring.close)
+
+    def append(self, values):
+        for value in values:
+            self.ring.append(float(value), float(value), float(value))
+
+    def test_read_since_returns_new_records(self):
+        self.append(range(3))
+        self.assertEqual(self.ring.read_since(1), (3, [(1.0, 1.0, 1.0), (2.0, 2.0, 2.0)]))
+
+    def test_lapped_ring_skips_slot_being_written(self):
+        self.append(range(8))
+        # Писатель начал отсчет 8: сила в ячейке отсчета 4 уже новая, остальное и номер - еще нет
+        self.ring.data[0] = 8.0
+
+        next_index, records = self.ring.read_since(0)
+
+        self.assertEqual(next_index, 8)
+        self.assertEqual([record[0] for record in records], [5.0, 6.0, 7.0])
+        for force, position, timestamp in records:
+            self.assertEqual(force, position)
+            self.assertEqual(force, timestamp)
+
+
+class WorkerSupervisorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.work_dir = tempfile.mkdtemp(prefix='smart_trainer_workers_')
+        self.addCleanup(shutil.rmtree, self.work_dir, True)
+        self.db_path = os.path.join(self.work_dir, 'users.db')
+        self.conn = create_database(self.db_path)
+        self.addCleanup(self.conn.close)
+
+    def test_rows_survive_persistence_crash(self):
+        supervisor = workers.WorkerSupervisor(self.db_path)
+        supervisor.start()
+        self.addCleanup(supervisor.stop)
+        saved = []
+        supervisor.on_saved = saved.append
+
+        # База заблокирована: процесс записи заберет строки из очереди и будет ждать
+        lock = sqlite3.connect(self.db_path, isolation_level=None)
+        lock.execute('BEGIN EXCLUSIVE')
+        for user_id in range(5):
+            supervisor.save_workout(user_id, "Жим", 10, 50.0, 30)
+        time.sleep(0.5)
+        os.kill(supervisor.processes['persistence'].pid, signal.SIGKILL)
+        lock.execute('ROLLBACK')
+        lock.close()
+
+        def all_saved():
+            supervisor.poll()
+            return len(saved) == 5
+        self.assertTrue(wait_for(all_saved, 15.0))
+        self.assertEqual(sorted(saved), list(range(5)))
+        self.assertEqual(supervisor.restarts['persistence'], 1)
+        count = self.conn.execute('SELECT COUNT(*) FROM workouts').fetchone()[0]
+        self.assertEqual(count, 5)
+
+    @unittest.skipUnless(sys.platform.startswith('linux'), "проверка через /proc")
+    def test_workers_exit_with_parent_and_skip_parent_main(self):
+        script = os.path.join(self.work_dir, 'parent.py')
+        with open(script, 'w', encoding='utf-8') as f:
+            f.write(PARENT_SCRIPT.format(root=ROOT, db=self.db_path))
+        env = dict(os.environ, SMART_TRAINER_LOG_CONSOLE='0', SMART_TRAINER_LOG_DIR=self.work_dir)
+        parent = subprocess.Popen([sys.executable, script], stdout=subprocess.PIPE, text=True, env=env)
+        self.addCleanup(parent.stdout.close)
+        self.assertEqual(parent.stdout.readline().strip(), 'banner')
+        child_pids = [int(pid) for pid in parent.stdout.readline().split()]
+        self.assertEqual(len(child_pids), 2)
+
+        # Дочерние процессы не выполняют __main__ родителя - второго баннера нет
+        time.sleep(1.0)
+        parent.kill()
+        parent.wait()
+        self.assertEqual(parent.stdout.read().strip(), '')
+        self.assertTrue(wait_for(lambda: not any(pid_alive(pid) for pid in child_pids), 5.0))
+
+
+if __name__ == '__main__':
+    unittest.main()
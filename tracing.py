@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Smart Trainer Tracing - трассировка интервалов (span) с экспортом в Chrome trace
+Файл открывается в chrome://tracing или https://ui.perfetto.dev
+
+Экспорт включается переменной SMART_TRAINER_TRACE=/путь/к/trace.json
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+
+
+class Span:
+    """Открытый интервал, закрывается вызовом end() или выходом из with"""
+    __slots__ = ('tracer', 'name', 'cat', 'start', 'args', 'tid', 'closed')
+
+    def __init__(self, tracer, name, cat, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+        self.tid = threading.get_ident()
+        self.closed = False
+        self.start = time.perf_counter()
+
+    def end(self, **args):
+        if self.closed:
+            return
+        self.closed = True
+        if args:
+            self.args = dict(self.args or {}, **args)
+        self.tracer.complete(self.name, self.start, time.perf_counter(), self.cat, self.args, self.tid)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end()
+        return False
+
+
+class Tracer:
+    """Хранит последние события в кольцевом буфере"""
+
+    def __init__(self, max_events=20000, enabled=True):
+        self.enabled = enabled
+        self.events = deque(maxlen=max_events)
+        self.pid = os.getpid()
+        self.t0 = time.perf_counter()
+
+    def begin(self, name, cat='app', **args):
+        return Span(self, name, cat, args or None)
+
+    def span(self, name, cat='app', **args):
+        return Span(self, name, cat, args or None)
+
+    def complete(self, name, start, end, cat='app', args=None, tid=None):
+        if not self.enabled:
+            return
+        event = {
+            'name': name,
+            'cat': cat,
+            'ph': 'X',
+            'ts': (start - self.t0) * 1e6,
+            'dur': (end - start) * 1e6,
+            'pid': self.pid,
+            'tid': tid if tid is not None else threading.get_ident(),
+        }
+        if args:
+            event['args'] = args
+        self.events.append(event)
+
+    def instant(self, name, cat='app', **args):
+        if not self.enabled:
+            return
+        event = {
+            'name': name,
+            'cat': cat,
+            'ph': 'i',
+            's': 't',
+            'ts': (time.perf_counter() - self.t0) * 1e6,
+            'pid': self.pid,
+            'tid': threading.get_ident(),
+        }
+        if args:
+            event['args'] = args
+        self.events.append(event)
+
+    def summary(self, cat=None):
+        """Суммарная длительность по именам интервалов, мс"""
+        totals = {}
+        for event in list(self.events):
+            if event['ph'] != 'X' or (cat and event['cat'] != cat):
+                continue
+            totals[event['name']] = totals.get(event['name'], 0.0) + event['dur'] / 1000.0
+        return totals
+
+    def export_chrome(self, path):
+        """Записывает события в формате Chrome trace-event JSON"""
+        data = {'traceEvents': list(self.events), 'displayTimeUnit': 'ms'}
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+
+tracer = Tracer()
@@ -0,0 +1,736 @@
+#!/usr/bin/env python3
+"""
+Smart Trainer Updater - фоновое обновление с подготовкой в staging
+Новая версия скачивается и проверяется, пока приложение уже работает,
+а подменяется атомарно при следующем запуске лаунчера.
+
+Релиз описывается файлом manifest.json с SHA-256 каждого файла,
+скачиваются только изменившиеся файлы (с докачкой через HTTP Range).
+
+Сборка манифеста:     python updater.py manifest
+Локальный "GitHub":   python updater.py serve <папка релиза> [--port 8000]
+                      SMART_TRAINER_UPDATE_URL=http://127.0.0.1:8000 python launcher.py
+Зеркало в сети клуба: python lan_cache.py serve
+                      SMART_TRAINER_LAN_CACHE=http://host:8787 (или auto) на киосках
+Колеса зависимостей:  python updater.py wheelhouse [--out wheelhouse]
+                      Зависимости ставятся только из них (SMART_TRAINER_WHEELHOUSE -
+                      папка или адрес updater.py serve) и только при смене requirements.txt
+"""
+import compileall
+import fnmatch
+import hashlib
+import json
+import os
+import shutil
+import sys
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import quote
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import event_log
+import lan_cache
+
+# Адрес можно переопределить, например локальным сервером для проверки
+REPO_RAW_URL = os.environ.get('SMART_TRAINER_UPDATE_URL',
+                              "https://raw.githubusercontent.com/DenisASUTP/OP_4/main")
+# Список файлов для релизов без манифеста
+UPDATE_FILES = ['app.py', 'rfid_reader.py', 'tracing.py', 'metrics.py', 'stall_watchdog.py',
+                'sensor.py', 'workers.py', 'event_log.py', 'workout_journal.py',
+                'supervisor.py', 'realtime.py', 'governor.py',
+                'requirements.txt']
+# Что входит в релиз при сборке манифеста
+RELEASE_PATTERNS = ['*.py', 'requirements.txt', 'images/*']
+RELEASE_EXCLUDE = ['setup.py', 'bench_*.py', 'soak_test.py', '1c_test.py', 'testdisp.py']
+
+MANIFEST_FILE = "manifest.json"
+STAGING_DIR = "staging"
+READY_FILE = "READY.json"
+TARGET_FILE = "TARGET.json"
+HASH_INDEX_FILE = ".file_hashes.json"
+HTTP_CACHE_FILE = ".http_cache.json"
+# Хэш requirements.txt, с которым зависимости последний раз поставлены успешно
+REQUIREMENTS_HASH_FILE = ".requirements.sha256"
+# Заранее собранные колеса: папка или адрес в локальной сети (updater.py serve)
+WHEELHOUSE = os.environ.get('SMART_TRAINER_WHEELHOUSE', 'wheelhouse')
+PIP_TIMEOUT = 600
+CHUNK_SIZE = 64 * 1024
+MAX_PARALLEL_DOWNLOADS = 3
+
+
+def read_version(path):
+    """Читает версию из файла, пробуя несколько кодировок"""
+    if not os.path.exists(path):
+        return None
+    for encoding in ['utf-8', 'utf-16', 'cp1251', 'cp1252', 'latin-1']:
+        try:
+            with open(path, 'r', encoding=encoding) as f:
+                content = f.read().strip()
+                if content:
+                    return content
+        except Exception:
+            continue
+    return None
+
+
+def sha256_file(path):
+    """SHA-256 файла, читается блоками"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def verify_file(filename, content):
+    """Проверяет скачанный файл до того, как он попадет в staging"""
+    if not content:
+        return "пустой файл"
+    if filename.endswith('.py'):
+        try:
+            compile(content, filename, 'exec')
+        except SyntaxError as e:
+            return f"синтаксическая ошибка: {e}"
+    return None
+
+
+def safe_path(base_dir, rel_path):
+    """Путь к rel_path внутри base_dir. Пути из манифеста приходят по сети:
+    абсолютный путь или выход наружу через '..' - ValueError"""
+    if not isinstance(rel_path, str) or not rel_path or os.path.isabs(rel_path):
+        raise ValueError(f"недопустимый путь: {rel_path!r}")
+    normalized = os.path.normpath(rel_path)
+    if normalized == os.curdir or normalized == os.pardir or normalized.startswith(os.pardir + os.sep):
+        raise ValueError(f"недопустимый путь: {rel_path!r}")
+    base = os.path.abspath(base_dir)
+    path = os.path.abspath(os.path.join(base, normalized))
+    if os.path.commonpath([base, path]) != base:
+        raise ValueError(f"недопустимый путь: {rel_path!r}")
+    return path
+
+
+def manifest_problem(manifest):
+    """Что не так с манифестом или None. Проверяется до любых обращений к файлам"""
+    if not isinstance(manifest, dict) or not isinstance(manifest.get('version'), str):
+        return "нет версии"
+    files = manifest.get('files')
+    if not isinstance(files, dict):
+        return "нет списка файлов"
+    for rel_path, info in files.items():
+        try:
+            safe_path('.', rel_path)
+        except ValueError as e:
+            return str(e)
+        if not isinstance(info, dict) or not lan_cache.SHA256_RE.match(str(info.get('sha256'))):
+            return f"{rel_path}: неверный хэш"
+        if not isinstance(info.get('size'), int) or info['size'] < 0:
+            return f"{rel_path}: неверный размер"
+    return None
+
+
+def release_files(app_dir):
+    """Файлы релиза по RELEASE_PATTERNS, пути через '/'"""
+    result = []
+    for root, dirs, files in os.walk(app_dir):
+        dirs[:] = [d for d in dirs if not d.startswith('.') and d not in (STAGING_DIR, '__pycache__')]
+        for name in files:
+            rel_path = os.path.relpath(os.path.join(root, name), app_dir).replace(os.sep, '/')
+            if any(fnmatch.fnmatch(rel_path, p) for p in RELEASE_EXCLUDE):
+                continue
+            if any(fnmatch.fnmatch(rel_path, p) and rel_path.count('/') == p.count('/')
+                   for p in RELEASE_PATTERNS):
+                result.append(rel_path)
+    return sorted(result)
+
+
+def build_manifest(app_dir, version):
+    """Собирает манифест релиза: версия и SHA-256 с размером каждого файла"""
+    files = {}
+    for rel_path in release_files(app_dir):
+        full_path = os.path.join(app_dir, rel_path)
+        files[rel_path] = {'sha256': sha256_file(full_path), 'size': os.path.getsize(full_path)}
+    return {'version': version, 'files': files}
+
+
+class LocalHashIndex:
+    """Кэш хэшей локальных файлов: пересчет только при смене размера или mtime"""
+
+    def __init__(self, app_dir):
+        self.app_dir = app_dir
+        self.path = os.path.join(app_dir, HASH_INDEX_FILE)
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def hash_of(self, rel_path):
+        full_path = os.path.join(self.app_dir, rel_path)
+        try:
+            stat = os.stat(full_path)
+        except OSError:
+            return None
+        entry = self.entries.get(rel_path)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            return entry['sha256']
+        digest = sha256_file(full_path)
+        self.entries[rel_path] = {'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': digest}
+        return digest
+
+    def save(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f)
+        os.replace(tmp_path, self.path)
+
+
+class HttpCache:
+    """ETag и Last-Modified небольших файлов (версия, манифест) вместе с телом"""
+
+    def __init__(self, app_dir):
+        self.path = os.path.join(app_dir, HTTP_CACHE_FILE)
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def headers_for(self, url):
+        entry = self.entries.get(url)
+        headers = {}
+        if entry:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def body(self, url):
+        entry = self.entries.get(url)
+        return entry['body'] if entry else None
+
+    def store(self, url, response):
+        etag = response.headers.get('ETag')
+        last_modified = response.headers.get('Last-Modified')
+        if not etag and not last_modified:
+            return
+        self.entries[url] = {'etag': etag, 'last_modified': last_modified, 'body': response.text}
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(self.entries, f, ensure_ascii=False)
+        os.replace(tmp_path, self.path)
+
+
+class StagedUpdater:
+    """Проверка, скачивание и атомарная подмена версии"""
+
+    def __init__(self, app_dir, base_url=REPO_RAW_URL, log=event_log.log.info):
+        self.app_dir = app_dir
+        self.base_url = base_url
+        self.log = log
+        self.staging_dir = os.path.join(app_dir, STAGING_DIR)
+        self.ready_path = os.path.join(self.staging_dir, READY_FILE)
+        self.target_path = os.path.join(self.staging_dir, TARGET_FILE)
+        self.cancelled = False
+        self.applied_files = []
+        # Кэширующее зеркало в локальной сети (lan_cache.py), ищется при проверке
+        self.mirror = None
+
+        # Одна сессия на все запросы: соединение (и TLS) переиспользуется
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_PARALLEL_DOWNLOADS)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.http_cache = HttpCache(app_dir)
+
+        self.stats_lock = threading.Lock()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.bytes_received = 0
+        self.requests_made = 0
+        self.not_modified = 0
+
+    def count_request(self, received=0, not_modified=False):
+        with self.stats_lock:
+            self.requests_made += 1
+            self.bytes_received += received
+            if not_modified:
+                self.not_modified += 1
+
+    def count_bytes(self, received):
+        with self.stats_lock:
+            self.bytes_received += received
+
+    def fetch_text(self, filename, timeout=10):
+        """Условный GET с origin. Версия и манифест у зеркала не запрашиваются:
+        зеркало не аутентифицировано, а манифест задает хэши всех остальных файлов"""
+        return self.fetch_text_from(self.url(filename), timeout)
+
+    def fetch_text_from(self, url, timeout):
+        """Условный GET: при 304 используется сохраненное тело"""
+        response = self.session.get(url, headers=self.http_cache.headers_for(url), timeout=timeout)
+        if response.status_code == 304:
+            self.count_request(not_modified=True)
+            return self.http_cache.body(url)
+        self.count_request(len(response.content))
+        if response.status_code != 200:
+            return None
+        self.http_cache.store(url, response)
+        return response.text
+
+    def path(self, filename):
+        return os.path.join(self.app_dir, filename)
+
+    def url(self, filename):
+        return f"{self.base_url}/{quote(filename)}"
+
+    def current_version(self):
+        return read_version(self.path("version.txt"))
+
+    def staged_version(self):
+        """Версия, уже подготовленная к установке, или None"""
+        if not os.path.exists(self.ready_path):
+            return None
+        try:
+            with open(self.ready_path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('version')
+        except (OSError, ValueError):
+            return None
+
+    def apply_staged(self):
+        """Подменяет файлы подготовленной версией. Вызывается при старте, до запуска приложения"""
+        if not os.path.exists(self.ready_path):
+            return None
+        try:
+            with open(self.ready_path, 'r', encoding='utf-8') as f:
+                ready = json.load(f)
+        except (OSError, ValueError):
+            # Подготовка не была завершена - начинаем заново
+            shutil.rmtree(self.staging_dir, ignore_errors=True)
+            return None
+
+        # Каждая подмена атомарна. Если питание пропадет посередине,
+        # READY останется и оставшиеся файлы будут подменены при следующем старте
+        self.applied_files = list(ready['files'])
+        for filename in ready['files']:
+            try:
+                staged = safe_path(self.staging_dir, filename)
+                target = safe_path(self.app_dir, filename)
+            except ValueError as e:
+                self.log(f"Файл пропущен: {e}")
+                continue
+            if os.path.exists(staged):
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(staged, target)
+
+        if 'manifest' in ready:
+            manifest_tmp = self.path(MANIFEST_FILE + '.tmp')
+            with open(manifest_tmp, 'w', encoding='utf-8') as f:
+                json.dump(ready['manifest'], f, ensure_ascii=False, indent=1)
+            os.replace(manifest_tmp, self.path(MANIFEST_FILE))
+
+        version_tmp = self.path("version.txt.tmp")
+        with open(version_tmp, 'w', encoding='utf-8') as f:
+            f.write(ready['version'])
+        os.replace(version_tmp, self.path("version.txt"))
+
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
+        self.log(f"Установлена подготовленная версия {ready['version']}")
+        self.precompile()
+        return ready['version']
+
+    def precompile(self):
+        """Компилирует исходники в __pycache__, чтобы первый запуск не тратил на это время.
+        py_compile пишет .pyc через временный файл и os.replace, актуальные файлы пропускаются"""
+        start = time.perf_counter()
+        failed = []
+        sources = [f for f in release_files(self.app_dir) if f.endswith('.py')]
+        for filename in sources:
+            if not compileall.compile_file(self.path(filename), quiet=2):
+                failed.append(filename)
+        elapsed = (time.perf_counter() - start) * 1000.0
+        if failed:
+            self.log(f"Не удалось скомпилировать: {', '.join(failed)}")
+        self.log(f"Байт-код подготовлен: {len(sources) - len(failed)} файлов за {elapsed:.0f} мс")
+        return not failed
+
+    def dependencies_changed(self):
+        """Установленная версия принесла новые зависимости"""
+        return 'requirements.txt' in self.applied_files
+
+    def needs_fresh_process(self):
+        """Установленную версию нельзя запускать в этом процессе: новые зависимости
+        подхватит только свежий интерпретатор, а модули, которые лаунчер уже импортировал
+        (event_log, updater, lan_cache...), остались бы старыми объектами в sys.modules"""
+        if self.dependencies_changed():
+            return True
+        for filename in self.applied_files:
+            name, ext = os.path.splitext(filename.replace('\\', '/'))
+            if ext == '.py' and name.replace('/', '.') in sys.modules:
+                return True
+        return False
+
+    def get_remote_manifest(self):
+        """Манифест релиза или None, если origin его не публикует"""
+        try:
+            text = self.fetch_text(MANIFEST_FILE)
+            if text:
+                return json.loads(text)
+        except ValueError:
+            self.log("Манифест поврежден")
+        except Exception as e:
+            self.log(f"Ошибка подключения: {e}")
+        return None
+
+    def get_remote_version(self):
+        """Получает версию с GitHub"""
+        try:
+            text = self.fetch_text("version.txt")
+            if text:
+                return text.strip()
+        except Exception as e:
+            self.log(f"Ошибка подключения: {e}")
+        return None
+
+    def download(self, filename):
+        """Скачивает файл и возвращает содержимое или None"""
+        try:
+            response = self.session.get(self.url(filename), timeout=30)
+            self.count_request(len(response.content))
+            if response.status_code == 200:
+                return response.content
+        except Exception as e:
+            self.log(f"Ошибка скачивания {filename}: {e}")
+        return None
+
+    def download_resumable(self, filename, expected_size, digest=None):
+        """Скачивает файл в staging с докачкой .part через HTTP Range.
+        Файл с известным хэшем сначала запрашивается у зеркала; ответ зеркала
+        принимается, только если хэш совпал, иначе файл качается с origin"""
+        staged = safe_path(self.staging_dir, filename)
+        if os.path.exists(staged):
+            # Скачан и проверен в прерванной попытке - хэш перепроверится ниже
+            return staged
+        part = staged + '.part'
+        os.makedirs(os.path.dirname(staged), exist_ok=True)
+
+        if expected_size == 0:
+            # Пустой файл (__init__.py, .gitkeep) не качаем - хватит пустого .part
+            open(part, 'wb').close()
+            return part
+        offset = os.path.getsize(part) if os.path.exists(part) else 0
+        if offset > expected_size:
+            os.remove(part)
+            offset = 0
+        if offset >= expected_size and os.path.exists(part):
+            return part
+
+        mirror = self.mirror
+        if mirror and digest:
+            try:
+                self.download_part(f"{mirror}/objects/{digest}?path={quote(filename)}", part, expected_size)
+                if sha256_file(part) == digest:
+                    return part
+                os.remove(part)
+                self.log(f"{filename}: зеркало отдало файл с другим хэшем, качаю с origin")
+            except (IOError, requests.RequestException) as e:
+                if self.cancelled:
+                    raise
+                self.log(f"{filename}: зеркало не отдало файл ({e}), качаю с origin")
+        self.download_part(self.url(filename), part, expected_size)
+        return part
+
+    def download_part(self, url, part, expected_size):
+        """Дописывает .part с того места, где остановилась прошлая попытка"""
+        offset = os.path.getsize(part) if os.path.exists(part) else 0
+        headers = {'Range': f"bytes={offset}-"} if 0 < offset < expected_size else {}
+        with self.session.get(url, headers=headers, timeout=30, stream=True) as response:
+            self.count_request()
+            if response.status_code == 206:
+                mode = 'ab'
+            elif response.status_code == 200:
+                # Сервер не поддерживает Range - качаем заново
+                mode = 'wb'
+            else:
+                raise IOError(f"HTTP {response.status_code}")
+            with open(part, mode) as f:
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    if self.cancelled:
+                        raise IOError("отменено")
+                    f.write(chunk)
+                    self.count_bytes(len(chunk))
+
+    def prepare_staging(self, version):
+        """Сохраняет недокачанные файлы, если staging готовится для той же версии"""
+        try:
+            with open(self.target_path, 'r', encoding='utf-8') as f:
+                if json.load(f).get('version') == version:
+                    return
+        except (OSError, ValueError):
+            pass
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
+        os.makedirs(self.staging_dir)
+        with open(self.target_path, 'w', encoding='utf-8') as f:
+            json.dump({'version': version}, f)
+
+    def check_and_stage(self):
+        """Проверяет обновление и готовит его в staging. Возвращает (успех, сообщение)"""
+        self.reset_stats()
+        start = time.perf_counter()
+        self.mirror = lan_cache.find_mirror()
+        if self.mirror:
+            self.log(f"Зеркало обновлений: {self.mirror}")
+        try:
+            return self.stage_update()
+        finally:
+            elapsed = time.perf_counter() - start
+            self.log(f"Проверка обновлений: {elapsed:.2f} с, получено {self.bytes_received / 1024:.1f} КБ, "
+                     f"запросов {self.requests_made} (304: {self.not_modified})")
+
+    def stage_update(self):
+        manifest = self.get_remote_manifest()
+        problem = manifest_problem(manifest) if manifest else None
+        if problem:
+            return False, f"Манифест отклонен: {problem}"
+        remote_version = manifest['version'] if manifest else self.get_remote_version()
+        if not remote_version:
+            return True, "Не удалось проверить обновления"
+
+        current_version = self.current_version()
+        self.log(f"Локальная версия: {current_version}")
+        self.log(f"Версия на GitHub: {remote_version}")
+
+        if remote_version == current_version:
+            return True, "Версия актуальна"
+        if remote_version == self.staged_version():
+            return True, f"Версия {remote_version} уже подготовлена"
+
+        self.log(f"Доступно обновление: {current_version} → {remote_version}")
+        if manifest:
+            return self.stage_from_manifest(manifest)
+        return self.stage_full(remote_version)
+
+    def changed_files(self, manifest):
+        """Файлы манифеста, чей хэш отличается от локального"""
+        index = LocalHashIndex(self.app_dir)
+        changed = [rel_path for rel_path, info in manifest['files'].items()
+                   if index.hash_of(rel_path) != info['sha256']]
+        index.save()
+        return changed
+
+    def stage_from_manifest(self, manifest):
+        """Скачивает только изменившиеся файлы и проверяет их хэши"""
+        version = manifest['version']
+        changed = self.changed_files(manifest)
+        total_size = sum(manifest['files'][f]['size'] for f in changed)
+        self.log(f"Изменилось файлов: {len(changed)} из {len(manifest['files'])}, "
+                 f"{total_size / 1024:.0f} КБ")
+
+        self.prepare_staging(version)
+        parts = {}
+        errors = []
+        # Независимые файлы качаются параллельно, но не больше MAX_PARALLEL_DOWNLOADS
+        with ThreadPoolExecutor(max_workers=MAX_PARALLEL_DOWNLOADS) as pool:
+            futures = {}
+            for filename in changed:
+                self.log(f"Скачиваю {filename}...")
+                entry = manifest['files'][filename]
+                futures[pool.submit(self.download_resumable, filename, entry['size'], entry['sha256'])] = filename
+            for future in as_completed(futures):
+                filename = futures[future]
+                try:
+                    parts[filename] = future.result()
+                except Exception as e:
+                    errors.append(f"Ошибка скачивания {filename}: {e}")
+        if self.cancelled:
+            return False, "Обновление отменено"
+        if errors:
+            return False, errors[0]
+
+        # Хэши проверяются параллельно: hashlib отпускает GIL на больших блоках
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            digests = dict(zip(parts, pool.map(sha256_file, parts.values())))
+        for filename, digest in digests.items():
+            if digest != manifest['files'][filename]['sha256']:
+                os.remove(parts[filename])
+                return False, f"{filename}: хэш не совпадает"
+            os.replace(parts[filename], safe_path(self.staging_dir, filename))
+
+        if 'requirements.txt' in changed and not self.install_staged_requirements():
+            return False, "Ошибка установки зависимостей"
+
+        self.mark_ready(version, changed, manifest)
+        return True, f"Версия {version} будет установлена при следующем запуске"
+
+    def stage_full(self, remote_version):
+        """Старый путь для релизов без манифеста: полное скачивание UPDATE_FILES"""
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
+        os.makedirs(self.staging_dir)
+
+        for filename in UPDATE_FILES:
+            if self.cancelled:
+                return False, "Обновление отменено"
+            self.log(f"Скачиваю {filename}...")
+            content = self.download(filename)
+            if content is None:
+                return False, f"Ошибка скачивания {filename}"
+            problem = verify_file(filename, content)
+            if problem:
+                return False, f"{filename}: {problem}"
+
+            staged = safe_path(self.staging_dir, filename)
+            with open(staged, 'wb') as f:
+                f.write(content)
+
+        if not self.install_staged_requirements():
+            return False, "Ошибка установки зависимостей"
+
+        self.mark_ready(remote_version, UPDATE_FILES)
+        return True, f"Версия {remote_version} будет установлена при следующем запуске"
+
+    def install_staged_requirements(self):
+        # Зависимости ставим сейчас, пока работает старая версия:
+        # уже загруженное приложение новые пакеты не затронут
+        return self.install_requirements(os.path.join(self.staging_dir, 'requirements.txt'))
+
+    def mark_ready(self, version, files, manifest=None):
+        # READY пишется последним - только он делает подготовку действительной
+        ready = {'version': version, 'files': files}
+        if manifest:
+            ready['manifest'] = manifest
+        ready_tmp = self.ready_path + '.tmp'
+        with open(ready_tmp, 'w', encoding='utf-8') as f:
+            json.dump(ready, f, ensure_ascii=False)
+        os.replace(ready_tmp, self.ready_path)
+
+    def installed_requirements_hash(self):
+        try:
+            with open(self.path(REQUIREMENTS_HASH_FILE), 'r', encoding='utf-8') as f:
+                return f.read().strip()
+        except OSError:
+            return None
+
+    def wheelhouse(self):
+        """Источник колес для pip или None, если он не подготовлен"""
+        if WHEELHOUSE.startswith(('http://', 'https://')):
+            return WHEELHOUSE
+        path = WHEELHOUSE if os.path.isabs(WHEELHOUSE) else self.path(WHEELHOUSE)
+        return path if os.path.isdir(path) else None
+
+    def install_requirements(self, requirements_path):
+        """Устанавливает зависимости, если requirements.txt изменился с прошлой установки"""
+        digest = sha256_file(requirements_path)
+        if digest == self.installed_requirements_hash():
+            self.log("Зависимости не изменились, установка пропущена")
+            return True
+
+        command = [sys.executable, "-m", "pip", "install", "--disable-pip-version-check"]
+        wheelhouse = self.wheelhouse()
+        if wheelhouse:
+            # Только готовые колеса: без индекса и без сборки из исходников
+            command += ["--no-index", "--find-links", wheelhouse]
+            source = wheelhouse
+        else:
+            command += ["--prefer-binary"]
+            source = "PyPI"
+            self.log("Локальный wheelhouse не найден, колеса берутся из PyPI")
+        command += ["-r", requirements_path]
+
+        self.log(f"Установка зависимостей ({source})...")
+        start = time.perf_counter()
+        try:
+            result = subprocess.run(command, capture_output=True, text=True, timeout=PIP_TIMEOUT)
+        except (OSError, subprocess.TimeoutExpired) as e:
+            self.log(f"Ошибка pip: {e}")
+            return False
+        elapsed = time.perf_counter() - start
+
+        if result.returncode != 0:
+            self.log(f"pip завершился с кодом {result.returncode} за {elapsed:.1f} с")
+            for line in (result.stderr or result.stdout).strip().splitlines()[-5:]:
+                self.log(f"  {line}")
+            return False
+
+        with open(self.path(REQUIREMENTS_HASH_FILE), 'w', encoding='utf-8') as f:
+            f.write(digest)
+        self.log(f"Зависимости установлены за {elapsed:.1f} с")
+        return True
+
+
+def make_release_server(directory, port, host=''):
+    """HTTP-сервер с поддержкой Range - замена GitHub для проверки обновлений"""
+    import functools
+    from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+    class RangeRequestHandler(SimpleHTTPRequestHandler):
+        def send_head(self):
+            range_header = self.headers.get('Range')
+            path = self.translate_path(self.path)
+            if not range_header or not os.path.isfile(path):
+                return super().send_head()
+            start = lan_cache.range_start(range_header)
+            size = os.path.getsize(path)
+            if start is None or start >= size:
+                self.send_error(416)
+                return None
+            f = open(path, 'rb')
+            f.seek(start)
+            self.send_response(206)
+            self.send_header("Content-Type", self.guess_type(path))
+            self.send_header("Content-Range", f"bytes {start}-{size - 1}/{size}")
+            self.send_header("Content-Length", str(size - start))
+            self.end_headers()
+            return f
+
+        def log_message(self, format, *args):
+            pass
+
+    handler = functools.partial(RangeRequestHandler, directory=directory)
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def serve_release(directory, port):
+    server = make_release_server(directory, port)
+    print(f"Раздача релиза {directory} на http://127.0.0.1:{port}")
+    server.serve_forever()
+
+
+def main():
+    """Командная строка: сборка манифеста и локальный сервер релиза"""
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Обновления Smart Trainer")
+    commands = parser.add_subparsers(dest='command', required=True)
+    manifest_cmd = commands.add_parser('manifest', help="собрать manifest.json")
+    manifest_cmd.add_argument('--dir', default=os.path.dirname(os.path.abspath(__file__)))
+    wheel_cmd = commands.add_parser('wheelhouse', help="собрать колеса зависимостей заранее")
+    wheel_cmd.add_argument('--dir', default=os.path.dirname(os.path.abspath(__file__)))
+    wheel_cmd.add_argument('--out', default=WHEELHOUSE)
+    serve_cmd = commands.add_parser('serve', help="раздать папку релиза по HTTP")
+    serve_cmd.add_argument('directory')
+    serve_cmd.add_argument('--port', type=int, default=8000)
+    args = parser.parse_args()
+
+    if args.command == 'manifest':
+        version = read_version(os.path.join(args.dir, "version.txt"))
+        manifest = build_manifest(args.dir, version)
+        with open(os.path.join(args.dir, MANIFEST_FILE), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=1)
+        print(f"{MANIFEST_FILE}: версия {version}, файлов {len(manifest['files'])}")
+    elif args.command == 'wheelhouse':
+        # Собирать на машине той же архитектуры, что и киоск (ARM), чтобы колеса подошли
+        out = args.out if os.path.isabs(args.out) else os.path.join(args.dir, args.out)
+        subprocess.check_call([sys.executable, "-m", "pip", "wheel", "--prefer-binary",
+                               "-r", os.path.join(args.dir, "requirements.txt"), "-w", out])
+        print(f"Колеса собраны в {out}")
+    elif args.command == 'serve':
+        serve_release(args.directory, args.port)
+
+
+if __name__ == "__main__":
+    main()
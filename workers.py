@@ -0,0 +1,560 @@
+#!/usr/bin/env python3
+"""
+Smart Trainer Workers - сбор данных и запись в базу в отдельных процессах
+Процесс сбора опрашивает датчик и пишет отсчеты в кольцевой буфер в общей памяти
+(multiprocessing.shared_memory), интерфейс читает их оттуда без копирования через очереди.
+Процесс записи сохраняет тренировки пачками. Супервизор перезапускает упавшие
+или зависшие процессы, буфер и очереди при этом сохраняются.
+
+Включается переменной SMART_TRAINER_WORKERS=1. Изоляция процесса сбора
+по ядрам и приоритету настраивается в realtime.py.
+Бенчмарк: python workers.py bench [--seconds 5] [--rate 1000] [--kill-after 2]
+Дрожание периода под нагрузкой: python workers.py jitter [--cpu 3] [--fifo 50] [--mlock] [--load 3]
+Модуль не импортирует Qt: процессы стартуют методом spawn без __main__ интерфейса
+(см. qt_free_main) и грузят только его. Процессы завершаются вместе с родителем,
+тренировки хранятся у супервизора до подтверждения записи.
+"""
+import ctypes
+import gc
+import multiprocessing
+import os
+import queue
+import signal
+import sqlite3
+import sys
+import time
+import types
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+
+import realtime
+from event_log import log
+from sensor import ModbusSimulator
+
+HEADER_SLOTS = 8
+HEADER_BYTES = HEADER_SLOTS * 8
+# Слоты заголовка
+SEQ = 0             # сквозной номер следующего отсчета
+CAPACITY = 1
+HEARTBEAT_NS = 2    # time.monotonic_ns() последней записи, общий для процессов
+WRITER_PID = 3
+# Поля отсчета
+RECORD_FIELDS = 3   # сила, положение, time.monotonic() снятия отсчета
+
+SAMPLE_INTERVAL = 0.1
+HEARTBEAT_TIMEOUT = 2.0
+PERSIST_BATCH = 100
+# Как часто дочерний процесс проверяет, жив ли родитель, с
+PARENT_CHECK_INTERVAL = 1.0
+PR_SET_PDEATHSIG = 1
+
+
+class SharedSampleRing:
+    """Кольцевой буфер отсчетов в общей памяти: один писатель, любое число читателей.
+    Для графика повторяет интерфейс SampleBuffer (total, oldest, value_at)"""
+
+    def __init__(self, shm, owner):
+        self.shm = shm
+        self.owner = owner
+        self.header = shm.buf[:HEADER_BYTES].cast('Q')
+        self.data = shm.buf[HEADER_BYTES:].cast('d')
+        self.capacity = self.header[CAPACITY]
+
+    @classmethod
+    def create(cls, capacity=4096):
+        size = HEADER_BYTES + capacity * RECORD_FIELDS * 8
+        ring = cls(shared_memory.SharedMemory(create=True, size=size), owner=True)
+        ring.header[CAPACITY] = capacity
+        ring.capacity = capacity
+        ring.header[HEARTBEAT_NS] = time.monotonic_ns()
+        return ring
+
+    @classmethod
+    def attach(cls, name):
+        try:
+            shm = shared_memory.SharedMemory(name=name, track=False)
+        except TypeError:
+            # До Python 3.13 сегмент регистрируется всегда, но дочерние процессы
+            # делят resource_tracker с родителем, и повторная регистрация ничего не меняет
+            shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, owner=False)
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    @property
+    def total(self):
+        return self.header[SEQ]
+
+    def oldest(self):
+        return max(0, self.header[SEQ] - self.capacity)
+
+    def value_at(self, index):
+        return self.data[(index % self.capacity) * RECORD_FIELDS]
+
+    def append(self, force, position, timestamp):
+        seq = self.header[SEQ]
+        offset = (seq % self.capacity) * RECORD_FIELDS
+        self.data[offset] = force
+        self.data[offset + 1] = position
+        self.data[offset + 2] = timestamp
+        # Номер публикуется после данных - читатель не увидит недописанный отсчет
+        self.header[SEQ] = seq + 1
+        self.header[HEARTBEAT_NS] = time.monotonic_ns()
+
+    def latest_offset(self):
+        """Индекс силы последнего отсчета в data или -1. Без кортежа - для тика интерфейса"""
+        seq = self.header[SEQ]
+        if seq == 0:
+            return -1
+        return ((seq - 1) % self.capacity) * RECORD_FIELDS
+
+    def latest(self):
+        """Последний отсчет (сила, положение, время) или None"""
+        offset = self.latest_offset()
+        if offset < 0:
+            return None
+        return self.data[offset], self.data[offset + 1], self.data[offset + 2]
+
+    def read_since(self, index):
+        """Отсчеты с номера index. Возвращает (следующий номер, [(сила, положение, время)])"""
+        seq = self.header[SEQ]
+        start = max(index, seq - self.capacity)
+        records = []
+        for i in range(start, seq):
+            offset = (i % self.capacity) * RECORD_FIELDS
+            records.append((self.data[offset], self.data[offset + 1], self.data[offset + 2]))
+        # Пока читали, писатель мог обойти кольцо - затертые отсчеты отбрасываем. Данные
+        # пишутся до публикации номера, поэтому ячейку отсчета SEQ - capacity писатель
+        # может переписывать прямо сейчас: она тоже не в счет
+        overwritten = self.header[SEQ] + 1 - self.capacity - start
+        if overwritten > 0:
+            records = records[overwritten:]
+        return seq, records
+
+    def heartbeat_age(self):
+        return (time.monotonic_ns() - self.header[HEARTBEAT_NS]) / 1e9
+
+    def close(self):
+        # memoryview нужно освободить до закрытия сегмента
+        self.header.release()
+        self.data.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+@contextmanager
+def qt_free_main():
+    """spawn передает дочернему процессу __main__ родителя, и тот его импортирует:
+    из app.py это весь PySide6 и баннер запуска. На время start() подставляем пустой
+    __main__ - ребенок грузит только workers.py и его зависимости"""
+    if __name__ == '__main__':
+        # Запуск как скрипт (бенчмарки): __main__ - этот модуль, цели процессов в нем
+        yield
+        return
+    main = sys.modules['__main__']
+    sys.modules['__main__'] = types.ModuleType('__main__')
+    try:
+        yield
+    finally:
+        sys.modules['__main__'] = main
+
+
+def exit_with_parent():
+    """Ядро завершит процесс по SIGTERM, когда умрет родитель (Linux). Иначе и вдобавок -
+    проверка parent_alive() в циклах процессов"""
+    if sys.platform.startswith('linux'):
+        try:
+            ctypes.CDLL(None, use_errno=True).prctl(PR_SET_PDEATHSIG, signal.SIGTERM)
+        except (OSError, AttributeError):
+            pass
+    # Родитель мог умереть до prctl - тогда сигнала уже не будет
+    if not parent_alive():
+        sys.exit(0)
+
+
+def parent_alive():
+    parent = multiprocessing.parent_process()
+    return parent is None or parent.is_alive()
+
+
+def acquisition_main(shm_name, commands, interval, target_force, realtime_config):
+    """Процесс сбора: опрос датчика с постоянным периодом"""
+    exit_with_parent()
+    realtime.apply_acquisition(realtime_config)
+    ring = SharedSampleRing.attach(shm_name)
+    ring.header[WRITER_PID] = os.getpid()
+    sensor = ModbusSimulator()
+    sensor.set_target_force(target_force)
+    # Все, что создано при старте, сборщику обходить незачем
+    gc.collect()
+    gc.freeze()
+
+    next_tick = time.monotonic()
+    next_parent_check = next_tick + PARENT_CHECK_INTERVAL
+    try:
+        while True:
+            if next_tick >= next_parent_check:
+                if not parent_alive():
+                    return
+                next_parent_check = next_tick + PARENT_CHECK_INTERVAL
+
+            # Проверка канала вместо get_nowait: без исключения Empty на каждом отсчете
+            while not commands.empty():
+                try:
+                    command, value = commands.get_nowait()
+                except queue.Empty:
+                    break
+                if command == 'stop':
+                    return
+                if command == 'target':
+                    sensor.set_target_force(value)
+
+            force = sensor.read_force_sensor()
+            position = sensor.get_position()
+            ring.append(force, position, time.monotonic())
+
+            next_tick += interval
+            delay = next_tick - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                # Отстали (например, процесс был приостановлен) - не догоняем пачкой
+                next_tick = time.monotonic()
+    finally:
+        ring.close()
+
+
+def persistence_main(db_path, records, acks, realtime_config):
+    """Процесс записи: тренировки сохраняются пачками, одним commit на пачку.
+    Запись приходит как (номер, строка), номер подтверждается только после commit"""
+    exit_with_parent()
+    realtime.confine(realtime_config)
+    conn = sqlite3.connect(db_path, timeout=10)
+    while True:
+        try:
+            batch = [records.get(timeout=PARENT_CHECK_INTERVAL)]
+        except queue.Empty:
+            if not parent_alive():
+                break
+            continue
+        while len(batch) < PERSIST_BATCH:
+            try:
+                batch.append(records.get_nowait())
+            except queue.Empty:
+                break
+
+        entries = [entry for entry in batch if entry is not None]
+        if entries:
+            conn.executemany('''
+                INSERT INTO workouts (user_id, exercise_name, repetitions, intensity, duration)
+                VALUES (?, ?, ?, ?, ?)
+            ''', [row for _, row in entries])
+            conn.commit()
+            for record_id, _ in entries:
+                acks.put(record_id)
+        if len(entries) != len(batch):
+            break
+    conn.close()
+
+
+class WorkerSupervisor:
+    """Запускает процессы сбора и записи и перезапускает их при падении или зависании"""
+
+    def __init__(self, db_path, capacity=4096, interval=SAMPLE_INTERVAL, realtime_config=None):
+        self.db_path = db_path
+        self.interval = interval
+        self.realtime = realtime_config or realtime.RealtimeConfig.from_env()
+        self.context = multiprocessing.get_context('spawn')
+        self.ring = SharedSampleRing.create(capacity)
+        self.commands = self.context.Queue()
+        self.records = self.context.Queue()
+        self.acks = self.context.Queue()
+        self.processes = {}
+        self.restarts = {'acquisition': 0, 'persistence': 0}
+        self.recovery_times = []
+        self.recovering = None
+        self.target_force = 0.0
+        self.on_saved = None
+        self.stopped = False
+        # Тренировки, запись которых еще не подтверждена: при падении процесса записи
+        # отправляются заново. Падение между commit и подтверждением даст повтор строки
+        self.unconfirmed = {}
+        self.next_record_id = 0
+
+    def spawn(self, name):
+        if name == 'acquisition':
+            target = acquisition_main
+            args = (self.ring.name, self.commands, self.interval, self.target_force, self.realtime)
+            # Новому процессу даем время стартовать, прежде чем судить по пульсу
+            self.ring.header[HEARTBEAT_NS] = time.monotonic_ns()
+        else:
+            target = persistence_main
+            args = (self.db_path, self.records, self.acks, self.realtime)
+        process = self.context.Process(target=target, args=args, name=f"smart-trainer-{name}", daemon=True)
+        with qt_free_main():
+            process.start()
+        self.processes[name] = process
+
+    def start(self):
+        self.spawn('acquisition')
+        self.spawn('persistence')
+        # Интерфейс (этот процесс) уходит с ядра сбора, дочерние процессы уже запущены
+        realtime.confine(self.realtime)
+
+    def poll(self):
+        """Проверка процессов и разбор подтверждений записи. Вызывается таймером интерфейса"""
+        if self.stopped:
+            return
+        self.process_acks()
+        for name, process in list(self.processes.items()):
+            hung = name == 'acquisition' and self.ring.heartbeat_age() > HEARTBEAT_TIMEOUT
+            if process.is_alive() and not hung:
+                continue
+            if process.is_alive():
+                process.terminate()
+            process.join(timeout=1.0)
+            if name == 'persistence':
+                self.resend_unconfirmed()
+            self.spawn(name)
+            self.restarts[name] += 1
+            if name == 'acquisition':
+                # Восстановление - до первого отсчета от нового процесса
+                self.recovering = (time.perf_counter(), self.ring.total)
+            log.warning("Процесс перезапущен", worker=name, reason='hung' if hung else process.exitcode)
+
+        if self.recovering is not None and self.ring.total > self.recovering[1]:
+            self.recovery_times.append(time.perf_counter() - self.recovering[0])
+            self.recovering = None
+
+    def process_acks(self):
+        while True:
+            try:
+                record_id = self.acks.get_nowait()
+            except queue.Empty:
+                break
+            row = self.unconfirmed.pop(record_id, None)
+            if row is not None and self.on_saved is not None:
+                self.on_saved(row[0])
+
+    def resend_unconfirmed(self):
+        """Вызывается до запуска нового процесса записи: очередь заполняется заново всеми
+        неподтвержденными тренировками. Если упавший процесс успел сделать commit,
+        но не подтверждение, строка сохранится дважды - зато не потеряется"""
+        # Подтверждения, пришедшие перед падением, отсекают уже сохраненное
+        self.process_acks()
+        # Записи, которые упавший процесс не успел прочитать, еще в очереди
+        while True:
+            try:
+                self.records.get_nowait()
+            except queue.Empty:
+                break
+        for record_id, row in sorted(self.unconfirmed.items()):
+            self.records.put((record_id, row))
+        if self.unconfirmed:
+            log.warning("Тренировки отправлены на запись повторно", count=len(self.unconfirmed))
+
+    def set_target_force(self, force):
+        self.target_force = force
+        self.commands.put(('target', force))
+
+    def save_workout(self, user_id, exercise_name, repetitions, intensity, duration):
+        row = (user_id, exercise_name, repetitions, intensity, duration)
+        self.next_record_id += 1
+        self.unconfirmed[self.next_record_id] = row
+        self.records.put((self.next_record_id, row))
+
+    def stats(self):
+        return {'restarts': dict(self.restarts),
+                'recovery_ms': [round(t * 1000.0, 1) for t in self.recovery_times]}
+
+    def stop(self):
+        if self.stopped:
+            return
+        self.stopped = True
+        self.commands.put(('stop', None))
+        # Процесс записи дописывает очередь до маркера None
+        self.records.put(None)
+        for process in self.processes.values():
+            process.join(timeout=2.0)
+            if process.is_alive():
+                process.terminate()
+        self.ring.close()
+
+
+def read_cpu_times():
+    """Время каждого ядра из /proc/stat: {ядро: (занято, всего)}"""
+    result = {}
+    with open('/proc/stat', 'r') as f:
+        for line in f:
+            if line.startswith('cpu') and line[3].isdigit():
+                name, *values = line.split()
+                values = [int(v) for v in values]
+                idle = values[3] + values[4]
+                result[name] = (sum(values) - idle, sum(values))
+    return result
+
+
+def benchmark(seconds, rate, kill_after=None):
+    """Задержка от снятия отсчета до чтения в главном процессе и загрузка ядер"""
+    import signal
+    import statistics
+    import tempfile
+
+    work_dir = tempfile.mkdtemp(prefix='smart_trainer_workers_')
+    db_path = os.path.join(work_dir, 'users.db')
+    conn = sqlite3.connect(db_path)
+    conn.execute('''
+        CREATE TABLE workouts (id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER,
+            exercise_name TEXT NOT NULL, repetitions INTEGER, intensity REAL, duration INTEGER,
+            workout_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP)
+    ''')
+    conn.commit()
+
+    supervisor = WorkerSupervisor(db_path, capacity=max(4096, rate * 2), interval=1.0 / rate)
+    supervisor.start()
+    supervisor.set_target_force(50.0)
+    while supervisor.ring.total == 0:
+        time.sleep(0.01)
+
+    cpu_before = read_cpu_times()
+    latencies = []
+    max_gap = 0.0
+    last_timestamp = None
+    index = supervisor.ring.total
+    killed = False
+    start = time.monotonic()
+    next_poll = start
+    while time.monotonic() - start < seconds:
+        index, records = supervisor.ring.read_since(index)
+        now = time.monotonic()
+        for force, position, timestamp in records:
+            latencies.append(now - timestamp)
+            if last_timestamp is not None:
+                max_gap = max(max_gap, timestamp - last_timestamp)
+            last_timestamp = timestamp
+        if kill_after is not None and not killed and now - start > kill_after:
+            os.kill(supervisor.processes['acquisition'].pid, signal.SIGKILL)
+            killed = True
+        if now >= next_poll:
+            supervisor.save_workout(1, "Бенчмарк", 10, 50.0, 1)
+            supervisor.poll()
+            next_poll = now + 0.1
+        time.sleep(0.001)
+    cpu_after = read_cpu_times()
+    supervisor.stop()
+
+    saved = sqlite3.connect(db_path).execute('SELECT COUNT(*) FROM workouts').fetchone()[0]
+    latencies.sort()
+    print(f"Частота {rate} Гц, {seconds} с: получено {len(latencies)} отсчетов из ~{int(rate * seconds)}")
+    if latencies:
+        print(f"Задержка отсчета, мс: медиана {statistics.median(latencies) * 1000:.2f}, "
+              f"p99 {latencies[int(len(latencies) * 0.99)] * 1000:.2f}, макс {latencies[-1] * 1000:.2f}")
+    print(f"Наибольший разрыв между отсчетами: {max_gap * 1000:.1f} мс")
+    print(f"Сохранено тренировок: {saved}, перезапуски: {supervisor.stats()}")
+    print("Загрузка ядер:")
+    for name in sorted(cpu_after):
+        busy = cpu_after[name][0] - cpu_before[name][0]
+        total = cpu_after[name][1] - cpu_before[name][1]
+        print(f"  {name:<6} {100.0 * busy / total if total else 0.0:5.1f} %")
+
+
+def synthetic_ui_load(stop, realtime_config):
+    """Нагрузка, похожая на интерфейс: вычисления, форматирование строк и работа сборщика мусора"""
+    realtime.confine(realtime_config)
+    while not stop.is_set():
+        rows = [{'value': i * 1.5, 'label': f"{i:05d}"} for i in range(2000)]
+        sum(row['value'] for row in rows)
+        del rows
+
+
+def measure_jitter(seconds, rate, load, realtime_config):
+    """Отклонения интервала между отсчетами от периода, с. Нагрузка - load процессов"""
+    context = multiprocessing.get_context('spawn')
+    stop = context.Event()
+    loaders = [context.Process(target=synthetic_ui_load, args=(stop, realtime_config), daemon=True)
+               for _ in range(load)]
+    for process in loaders:
+        process.start()
+
+    supervisor = WorkerSupervisor(':memory:', capacity=max(4096, rate * 2), interval=1.0 / rate,
+                                  realtime_config=realtime_config)
+    supervisor.start()
+    while supervisor.ring.total == 0:
+        time.sleep(0.01)
+
+    deviations = []
+    last_timestamp = None
+    index = supervisor.ring.total
+    start = time.monotonic()
+    while time.monotonic() - start < seconds:
+        index, records = supervisor.ring.read_since(index)
+        for _, _, timestamp in records:
+            if last_timestamp is not None:
+                deviations.append(abs(timestamp - last_timestamp - 1.0 / rate))
+            last_timestamp = timestamp
+        time.sleep(0.01)
+
+    stop.set()
+    supervisor.stop()
+    for process in loaders:
+        process.join(timeout=2.0)
+    return sorted(deviations)
+
+
+def jitter_benchmark(seconds, rate, load, realtime_config):
+    """Сравнивает дрожание без изоляции и с изоляцией при одинаковой нагрузке"""
+    import statistics
+
+    cpus = sorted(os.sched_getaffinity(0))
+    print(f"Ядра: {cpus}, нагрузка: {load} процесса, частота {rate} Гц, {seconds} с на прогон")
+    if len(cpus) == 1:
+        print("Ядро одно - закрепление ничего не меняет, сравнивается только приоритет и память")
+
+    results = {}
+    # Прогон с изоляцией последним: confine сужает ядра и этого процесса
+    for label, config in (("без изоляции", realtime.RealtimeConfig()), ("с изоляцией", realtime_config)):
+        results[label] = measure_jitter(seconds, rate, load, config)
+
+    period_ms = 1000.0 / rate
+    print(f"\n{'Режим':<14} {'отсчетов':>9} {'медиана, мс':>12} {'p99, мс':>9} {'макс, мс':>9} {'> периода':>10}")
+    for label, deviations in results.items():
+        if not deviations:
+            print(f"{label:<14} {'нет данных':>9}")
+            continue
+        late = sum(1 for d in deviations if d > period_ms / 1000.0)
+        print(f"{label:<14} {len(deviations):9d} {statistics.median(deviations) * 1000:12.3f} "
+              f"{deviations[int(len(deviations) * 0.99)] * 1000:9.3f} {deviations[-1] * 1000:9.3f} {late:10d}")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Процессы сбора и записи Smart Trainer")
+    commands = parser.add_subparsers(dest='command', required=True)
+    bench_cmd = commands.add_parser('bench', help="задержка отсчетов и загрузка ядер")
+    bench_cmd.add_argument('--seconds', type=float, default=5.0)
+    bench_cmd.add_argument('--rate', type=int, default=1000)
+    bench_cmd.add_argument('--kill-after', type=float, default=None,
+                           help="убить процесс сбора через N секунд, чтобы проверить перезапуск")
+    jitter_cmd = commands.add_parser('jitter', help="дрожание периода отсчетов с изоляцией и без")
+    jitter_cmd.add_argument('--seconds', type=float, default=5.0)
+    jitter_cmd.add_argument('--rate', type=int, default=1000)
+    jitter_cmd.add_argument('--load', type=int, default=max(1, (os.cpu_count() or 1) - 1),
+                            help="процессов синтетической нагрузки интерфейса")
+    jitter_cmd.add_argument('--cpu', type=int, default=None, help="ядро процесса сбора (по умолчанию последнее)")
+    jitter_cmd.add_argument('--fifo', type=int, default=50, help="приоритет SCHED_FIFO, 0 - выключено")
+    jitter_cmd.add_argument('--mlock', action='store_true')
+    args = parser.parse_args()
+    if args.command == 'bench':
+        benchmark(args.seconds, args.rate, args.kill_after)
+    elif args.command == 'jitter':
+        cpu = args.cpu if args.cpu is not None else max(os.sched_getaffinity(0))
+        jitter_benchmark(args.seconds, args.rate, args.load,
+                         realtime.RealtimeConfig(cpu, args.fifo, args.mlock))
+
+
+if __name__ == "__main__":
+    main()
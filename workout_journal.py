@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+Smart Trainer Workout Journal - журнал незавершенной тренировки
+Пока идет подход, состояние дописывается в файл JSON-строками: запись начала
+и контрольные точки (число повторений, прошедшее время). Повторение только
+запоминается в памяти, на диск точка уходит не чаще FLUSH_INTERVAL, fsync -
+не чаще FSYNC_INTERVAL и в отдельном потоке: fsync на SD-карте может занять
+десятки миллисекунд, поток интерфейса его не ждет. При сбое процесса теряется не больше FLUSH_INTERVAL,
+при отключении питания - не больше FSYNC_INTERVAL.
+
+После сохранения или отмены подхода файл удаляется, поэтому в нем всегда
+не больше одной тренировки и восстановление читает несколько строк.
+Стоимость на горячем пути: python workout_journal.py overhead
+"""
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+JOURNAL_PATH = os.environ.get('SMART_TRAINER_JOURNAL', 'workout_journal.jsonl')
+FLUSH_INTERVAL = 1.0
+FSYNC_INTERVAL = 5.0
+
+
+class WorkoutJournal:
+    """Контрольные точки текущего подхода в файле только для дописывания"""
+
+    def __init__(self, path=JOURNAL_PATH, flush_interval=FLUSH_INTERVAL,
+                 fsync_interval=FSYNC_INTERVAL, clock=time.perf_counter):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.fsync_interval = fsync_interval
+        self.clock = clock
+        self.file = None
+        self.reps = 0
+        self.written_reps = 0
+        self.started_at = 0.0
+        self.elapsed_before = 0.0
+        self.last_flush = 0.0
+        self.last_fsync = 0.0
+        self.syncer = None
+
+    @property
+    def active(self):
+        return self.file is not None
+
+    def begin(self, user, exercise, reps=0, elapsed=0.0):
+        """Начало подхода. reps и elapsed задаются при продолжении прерванной тренировки"""
+        self.close()
+        now = self.clock()
+        self.reps = self.written_reps = reps
+        self.started_at = now
+        self.elapsed_before = elapsed
+        record = {
+            't': 'start',
+            'user_id': user[0],
+            'rf_id': user[1],
+            'exercise': exercise['name'],
+            'intensity': exercise['intensity'],
+            'wall': round(time.time(), 3),
+            'reps': reps,
+            'elapsed': round(elapsed, 1),
+        }
+        self.file = open(self.path, 'w', encoding='utf-8')
+        self.file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        # Начало подхода - редкое событие, его синхронизируем сразу
+        self.sync(now)
+        self.last_flush = now
+
+    def record_rep(self, reps):
+        # Только запоминаем: на диск уйдет последнее значение при ближайшем сбросе
+        self.reps = reps
+
+    def maybe_flush(self, now):
+        """Вызывается с таймера датчика: сравнение времени, запись - раз в flush_interval"""
+        if self.file is not None and self.reps != self.written_reps and now - self.last_flush >= self.flush_interval:
+            self.flush(now)
+
+    def flush(self, now=None):
+        if self.file is None:
+            return
+        now = self.clock() if now is None else now
+        elapsed = self.elapsed_before + now - self.started_at
+        self.file.write(f'{{"t":"rep","reps":{self.reps},"elapsed":{elapsed:.1f}}}\n')
+        self.file.flush()
+        self.written_reps = self.reps
+        self.last_flush = now
+        if now - self.last_fsync >= self.fsync_interval:
+            self.sync(now)
+
+    def sync(self, now):
+        self.file.flush()
+        self.last_fsync = now
+        if self.syncer is None:
+            self.syncer = ThreadPoolExecutor(max_workers=1, thread_name_prefix='journal-sync')
+        # Копия дескриптора остается валидной, даже если файл закроют раньше fsync
+        self.syncer.submit(fsync_and_close, os.dup(self.file.fileno()))
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def finish(self):
+        """Подход сохранен или отменен - журнал больше не нужен"""
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def recover(self):
+        """Прерванный подход из журнала или None. Оборванная последняя строка пропускается"""
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                lines = f.readlines()
+        except OSError:
+            return None
+        session = None
+        for line in lines:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get('t') == 'start':
+                session = record
+            elif record.get('t') == 'rep' and session is not None:
+                session['reps'] = record['reps']
+                session['elapsed'] = record['elapsed']
+        return session
+
+
+def fsync_and_close(fd):
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def measure_overhead(reps=20000, rep_period=0.5):
+    """Доля процессора на журнал при повторении раз в rep_period секунд и тике датчика 100 мс"""
+    import tempfile
+
+    path = os.path.join(tempfile.mkdtemp(prefix='smart_trainer_journal_'), 'journal.jsonl')
+    fake_time = [0.0]
+    journal = WorkoutJournal(path, clock=lambda: fake_time[0])
+    journal.begin((1, '1234567890'), {'name': 'Жим от груди', 'intensity': 60})
+
+    # Модельное время: тик датчика каждые 100 мс, повторение - раз в rep_period
+    ticks_per_rep = max(1, int(rep_period / 0.1))
+    perf_counter = time.perf_counter
+    start = perf_counter()
+    for rep in range(1, reps + 1):
+        journal.record_rep(rep)
+        for _ in range(ticks_per_rep):
+            fake_time[0] += 0.1
+            journal.maybe_flush(fake_time[0])
+    spent = perf_counter() - start
+    journal.finish()
+    journal.syncer.shutdown()
+    os.rmdir(os.path.dirname(path))
+
+    simulated = fake_time[0]
+    return {
+        'per_rep_us': spent / reps * 1e6,
+        'cpu_percent': spent / simulated * 100.0,
+    }
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:] == ['overhead']:
+        result = measure_overhead()
+        print(f"На повторение: {result['per_rep_us']:.1f} мкс, "
+              f"доля процессора: {result['cpu_percent']:.4f} %")
+    else:
+        print(__doc__)